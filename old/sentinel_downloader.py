@@ -4,7 +4,11 @@ Sentinel-2A Image Downloader using Sentinel Hub API
 This script downloads Sentinel-2A satellite imagery for a specified area and time period.
 """
 
+import io
 import os
+import hashlib
+import tarfile
+from functools import lru_cache
 from datetime import datetime, timedelta
 from sentinelhub import (
     SHConfig,
@@ -13,14 +17,63 @@ from sentinelhub import (
     DataCollection,
     MimeType,
     SentinelHubRequest,
+    SentinelHubDownloadClient,
     bbox_to_dimensions,
 )
 
 
+DEFAULT_EVALSCRIPT = """
+    //VERSION=3
+    function setup() {
+        return {
+            input: [{
+                bands: ["B02", "B03", "B04", "B08"],
+                units: "DN"
+            }],
+            output: {
+                bands: 4,
+                sampleType: "AUTO"
+            }
+        };
+    }
+
+    function evaluatePixel(sample) {
+        return [sample.B04, sample.B03, sample.B02, sample.B08];
+    }
+"""
+
+
+def build_bands_evalscript(bands):
+    """밴드마다 출력(id = 밴드명) 하나씩을 갖는 evalscript (요청 1건으로 여러 밴드 수신)"""
+    outputs = ",\n".join(
+        f'                {{ id: "{band}", bands: 1, sampleType: "AUTO" }}' for band in bands
+    )
+    returned = ", ".join(f"{band}: [sample.{band}]" for band in bands)
+    band_list = ", ".join(f'"{band}"' for band in bands)
+    return f"""
+    //VERSION=3
+    function setup() {{
+        return {{
+            input: [{{
+                bands: [{band_list}],
+                units: "DN"
+            }}],
+            output: [
+{outputs}
+            ]
+        }};
+    }}
+
+    function evaluatePixel(sample) {{
+        return {{ {returned} }};
+    }}
+"""
+
+
 class SentinelDownloader:
-    """Sentinel-2A 이미지 다운로더 클래스"""
+    """Sentinel-2A 이미지 다운로더 클래스 (설정/세션을 재사용하는 배치 클라이언트)"""
     
-    def __init__(self, client_id, client_secret, instance_id=None):
+    def __init__(self, client_id, client_secret, instance_id=None, max_threads=4):
         """
         초기화
         
@@ -28,6 +81,7 @@ class SentinelDownloader:
             client_id (str): Sentinel Hub OAuth 클라이언트 ID
             client_secret (str): Sentinel Hub OAuth 클라이언트 시크릿
             instance_id (str, optional): Sentinel Hub 인스턴스 ID
+            max_threads (int): 요청을 나눠 보낼 때의 동시 요청 수
         """
         self.config = SHConfig()
         self.config.sh_client_id = client_id
@@ -38,6 +92,53 @@ class SentinelDownloader:
         # 설정 확인
         if not self.config.sh_client_id or not self.config.sh_client_secret:
             raise ValueError("Sentinel Hub credentials are required!")
+
+        # 모든 요청이 같은 클라이언트(= 같은 인증 세션)를 사용
+        # 실패한 요청은 예외 대신 None으로 받아 나머지 요청의 결과는 그대로 저장
+        self.max_threads = max_threads
+        self.client = SentinelHubDownloadClient(config=self.config, raise_download_errors=False)
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _grid(bbox_coords, resolution):
+        """경계 상자와 이미지 크기 (같은 좌표/해상도는 한 번만 계산)"""
+        bbox = BBox(bbox=bbox_coords, crs=CRS.WGS84)
+        return bbox, bbox_to_dimensions(bbox, resolution=resolution)
+
+    @staticmethod
+    def _file_key(*parts):
+        """요청 내용으로 만든 파일 이름 키 (같은 요청은 같은 이름, 다른 요청은 다른 이름)"""
+        return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:12]
+
+    def _request(self, bbox_coords, time_interval, resolution, evalscript, responses):
+        bbox, size = self._grid(tuple(bbox_coords), resolution)
+        return SentinelHubRequest(
+            evalscript=evalscript,
+            input_data=[
+                SentinelHubRequest.input_data(
+                    data_collection=DataCollection.SENTINEL2_L2A,
+                    time_interval=time_interval,
+                )
+            ],
+            responses=responses,
+            bbox=bbox,
+            size=size,
+            config=self.config,
+        )
+
+    def _download(self, requests):
+        """요청들을 한 번에 동시 실행하고 응답 원본(bytes) 리스트 반환 (디코딩하지 않음, 실패한 요청은 None)"""
+        download_list = [request.download_list[0] for request in requests]
+        responses = self.client.download(download_list, max_threads=self.max_threads, decode_data=False)
+        return [getattr(response, "content", response) for response in responses]
+
+    @staticmethod
+    def _write(filepath, content):
+        # 임시 파일에 쓴 뒤 교체하여 중단되더라도 깨진 파일이 남지 않도록 함
+        tmp_path = f"{filepath}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
     
     def download_image(
         self,
@@ -61,87 +162,72 @@ class SentinelDownloader:
         
         Returns:
             str: 저장된 이미지 파일 경로
+
+        Raises:
+            RuntimeError: 요청이 실패했거나 조건에 맞는 이미지가 없는 경우
         """
-        # 출력 디렉토리 생성
-        os.makedirs(output_path, exist_ok=True)
-        
-        # 경계 상자 설정 (WGS84 좌표계)
-        bbox = BBox(bbox=bbox_coords, crs=CRS.WGS84)
-        
-        # 이미지 크기 계산
-        size = bbox_to_dimensions(bbox, resolution=resolution)
-        print(f"이미지 크기: {size}")
-        
-        # 기본 evalscript (True Color RGB)
-        if evalscript is None:
-            evalscript = """
-                //VERSION=3
-                function setup() {
-                    return {
-                        input: [{
-                            bands: ["B02", "B03", "B04", "B08"],
-                            units: "DN"
-                        }],
-                        output: {
-                            bands: 4,
-                            sampleType: "AUTO"
-                        }
-                    };
-                }
-                
-                function evaluatePixel(sample) {
-                    return [sample.B04, sample.B03, sample.B02, sample.B08];
-                }
-            """
-        
-        # SentinelHub 요청 생성
-        request = SentinelHubRequest(
-            evalscript=evalscript,
-            input_data=[
-                SentinelHubRequest.input_data(
-                    data_collection=DataCollection.SENTINEL2_L2A,
-                    time_interval=time_interval,
-                )
-            ],
-            responses=[
-                SentinelHubRequest.output_response("default", image_format)
-            ],
-            bbox=bbox,
-            size=size,
-            config=self.config,
-        )
+        filepath = self.download_images(
+            [bbox_coords], time_interval, output_path, resolution, image_format, evalscript
+        )[0]
+        if filepath is None:
+            raise RuntimeError(f"이미지를 받지 못했습니다: {bbox_coords}, {time_interval}")
+        return filepath
+
+    def download_images(
+        self,
+        bbox_list,
+        time_interval,
+        output_path="sentinel_images",
+        resolution=10,
+        image_format=MimeType.TIFF,
+        evalscript=None
+    ):
+        """
+        여러 지역의 이미지를 동시에 다운로드
         
-        # 이미지 다운로드
-        print(f"이미지 다운로드 중...")
-        print(f"지역: {bbox_coords}")
-        print(f"기간: {time_interval}")
+        Args:
+            bbox_list (list): 경계 상자 좌표 튜플 리스트
+            time_interval (tuple): 시간 범위 (start_date, end_date)
+            output_path (str): 출력 디렉토리 경로
+            resolution (int): 이미지 해상도 (미터 단위)
+            image_format (MimeType): 출력 이미지 형식
+            evalscript (str, optional): 커스텀 evalscript (기본값: B04/B03/B02/B08)
         
+        Returns:
+            list: bbox_list 순서대로의 저장 경로 (실패 시 None)
+        """
+        os.makedirs(output_path, exist_ok=True)
+        evalscript = evalscript or DEFAULT_EVALSCRIPT
+        extension = "tif" if image_format == MimeType.TIFF else "png"
+
+        requests = [
+            self._request(bbox_coords, time_interval, resolution, evalscript,
+                          [SentinelHubRequest.output_response("default", image_format)])
+            for bbox_coords in bbox_list
+        ]
+        print(f"이미지 다운로드 중... ({len(requests)}건, 기간: {time_interval})")
+
         try:
-            image_data = request.get_data()
-            
-            if not image_data or len(image_data) == 0:
-                print("경고: 해당 조건에 맞는 이미지를 찾을 수 없습니다.")
-                return None
-            
-            # 파일명 생성
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            extension = "tif" if image_format == MimeType.TIFF else "png"
-            filename = f"sentinel2a_{timestamp}.{extension}"
-            filepath = os.path.join(output_path, filename)
-            
-            # 이미지 저장
-            with open(filepath, "wb") as f:
-                if image_format == MimeType.TIFF:
-                    f.write(image_data[0])
-                else:
-                    f.write(image_data[0])
-            
-            print(f"✓ 이미지 저장 완료: {filepath}")
-            return filepath
-            
+            contents = self._download(requests)
         except Exception as e:
             print(f"오류 발생: {str(e)}")
             raise
+
+        filepaths = []
+        for bbox_coords, content in zip(bbox_list, contents):
+            if not content:
+                print(f"경고: 이미지를 받지 못했습니다 (요청 실패 또는 조건에 맞는 이미지 없음). ({bbox_coords})")
+                filepaths.append(None)
+                continue
+
+            # 파일명: 요청 내용(지역/기간/해상도/형식/evalscript)으로 결정 → 같은 초에 받아도 충돌 없음
+            key = self._file_key(tuple(bbox_coords), tuple(time_interval), resolution, extension, evalscript)
+            filepath = os.path.join(output_path, f"sentinel2a_{time_interval[0]}_{time_interval[1]}_{key}.{extension}")
+            self._write(filepath, content)
+            print(f"✓ 이미지 저장 완료: {filepath}")
+            filepaths.append(filepath)
+
+        return filepaths
     
     def download_multiple_bands(
         self,
@@ -149,10 +235,11 @@ class SentinelDownloader:
         time_interval,
         bands,
         output_path="sentinel_images",
-        resolution=10
+        resolution=10,
+        separate=False
     ):
         """
-        여러 밴드를 개별적으로 다운로드
+        여러 밴드를 개별 파일로 다운로드
         
         Args:
             bbox_coords (tuple): 경계 상자 좌표
@@ -160,73 +247,59 @@ class SentinelDownloader:
             bands (list): 다운로드할 밴드 리스트 (예: ['B02', 'B03', 'B04'])
             output_path (str): 출력 디렉토리 경로
             resolution (int): 이미지 해상도
+            separate (bool): False면 요청 1건으로 모든 밴드 수신 (밴드별 출력, tar 응답)
+                True면 밴드별 요청을 동시에 실행
         
         Returns:
             dict: {밴드명: 파일경로} 딕셔너리
         """
+        os.makedirs(output_path, exist_ok=True)
+        key = self._file_key(tuple(bbox_coords), tuple(time_interval), resolution)
+
+        def band_path(band):
+            return os.path.join(output_path, f"sentinel2a_{band}_{time_interval[0]}_{time_interval[1]}_{key}.tif")
+
         downloaded_files = {}
-        
+        print(f"\n밴드 {', '.join(bands)} 다운로드 중... ({'밴드별 요청' if separate else '요청 1건'})")
+
+        try:
+            if separate:
+                requests = [
+                    self._request(bbox_coords, time_interval, resolution, build_bands_evalscript([band]),
+                                  [SentinelHubRequest.output_response(band, MimeType.TIFF)])
+                    for band in bands
+                ]
+                band_contents = dict(zip(bands, self._download(requests)))
+            else:
+                request = self._request(
+                    bbox_coords, time_interval, resolution, build_bands_evalscript(bands),
+                    [SentinelHubRequest.output_response(band, MimeType.TIFF) for band in bands]
+                )
+                content = self._download([request])[0]
+                band_contents = {}
+                if content:
+                    if len(bands) == 1:
+                        band_contents[bands[0]] = content
+                    else:
+                        # 출력이 여러 개면 {밴드}.tif 파일들이 담긴 tar로 응답
+                        with tarfile.open(fileobj=io.BytesIO(content)) as tar:
+                            for member in tar.getmembers():
+                                band = os.path.splitext(member.name)[0]
+                                if band in bands:
+                                    band_contents[band] = tar.extractfile(member).read()
+        except Exception as e:
+            print(f"밴드 다운로드 중 오류: {str(e)}")
+            return downloaded_files
+
         for band in bands:
-            evalscript = f"""
-                //VERSION=3
-                function setup() {{
-                    return {{
-                        input: [{{
-                            bands: ["{band}"],
-                            units: "DN"
-                        }}],
-                        output: {{
-                            bands: 1,
-                            sampleType: "AUTO"
-                        }}
-                    }};
-                }}
-                
-                function evaluatePixel(sample) {{
-                    return [sample.{band}];
-                }}
-            """
-            
-            print(f"\n밴드 {band} 다운로드 중...")
-            
-            bbox = BBox(bbox=bbox_coords, crs=CRS.WGS84)
-            size = bbox_to_dimensions(bbox, resolution=resolution)
-            
-            request = SentinelHubRequest(
-                evalscript=evalscript,
-                input_data=[
-                    SentinelHubRequest.input_data(
-                        data_collection=DataCollection.SENTINEL2_L2A,
-                        time_interval=time_interval,
-                    )
-                ],
-                responses=[
-                    SentinelHubRequest.output_response("default", MimeType.TIFF)
-                ],
-                bbox=bbox,
-                size=size,
-                config=self.config,
-            )
-            
-            try:
-                image_data = request.get_data()
-                
-                if image_data and len(image_data) > 0:
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"sentinel2a_{band}_{timestamp}.tif"
-                    filepath = os.path.join(output_path, filename)
-                    
-                    os.makedirs(output_path, exist_ok=True)
-                    with open(filepath, "wb") as f:
-                        f.write(image_data[0])
-                    
-                    downloaded_files[band] = filepath
-                    print(f"✓ 밴드 {band} 저장 완료: {filepath}")
-                else:
-                    print(f"경고: 밴드 {band}에 대한 이미지를 찾을 수 없습니다.")
-                    
-            except Exception as e:
-                print(f"밴드 {band} 다운로드 중 오류: {str(e)}")
+            content = band_contents.get(band)
+            if not content:
+                print(f"경고: 밴드 {band}에 대한 이미지를 찾을 수 없습니다.")
+                continue
+            filepath = band_path(band)
+            self._write(filepath, content)
+            downloaded_files[band] = filepath
+            print(f"✓ 밴드 {band} 저장 완료: {filepath}")
         
         return downloaded_files
 
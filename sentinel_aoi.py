@@ -0,0 +1,167 @@
+"""
+AOI 정규화 (UTM 좌표계 결정 및 재투영)
+- 모든 지오메트리의 UTM EPSG 코드를 NumPy로 한 번에 계산 (남반구는 327xx)
+- 같은 UTM 존끼리 묶어 존별로 한 번만 재투영 (pyproj Transformer 캐시 재사용)
+- UTM 존 경계나 적도에 걸친 AOI는 존/반구별 조각으로 나눠 조각마다 자기 존 좌표계로 변환
+  (한 존으로 억지로 투영할 때의 왜곡과 bbox 확대를 피함)
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+import shapely
+import geopandas as gpd
+from pyproj import Transformer
+
+WGS84 = "EPSG:4326"
+
+
+def read_aoi_file(file_path):
+    """AOI 파일 읽기 (.zip 압축 shapefile, .geojson, .shp 등)"""
+    if file_path.lower().endswith('.zip'):
+        read_path = f"zip://{file_path}"
+    else:
+        read_path = file_path
+    return gpd.read_file(read_path)
+
+
+def utm_zones(lons):
+    """경도 배열에 대한 UTM 존 번호 배열 (1~60)"""
+    lons = np.asarray(lons, dtype=np.float64)
+    return np.clip(np.floor((lons + 180.0) / 6.0).astype(np.int64) + 1, 1, 60)
+
+
+def utm_epsg_codes(lons, lats):
+    """
+    경위도 배열에 대한 UTM EPSG 코드 배열
+
+    Args:
+        lons (np.ndarray): 경도 배열
+        lats (np.ndarray): 위도 배열
+
+    Returns:
+        np.ndarray: EPSG 코드 배열 (북반구 326xx, 남반구 327xx)
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    return np.where(lats >= 0, 32600, 32700) + utm_zones(lons)
+
+
+@lru_cache(maxsize=None)
+def _cached_transformer(src_crs, dst_crs, thread_id):
+    return Transformer.from_crs(src_crs, dst_crs, always_xy=True)
+
+
+def get_transformer(src_crs, dst_crs):
+    """좌표계 쌍별 Transformer (pyproj Transformer는 스레드 간 공유가 안전하지 않아 스레드별로 캐시)"""
+    return _cached_transformer(src_crs, dst_crs, threading.get_ident())
+
+
+def split_by_utm_zone(geometry):
+    """
+    WGS84 지오메트리를 UTM 존/반구 경계로 자른 조각 목록
+
+    Args:
+        geometry (shapely.Geometry): WGS84 경위도 지오메트리
+
+    Returns:
+        list: (EPSG 코드, 조각 지오메트리(WGS84), 조각 접미사) 리스트 (예: (32652, ..., 'z52N'))
+    """
+    min_lon, min_lat, max_lon, max_lat = geometry.bounds
+    zone_lo, zone_hi = utm_zones([min_lon, max_lon])
+    hemispheres = [h for h, inside in (("N", max_lat >= 0), ("S", min_lat < 0)) if inside]
+
+    zones = np.arange(zone_lo, zone_hi + 1)
+    cells = [(zone, h, shapely.box(-180.0 + 6.0 * (zone - 1), 0.0 if h == "N" else -90.0,
+                                   -180.0 + 6.0 * zone, 90.0 if h == "N" else 0.0))
+             for zone in zones for h in hemispheres]
+    pieces = shapely.intersection(geometry, np.array([cell for _, _, cell in cells], dtype=object))
+
+    parts = []
+    for (zone, h, _), piece in zip(cells, pieces):
+        if piece.is_empty or (piece.area == 0.0 and geometry.area > 0.0):  # 경계선에만 닿은 조각 제외
+            continue
+        parts.append(((32600 if h == "N" else 32700) + int(zone), piece, f"z{zone}{h}"))
+    return parts
+
+
+def transform_geometries(geometries, src_crs, dst_crs):
+    """지오메트리 배열 전체를 Transformer 한 번 호출로 재투영"""
+    transformer = get_transformer(src_crs, dst_crs)
+    return shapely.transform(
+        geometries,
+        lambda coords: np.column_stack(transformer.transform(coords[:, 0], coords[:, 1])),
+    )
+
+
+def normalize_aois(gdf, farm_id, id_column=None, dissolve=True, split_zones=True):
+    """
+    AOI 레이어를 UTM 좌표계의 농장 목록으로 변환
+
+    Args:
+        gdf (GeoDataFrame): AOI 레이어 (좌표계가 없으면 WGS84로 간주)
+        farm_id (str): 농장 ID (dissolve=False면 피처 ID 앞에 붙는 접두사)
+        id_column (str, optional): 피처별 ID 컬럼 (없으면 피처 순번 사용)
+        dissolve (bool): True면 레이어 전체를 농장 하나로 합침 (기존 get_bbox_from_file 동작)
+        split_zones (bool): True면 UTM 존 경계/적도에 걸친 농장을 {farm_id}-z{존}{N|S} 조각으로 분할
+
+    Returns:
+        list: {'farm_id', 'bbox', 'epsg', 'geometry'} 딕셔너리 리스트 (bbox/geometry는 UTM 좌표)
+    """
+    src_crs = gdf.crs.to_wkt() if gdf.crs is not None else WGS84
+    geometries = np.asarray(gdf.geometry.values, dtype=object)
+
+    if dissolve:
+        geometries = np.array([shapely.union_all(geometries)], dtype=object)
+        farm_ids = [farm_id]
+    elif id_column:
+        farm_ids = [f"{farm_id}_{value}" for value in gdf[id_column]]
+    else:
+        farm_ids = [f"{farm_id}_{i}" for i in range(len(geometries))]
+
+    bounds = shapely.bounds(geometries)
+    center_x = (bounds[:, 0] + bounds[:, 2]) / 2.0
+    center_y = (bounds[:, 1] + bounds[:, 3]) / 2.0
+    lons, lats = get_transformer(src_crs, WGS84).transform(center_x, center_y)
+    epsg_codes = utm_epsg_codes(lons, lats)
+
+    multi_zone = np.zeros(len(geometries), dtype=bool)
+    if split_zones:
+        wgs84_geometries = transform_geometries(geometries, src_crs, WGS84)
+        wgs84_bounds = shapely.bounds(wgs84_geometries)
+        multi_zone = ((utm_zones(wgs84_bounds[:, 0]) != utm_zones(wgs84_bounds[:, 2]))
+                      | ((wgs84_bounds[:, 1] < 0) & (wgs84_bounds[:, 3] >= 0)))
+
+    aois = [None] * len(geometries)
+    for i in np.nonzero(multi_zone)[0]:
+        # 여러 존/반구에 걸친 농장: 조각마다 자기 존 좌표계로 변환
+        aois[i] = []
+        for epsg_code, piece, suffix in split_by_utm_zone(wgs84_geometries[i]):
+            projected = transform_geometries(piece, WGS84, f"EPSG:{epsg_code}")
+            aois[i].append({
+                "farm_id": f"{farm_ids[i]}-{suffix}",
+                "bbox": list(projected.bounds),
+                "epsg": str(epsg_code),
+                "geometry": projected,
+            })
+    epsg_codes = np.where(multi_zone, 0, epsg_codes)
+
+    for epsg_code in np.unique(epsg_codes[~multi_zone]):
+        indices = np.nonzero(epsg_codes == epsg_code)[0]
+        projected = transform_geometries(geometries[indices], src_crs, f"EPSG:{epsg_code}")
+        for i, geometry, utm_bounds in zip(indices, projected, shapely.bounds(projected)):
+            aois[i] = {
+                "farm_id": farm_ids[i],
+                "bbox": utm_bounds.tolist(),
+                "epsg": str(epsg_code),
+                "geometry": geometry,
+            }
+    return [aoi for item in aois for aoi in (item if isinstance(item, list) else [item])]
+
+
+def load_aois(file_path, id_column=None, dissolve=True, split_zones=True):
+    """AOI 파일 하나를 읽어 normalize_aois 결과 반환 (농장 ID = 파일 이름)"""
+    farm_id = os.path.splitext(os.path.basename(file_path))[0]
+    return normalize_aois(read_aoi_file(file_path), farm_id, id_column=id_column, dissolve=dissolve,
+                          split_zones=split_zones)
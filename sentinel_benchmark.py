@@ -0,0 +1,346 @@
+"""
+요청 설정 조합 벤치마크 (해상도 × 픽셀 자료형 × 보간법 × 출력 형식)
+- sentinel_sampling의 요청 생성(build_request, rgb_task, vi_task)과 저장(write_response)을 그대로 사용하되
+  요청은 로컬 모의 Process API 서버로 보냄 (PU 소모 없이 반복 측정)
+- 모의 서버는 요청 본문의 evalscript 출력 정의(id, bands, sampleType), 크기, 보간법을 읽어
+  10m 원본 격자를 보간한 합성 픽셀을 Deflate 압축 TIFF(출력이 여럿이면 tar)로 응답
+- 조합마다 응답 바이트, 요청/디코딩/저장(tar 해제, 메타데이터 기록) 시간, 예상 PU를 표(CSV)로 저장
+  (요청 시간에는 모의 서버의 합성/압축 시간이 들어 있으므로 절대값이 아니라 조합끼리 비교하는 용도)
+
+사용법: python sentinel_benchmark.py (AOI_FOLDER_PATH의 AOI, 없으면 합성 정사각형 농장 사용)
+"""
+
+import io
+import os
+import re
+import csv
+import json
+import math
+import time
+import zlib
+import tarfile
+import tempfile
+import statistics
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import shapely
+from sentinelhub import MimeType, SHConfig, SentinelHubDownloadClient, SentinelHubSession
+from sentinelhub.decoding import decode_data
+
+import sentinel_sampling as sampling
+from sentinel_aoi import load_aois
+from sentinel_resolution import SAMPLE_BYTES, choose_resolution, estimate_processing_units
+from sentinel_tiff import TiffStripWriter
+
+# ---------------------------------------------------------
+# 1. 설정
+# ---------------------------------------------------------
+BENCH_RGB_RESOLUTIONS = [5, 10, 20]
+BENCH_RGB_SAMPLE_TYPES = ["UINT8", "UINT16", "FLOAT32"]
+BENCH_VI_RESOLUTIONS = [10, 20]
+BENCH_VI_ENCODINGS = ["FLOAT32", "INT16"]  # 지수는 음수가 있어 UINT 자료형 제외
+BENCH_INTERPOLATIONS = ["BILINEAR", "NEAREST"]
+BENCH_VI_OUTPUTS = ["separate", "stack"]
+BENCH_REPEATS = 3          # 조합별 반복 횟수 (시간은 중앙값)
+BENCH_MAX_FARMS = 3        # AOI 폴더에서 사용할 농장 수
+BENCH_SYNTHETIC_SIDES = [500, 2000, 5000]  # AOI 파일이 없을 때 합성 농장 한 변 길이 (미터)
+BENCH_DATE = "2026-01-01"
+BENCH_REPORT_PATH = os.path.join(sampling.OUTPUT_FOLDER, 'benchmark_report.csv')
+
+NATIVE_RESOLUTION = 10  # 모의 서버 원본 격자 (미터, Sentinel-2 10m 밴드)
+MOCK_ROWS_PER_STRIP = 256
+
+BENCH_COLUMNS = [
+    "farm_id", "task", "resolution", "width", "height", "sample_type", "interpolation", "output",
+    "payload_bytes", "raw_bytes", "compression_ratio", "request_sec", "decode_sec", "process_sec", "est_pu",
+]
+
+OUTPUT_PATTERN = re.compile(r'id:\s*"(\w+)",\s*bands:\s*(\d+),\s*sampleType:\s*"(\w+)"')
+MOCK_DTYPES = {"UINT8": "uint8", "UINT16": "uint16", "INT16": "int16", "FLOAT32": "float32"}
+# 합성 값 [0, 1)을 자료형별 값 범위로 변환 (UINT16 = 반사율 x 10000, INT16 = 지수 x 10000)
+MOCK_RANGES = {"UINT8": (0, 255), "UINT16": (0, 3000), "INT16": (-10000, 10000), "FLOAT32": (-1.0, 1.0)}
+
+
+# ---------------------------------------------------------
+# 2. 모의 Process API
+# ---------------------------------------------------------
+def _resample(native, height, width, step, interpolation):
+    """원본 격자를 출력 크기로 보간 (step = 원본 픽셀 하나가 덮는 출력 픽셀 수)"""
+    ys = np.clip((np.arange(height) + 0.5) / step - 0.5, 0, native.shape[0] - 1)
+    xs = np.clip((np.arange(width) + 0.5) / step - 0.5, 0, native.shape[1] - 1)
+    if interpolation == "NEAREST":
+        return native[np.rint(ys).astype(int)[:, None], np.rint(xs).astype(int)[None, :]]
+
+    # BILINEAR (BICUBIC도 같은 방식으로 근사)
+    y0, x0 = np.floor(ys).astype(int), np.floor(xs).astype(int)
+    y1, x1 = np.minimum(y0 + 1, native.shape[0] - 1), np.minimum(x0 + 1, native.shape[1] - 1)
+    wy, wx = (ys - y0)[:, None], (xs - x0)[None, :]
+    top = native[y0[:, None], x0[None, :]] * (1 - wx) + native[y0[:, None], x1[None, :]] * wx
+    bottom = native[y1[:, None], x0[None, :]] * (1 - wx) + native[y1[:, None], x1[None, :]] * wx
+    return top * (1 - wy) + bottom * wy
+
+
+def synthetic_output(identifier, bands, sample_type, width, height, resolution, interpolation):
+    """
+    출력 하나의 합성 픽셀 (같은 요청이면 항상 같은 값)
+
+    Returns:
+        np.ndarray: (height, width, bands) 배열 (자료형 = sampleType)
+    """
+    step = NATIVE_RESOLUTION / resolution
+    native_shape = (int(math.ceil(height / step)) + 1, int(math.ceil(width / step)) + 1)
+    low, high = MOCK_RANGES[sample_type]
+
+    layers = []
+    for band in range(bands):
+        rng = np.random.default_rng(zlib.crc32(f"{identifier}:{band}:{width}x{height}".encode("utf-8")))
+        native = rng.random(native_shape, dtype=np.float32)
+        # 이웃 픽셀끼리 비슷하도록 3x3 평균 (실제 밭처럼 압축률이 완전 난수보다 높음)
+        padded = np.pad(native, 1, mode="edge")
+        native = sum(padded[dy:dy + native_shape[0], dx:dx + native_shape[1]]
+                     for dy in range(3) for dx in range(3)) / 9.0
+        layers.append(low + _resample(native, height, width, step, interpolation) * (high - low))
+
+    array = np.stack(layers, axis=-1)
+    if sample_type != "FLOAT32":
+        array = np.rint(array)
+    return array.astype(MOCK_DTYPES[sample_type])
+
+
+def encode_tiff(array):
+    """배열 → Deflate 압축 TIFF bytes"""
+    height, width, bands = array.shape
+    fd, path = tempfile.mkstemp(suffix=".tif")
+    os.close(fd)
+    try:
+        with TiffStripWriter(path, width, height, array.dtype, bands=bands, compress=True) as writer:
+            for row in range(0, height, MOCK_ROWS_PER_STRIP):
+                writer.write_rows(array[row:row + MOCK_ROWS_PER_STRIP])
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        if os.path.exists(path): os.remove(path)
+
+
+def render_response(payload):
+    """
+    Process API 요청 본문 → 응답 (bytes, Content-Type)
+
+    evalscript setup()의 출력 정의 중 요청된 응답(responses)만 만들어 하나면 TIFF, 여럿이면 tar로 묶음
+    """
+    outputs = {name: (int(bands), sample_type)
+               for name, bands, sample_type in OUTPUT_PATTERN.findall(payload["evalscript"])}
+    width, height = payload["output"]["width"], payload["output"]["height"]
+    min_x, _, max_x, _ = payload["input"]["bounds"]["bbox"]
+    processing = payload["input"]["data"][0].get("processing", {})
+    interpolation = processing.get("upsampling", "NEAREST")
+    resolution = (max_x - min_x) / width
+
+    tiffs = []
+    for response in payload["output"]["responses"]:
+        identifier = response["identifier"]
+        bands, sample_type = outputs[identifier]
+        array = synthetic_output(identifier, bands, sample_type, width, height, resolution, interpolation)
+        tiffs.append((identifier, encode_tiff(array)))
+
+    if len(tiffs) == 1:
+        return tiffs[0][1], "image/tiff"
+
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for identifier, content in tiffs:
+            info = tarfile.TarInfo(f"{identifier}.tif")
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue(), "application/tar"
+
+
+class MockProcessServer:
+    """로컬 모의 Process API (POST /api/v1/process만 처리)"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """
+        초기화 및 서버 시작
+
+        Args:
+            host (str): 바인드 주소
+            port (int): 포트 번호 (0이면 빈 포트 자동 선택)
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if not self.path.startswith("/api/v1/process"):
+                    self.send_error(404)
+                    return
+                try:
+                    payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                    body, content_type = render_response(payload)
+                except Exception as e:
+                    self.send_error(400, f"{type(e).__name__}: {e}")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 요청마다 콘솔에 로그를 남기지 않음
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="mock-process", daemon=True)
+        self.thread.start()
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def mock_client(url):
+    """모의 서버로 요청하는 (SHConfig, SentinelHubDownloadClient) - 인증 서버 대신 가짜 토큰 사용"""
+    mock_config = SHConfig()
+    mock_config.sh_base_url = url
+    mock_config.sh_client_id = "mock"
+    mock_config.sh_client_secret = "mock"
+    mock_config.max_download_attempts = 1
+    session = SentinelHubSession.from_token(
+        {"access_token": "mock-token", "token_type": "Bearer", "expires_at": time.time() + 24 * 3600}
+    )
+    return mock_config, SentinelHubDownloadClient(config=mock_config, session=session)
+
+
+# ---------------------------------------------------------
+# 3. 조합 측정
+# ---------------------------------------------------------
+def benchmark_aois():
+    """측정할 농장 목록 (AOI 폴더의 앞쪽 BENCH_MAX_FARMS개, 없으면 합성 정사각형 농장)"""
+    aois = []
+    if os.path.isdir(sampling.AOI_FOLDER_PATH):
+        for file_name in sorted(sampling.list_poi_files()):
+            aois.extend(load_aois(os.path.join(sampling.AOI_FOLDER_PATH, file_name), split_zones=False))
+            if len(aois) >= BENCH_MAX_FARMS:
+                return aois[:BENCH_MAX_FARMS]
+    if aois:
+        return aois
+
+    x0, y0 = 350000, 4080000  # EPSG:32652 (한반도 중부)
+    return [{"farm_id": f"synthetic_{side}m", "bbox": [x0, y0, x0 + side, y0 + side], "epsg": "32652",
+             "geometry": shapely.box(x0, y0, x0 + side, y0 + side)} for side in BENCH_SYNTHETIC_SIDES]
+
+
+def benchmark_tasks(bbox):
+    """측정할 작업 조합 (요청 한도를 넘는 해상도는 제외)"""
+    def fixed(resolution):
+        choice = choose_resolution(bbox, resolution, resolution, sampling.MAX_PIXELS_PER_REQUEST)
+        return choice if choice['tiles'] == (1, 1) else None
+
+    for resolution in BENCH_RGB_RESOLUTIONS:
+        choice = fixed(resolution)
+        if choice is None:
+            continue
+        for sample_type in BENCH_RGB_SAMPLE_TYPES:
+            for interpolation in BENCH_INTERPOLATIONS:
+                yield sampling.rgb_task(choice, sample_type, interpolation), interpolation, "single"
+
+    for resolution in BENCH_VI_RESOLUTIONS:
+        choice = fixed(resolution)
+        if choice is None:
+            continue
+        for encoding in BENCH_VI_ENCODINGS:
+            for interpolation in BENCH_INTERPOLATIONS:
+                for output in BENCH_VI_OUTPUTS:
+                    yield sampling.vi_task(choice, encoding, interpolation, output), interpolation, output
+
+
+def measure(farm_id, farm_bbox, task, mock_config, client, work_folder, repeats=BENCH_REPEATS):
+    """
+    작업 하나를 repeats번 요청 → 디코딩 → 저장하여 측정
+
+    Returns:
+        dict: payload_bytes, request_sec, decode_sec, process_sec (시간은 중앙값)
+    """
+    request = sampling.build_request(farm_bbox, BENCH_DATE, task, sh_config=mock_config)
+    # 요청 URL은 컬렉션의 service_url(실제 Sentinel Hub)을 우선하므로 모의 서버 주소로 바꿔 보냄
+    # 응답을 data_folder에 저장하면 반복 요청이 디스크에서 읽히므로 저장하지 않음 (저장은 write_response가 측정)
+    for download in request.download_list:
+        download.url = mock_config.sh_base_url + urlsplit(download.url).path
+        download.save_response = False
+    tar_path = os.path.join(work_folder, request.get_filename_list()[0])
+    mime_type = MimeType.TAR if len(task['indices']) > 1 else MimeType.TIFF
+
+    timings = {"request_sec": [], "decode_sec": [], "process_sec": []}
+    content = b""
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.download(request.download_list, decode_data=False)[0]
+        content = getattr(response, 'content', response)
+        fetched = time.perf_counter()
+        decode_data(content, mime_type)
+        decoded = time.perf_counter()
+        sampling.write_response(content, tar_path, None, farm_id, BENCH_DATE, task)
+        processed = time.perf_counter()
+
+        timings["request_sec"].append(fetched - started)
+        timings["decode_sec"].append(decoded - fetched)
+        timings["process_sec"].append(processed - decoded)
+
+    return {"payload_bytes": len(content),
+            **{name: round(statistics.median(values), 4) for name, values in timings.items()}}
+
+
+def run_benchmark(aois, mock_config, client):
+    """농장 × 조합 측정 결과 행 리스트 (BENCH_COLUMNS)"""
+    rows = []
+    with tempfile.TemporaryDirectory(prefix="sentinel_bench_") as work_folder:
+        for aoi in aois:
+            farm_bbox = sampling.farm_bbox_of(aoi)
+            print(f"\n🌾 {aoi['farm_id']} ({farm_bbox.max_x - farm_bbox.min_x:.0f}m x "
+                  f"{farm_bbox.max_y - farm_bbox.min_y:.0f}m)")
+            for task, interpolation, output in benchmark_tasks(list(aoi['bbox'])):
+                width, height = task['size']
+                sample_bytes = SAMPLE_BYTES[task['encoding']]
+                result = measure(aoi['farm_id'], farm_bbox, task, mock_config, client, work_folder)
+                raw_bytes = width * height * task['output_bands'] * sample_bytes
+                rows.append({
+                    "farm_id": aoi['farm_id'], "task": task['name'], "resolution": task['resolution'],
+                    "width": width, "height": height, "sample_type": task['encoding'],
+                    "interpolation": interpolation, "output": output, **result, "raw_bytes": raw_bytes,
+                    "compression_ratio": round(raw_bytes / result['payload_bytes'], 2) if result['payload_bytes'] else None,
+                    "est_pu": round(estimate_processing_units(task['size'], task['input_bands'], sample_bytes), 4),
+                })
+                row = rows[-1]
+                print(f"   {row['task']:<4} {row['resolution']:>3}m {row['sample_type']:<7} {interpolation:<8} "
+                      f"{output:<8} {row['payload_bytes'] / 1024:>9.1f} KB  요청 {row['request_sec']:.3f}s  "
+                      f"디코딩 {row['decode_sec']:.3f}s  저장 {row['process_sec']:.3f}s  {row['est_pu']:.2f} PU")
+    return rows
+
+
+def write_benchmark_report(rows, path):
+    """측정 결과를 CSV로 저장 (실행마다 새로 작성)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=BENCH_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main():
+    aois = benchmark_aois()
+    print(f"🧪 요청 설정 벤치마크: 농장 {len(aois)}개, 반복 {BENCH_REPEATS}회 (모의 Process API)")
+
+    server = MockProcessServer()
+    try:
+        mock_config, client = mock_client(server.url)
+        rows = run_benchmark(aois, mock_config, client)
+    finally:
+        server.close()
+
+    write_benchmark_report(rows, BENCH_REPORT_PATH)
+    print(f"\n📊 {len(rows)}개 조합 결과 저장: {BENCH_REPORT_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Processing API 응답 캐시 (내용 주소 기반)
+- 요청 본문 전체(evalscript, processing 옵션, bbox, 크기, 기간, mosaicking 순서)의 해시를 키로 사용
+- 디스크 용량 상한을 넘으면 가장 오래 사용하지 않은 응답부터 삭제 (LRU)
+- 캐시 전체 크기는 처음 한 번만 폴더를 훑어 계산하고 이후에는 저장할 때마다 누적 (상한을 넘을 때만 정리)
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+
+class ResponseCache:
+    """SentinelHubRequest 응답 파일을 디스크에 보관하는 LRU 캐시"""
+
+    def __init__(self, cache_dir, max_bytes=20 * 1024 ** 3):
+        """
+        초기화
+
+        Args:
+            cache_dir (str): 캐시 폴더 경로
+            max_bytes (int): 캐시 전체 용량 상한 (바이트)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.total_bytes = None  # 첫 저장 시 폴더를 훑어 계산
+
+    @staticmethod
+    def key_for(request):
+        """
+        요청 본문 전체로부터 캐시 키 계산
+
+        Args:
+            request (SentinelHubRequest): 다운로드할 요청
+
+        Returns:
+            str: SHA-256 16진수 문자열
+        """
+        payload = [
+            {"url": download.url, "body": download.post_values}
+            for download in request.download_list
+        ]
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def _path(self, key, extension):
+        return os.path.join(self.cache_dir, key[:2], f"{key}{extension}")
+
+    def get(self, key, dest_path):
+        """
+        캐시에 응답이 있으면 dest_path로 복사
+
+        Returns:
+            bool: 캐시 적중 여부
+        """
+        cached_path = self._path(key, os.path.splitext(dest_path)[1])
+        if not os.path.exists(cached_path):
+            return False
+
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        try:
+            shutil.copyfile(cached_path, dest_path)
+            os.utime(cached_path)  # 최근 사용 시각 갱신 (LRU 기준)
+        except FileNotFoundError:
+            # 다른 스레드/프로세스의 정리(evict)로 방금 삭제됨 → 캐시 미적중으로 처리
+            return False
+        return True
+
+    def put(self, key, src_path):
+        """다운로드한 응답 파일을 캐시에 저장하고 용량 상한을 넘으면 정리"""
+        cached_path = self._path(key, os.path.splitext(src_path)[1])
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+
+        # 중간에 종료되어도 깨진 파일이 남지 않도록 임시 파일에 쓴 뒤 교체 (스레드마다 다른 임시 파일)
+        tmp_path = f"{cached_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(src_path, tmp_path)
+        size = os.path.getsize(tmp_path)
+
+        with self.lock:
+            replaced = os.path.getsize(cached_path) if os.path.exists(cached_path) else 0
+            os.replace(tmp_path, cached_path)
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_total()
+            else:
+                self.total_bytes += size - replaced
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def _entries(self):
+        """(최근 사용 시각, 크기, 경로) 리스트 (임시 파일과 그 사이 삭제된 파일 제외)"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_total(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """용량 상한을 넘는 만큼 오래된 응답부터 삭제 (여러 프로세스가 공유할 수 있으므로 실제 크기로 다시 계산)"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self.total_bytes = total
@@ -0,0 +1,114 @@
+"""
+폴리곤(geometry) 기준 요청
+- bbox 사각형 대신 실제 농장 폴리곤을 요청에 넣어 밭 바깥 픽셀은 서버에서 NoData로 처리
+- 요청 본문이 커지지 않도록 꼭짓점 수 예산 안으로 단순화 (단순화 결과가 원래 폴리곤을 항상 포함하도록 먼저 버퍼)
+- 농장/작업별로 bbox 대비 폴리곤 요청의 픽셀/PU/바이트 절감 추정치를 표로 보고
+"""
+
+import os
+import csv
+
+import shapely
+from sentinelhub import Geometry
+
+from sentinel_resolution import SAMPLE_BYTES, estimate_processing_units
+
+CLIP_COLUMNS = [
+    "farm_id", "task", "resolution", "vertices", "request_vertices", "bbox_pixels", "field_pixels",
+    "field_ratio", "bbox_pu", "field_pu", "pu_saved", "bbox_bytes", "field_bytes", "bytes_saved",
+]
+
+
+def simplify_to_budget(geometry, max_vertices, resolution):
+    """
+    꼭짓점 수가 max_vertices 이하가 될 때까지 허용 오차를 늘려가며 단순화
+
+    Args:
+        geometry (shapely.Geometry): 농장 폴리곤 (UTM 좌표)
+        max_vertices (int): 꼭짓점 수 예산
+        resolution (float): 출력 해상도 (미터, 첫 허용 오차 = 픽셀 반 개)
+
+    Returns:
+        shapely.Geometry: 원래 폴리곤을 포함하는 단순화 폴리곤 (밭 가장자리 픽셀이 잘리지 않음)
+    """
+    if shapely.get_num_coordinates(geometry) <= max_vertices:
+        return geometry
+
+    tolerance = resolution / 2.0
+    while True:
+        # 단순화 오차보다 넓게(1.5배) 버퍼해야 모서리 현(quad_segs=2)과 단순화로 안쪽에 생기는 오차를 흡수
+        simplified = shapely.simplify(shapely.buffer(geometry, 1.5 * tolerance, quad_segs=2), tolerance,
+                                      preserve_topology=True)
+        if shapely.get_num_coordinates(simplified) <= max_vertices and simplified.covers(geometry):
+            return simplified
+        tolerance *= 2.0
+
+
+def request_geometry(geometry, farm_bbox, resolution, max_vertices=500):
+    """
+    요청에 넣을 sentinelhub Geometry (bbox와 같은 좌표계, 꼭짓점 예산 적용)
+
+    Args:
+        geometry (shapely.Geometry): 농장 폴리곤 (없으면 None 반환 → bbox 전체 요청)
+        farm_bbox (BBox): 요청 범위
+        resolution (float): 출력 해상도 (미터)
+        max_vertices (int): 꼭짓점 수 예산
+    """
+    if geometry is None or geometry.is_empty:
+        return None
+    return Geometry(simplify_to_budget(geometry, max_vertices, resolution), farm_bbox.crs)
+
+
+def clip_savings(farm_id, geometry, task, max_vertices=500):
+    """
+    작업 하나에서 폴리곤 요청의 절감 추정치
+
+    밭 바깥 픽셀은 NoData로 채워져 응답(압축 TIFF)이 작아지고, 밭 안 픽셀만 처리된다고 보고 계산한 값
+    (PU 과금 기준은 요청 크기이므로 pu_saved는 상한 추정치)
+
+    Args:
+        farm_id (str): 농장 ID
+        geometry (shapely.Geometry): 농장 폴리곤 (UTM 좌표)
+        task (dict): build_download_tasks 결과 중 하나 (size, resolution, input_bands, output_bands, encoding)
+        max_vertices (int): 꼭짓점 수 예산
+
+    Returns:
+        dict: CLIP_COLUMNS 키의 행 하나
+    """
+    width, height = task['size']
+    sample_bytes = SAMPLE_BYTES[task['encoding']]
+    bbox_pixels = width * height
+    field_ratio = min(1.0, geometry.area / (task['resolution'] ** 2) / bbox_pixels) if bbox_pixels else 0.0
+    field_pixels = int(round(bbox_pixels * field_ratio))
+
+    bbox_pu = estimate_processing_units((width, height), task['input_bands'], sample_bytes)
+    field_pu = bbox_pu * field_ratio
+    bbox_bytes = bbox_pixels * task['output_bands'] * sample_bytes
+    field_bytes = field_pixels * task['output_bands'] * sample_bytes
+    return {
+        "farm_id": farm_id,
+        "task": task['name'],
+        "resolution": task['resolution'],
+        "vertices": int(shapely.get_num_coordinates(geometry)),
+        "request_vertices": int(shapely.get_num_coordinates(
+            simplify_to_budget(geometry, max_vertices, task['resolution']))),
+        "bbox_pixels": bbox_pixels,
+        "field_pixels": field_pixels,
+        "field_ratio": round(field_ratio, 4),
+        "bbox_pu": round(bbox_pu, 4),
+        "field_pu": round(field_pu, 4),
+        "pu_saved": round(bbox_pu - field_pu, 4),
+        "bbox_bytes": bbox_bytes,
+        "field_bytes": field_bytes,
+        "bytes_saved": bbox_bytes - field_bytes,
+    }
+
+
+def write_clip_report(rows, path):
+    """절감 추정치를 CSV로 저장 (기존 파일이 있으면 이어쓰기)"""
+    write_header = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CLIP_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,100 @@
+"""
+수집 대상 위성 컬렉션 정의 (Sentinel-2, Sentinel-1, Landsat 8/9, HLS)
+- 컬렉션마다 Sentinel Hub 컬렉션, 장면 필터(구름 비율 사용 여부), 모자이크 순서, 해상도 정책,
+  밴드 이름 대응표(Sentinel-2 밴드 이름 → 컬렉션 밴드 이름)를 한 곳에 선언
+- 지수 계산식은 sentinel_evalscripts의 Sentinel-2 기준 정의를 그대로 쓰고 밴드 이름만 바꿔 끼움
+  (대응 밴드가 없는 지수는 해당 컬렉션에서 자동 제외, 예: Landsat에는 적색경계 B05가 없어 NDRE/LCI 제외)
+- 작업/파일 이름이 겹치지 않도록 Sentinel-2 외 컬렉션은 접두사 사용 (예: L8_NDVI, S1_SAR)
+"""
+
+from sentinelhub import DataCollection
+
+DEFAULT_COLLECTION = "S2L2A"
+
+COLLECTIONS = {
+    "S2L2A": {
+        "data_collection": "SENTINEL2_L2A",
+        "prefix": "",
+        "cloud_filter": True,
+        "mosaicking_order": "leastCC",
+        "band_map": None,
+        "rgb": True,
+        "polarizations": None,
+        "processing": {},
+        "resolution": None,  # 작업별 해상도는 sentinel_sampling.RESOLUTION_POLICY 사용
+    },
+    "S1IW": {
+        # SAR: 구름과 무관하므로 장면 필터 없음, VV/VH 후방산란계수(선형)를 2밴드로 저장
+        "data_collection": "SENTINEL1_IW",
+        "prefix": "S1",
+        "cloud_filter": False,
+        "mosaicking_order": "mostRecent",
+        "band_map": None,
+        "rgb": False,
+        "polarizations": ("VV", "VH"),
+        "processing": {"backCoeff": "GAMMA0_TERRAIN", "orthorectify": True, "demInstance": "COPERNICUS"},
+        "resolution": {"preferred": 10, "coarsest": 60},
+    },
+    "L8L2": {
+        "data_collection": "LANDSAT_OT_L2",
+        "prefix": "L8",
+        "cloud_filter": True,
+        "mosaicking_order": "leastCC",
+        "band_map": {"B02": "B02", "B03": "B03", "B04": "B04", "B08": "B05", "B11": "B06"},
+        "rgb": True,
+        "polarizations": None,
+        "processing": {},
+        "resolution": {"preferred": 30, "coarsest": 120},
+    },
+    "HLS": {
+        "data_collection": "HARMONIZED_LANDSAT_SENTINEL",
+        "prefix": "HLS",
+        "cloud_filter": True,
+        "mosaicking_order": "leastCC",
+        "band_map": {"B02": "Blue", "B03": "Green", "B04": "Red", "B08": "NIR_Narrow", "B11": "SWIR1"},
+        "rgb": True,
+        "polarizations": None,
+        "processing": {},
+        "resolution": {"preferred": 30, "coarsest": 120},
+    },
+}
+
+
+def get_collection(name):
+    """컬렉션 정의 (없는 이름이면 KeyError)"""
+    if name not in COLLECTIONS:
+        raise KeyError(f"'{name}' 컬렉션이 정의되어 있지 않습니다. (사용 가능: {list(COLLECTIONS)})")
+    return COLLECTIONS[name]
+
+
+def data_collection(name):
+    """Sentinel Hub DataCollection 객체"""
+    return getattr(DataCollection, get_collection(name)["data_collection"])
+
+
+def prefixed(name, identifier):
+    """컬렉션 접두사를 붙인 작업/출력 이름 (Sentinel-2는 접두사 없음 → 기존 파일 이름 유지)"""
+    prefix = get_collection(name)["prefix"]
+    return f"{prefix}_{identifier}" if prefix else identifier
+
+
+def supported_indices(name, indices, required_bands):
+    """
+    컬렉션에서 계산할 수 있는 지수만 선택 (순서 유지)
+
+    Args:
+        name (str): 컬렉션 이름
+        indices (list): 지수 이름 리스트
+        required_bands (callable): 지수 목록 → 필요한 Sentinel-2 밴드 리스트 (sentinel_evalscripts.required_bands)
+    """
+    spec = get_collection(name)
+    if spec["polarizations"]:
+        return []
+    if spec["band_map"] is None:
+        return list(indices)
+    return [index for index in indices if all(band in spec["band_map"] for band in required_bands([index]))]
+
+
+def watermark_key(farm_id, name):
+    """컬렉션별 워터마크 키 (Sentinel-2는 기존 키 그대로)"""
+    return farm_id if name == DEFAULT_COLLECTION else f"{farm_id}@{name}"
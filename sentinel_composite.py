@@ -0,0 +1,185 @@
+"""
+기간별 합성(composite) 영상 생성 (월별 중앙값/평균/최대 NDVI 합성)
+- 샘플러가 저장한 날짜별 지수 TIFF를 행 묶음(chunk) 단위로 읽어 NumPy로 축약
+- 전체 시계열을 메모리에 올리지 않음: 동시에 머무는 데이터 = 날짜 수 x 묶음 행 수 x 열 수
+- NoData(dataMask=0, INT16 -32768)는 NaN으로 바꿔 축약에서 제외
+"""
+
+import os
+from collections import defaultdict
+
+import numpy as np
+
+from sentinel_products import scan_products
+from sentinel_reader import GeoTiffReader
+from sentinel_tiff import GEO_TAGS, TAG_GDAL_METADATA, TAG_GDAL_NODATA, TiffStripWriter, \
+    gdal_metadata_xml, read_tiff_tags
+
+COMPOSITE_METHODS = ("median", "mean", "max", "max_ndvi")
+
+
+def period_of(date, period="month"):
+    """'YYYY-MM-DD' 날짜를 합성 기간 키로 변환 (month -> 'YYYY-MM', year -> 'YYYY')"""
+    if period == "month":
+        return date[:7]
+    if period == "year":
+        return date[:4]
+    raise ValueError(f"지원하지 않는 합성 기간입니다: {period}")
+
+
+def find_inputs(farm_id, index_name, product_index=None, output_folder=None):
+    """
+    농장/지수의 날짜별 입력 파일 목록
+
+    Args:
+        farm_id (str): 농장 ID
+        index_name (str): 지수 이름 (예: 'NDVI')
+        product_index (ProductIndex, optional): 산출물 인덱스 (없으면 output_folder 탐색)
+        output_folder (str, optional): 샘플러 출력 폴더
+
+    Returns:
+        list: {'path', 'band', 'date'} 리스트 (날짜순)
+    """
+    if product_index is not None:
+        return [{"path": p["path"], "band": p["band"], "date": p["date"]}
+                for p in product_index.query(index_name=index_name, farm_id=farm_id)]
+
+    inputs = []
+    for product in scan_products(output_folder):
+        if product["farm_id"] != farm_id:
+            continue
+        if product["identifier"] == index_name:
+            inputs.append({"path": product["path"], "band": 0, "date": product["date"]})
+        elif index_name in GeoTiffReader(product["path"]).band_names:
+            # 다중 밴드 VI 파일 (VI_OUTPUT = "stack")
+            inputs.append({"path": product["path"], "band": index_name, "date": product["date"]})
+    return inputs
+
+
+def _read_masked(reader, band, window):
+    """창 하나를 float32로 읽고 NoData를 NaN으로 (NoData 태그가 없으면 0을 dataMask=0으로 간주)"""
+    array = reader.read(band, window).astype(np.float32, copy=True)
+    if reader.nodata is None:
+        array[array == 0] = np.nan
+    return array
+
+
+def _reduce(stack, method, ndvi_stack=None):
+    """(날짜, 행, 열) 스택을 (행, 열)로 축약 (모든 날짜가 NaN인 픽셀은 NaN)"""
+    valid = ~np.isnan(stack)
+    any_valid = valid.any(axis=0)
+
+    if method == "median":
+        # 전부 NaN인 픽셀의 RuntimeWarning을 피하려고 유효 픽셀만 계산
+        result = np.full(stack.shape[1:], np.nan, dtype=np.float32)
+        result[any_valid] = np.nanmedian(stack[:, any_valid], axis=0)
+        return result
+    if method == "mean":
+        count = valid.sum(axis=0)
+        total = np.where(valid, stack, 0.0).sum(axis=0, dtype=np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(any_valid, total / count, np.nan).astype(np.float32)
+    if method == "max":
+        return np.where(any_valid, np.where(valid, stack, -np.inf).max(axis=0), np.nan).astype(np.float32)
+    if method == "max_ndvi":
+        # 픽셀별로 NDVI가 가장 높은 날짜(구름 영향이 가장 적은 날짜)의 값을 선택
+        ndvi = np.where(np.isnan(ndvi_stack), -np.inf, ndvi_stack)
+        best = np.argmax(ndvi, axis=0)
+        result = np.take_along_axis(stack, best[np.newaxis], axis=0)[0]
+        return np.where(np.isfinite(ndvi).any(axis=0), result, np.nan).astype(np.float32)
+    raise ValueError(f"지원하지 않는 합성 방식입니다: {method} (사용 가능: {COMPOSITE_METHODS})")
+
+
+def composite_period(inputs, out_path, index_name, method="median", ndvi_inputs=None, chunk_rows=256):
+    """
+    같은 기간의 날짜별 입력을 합성하여 TIFF 하나로 저장
+
+    Args:
+        inputs (list): {'path', 'band', 'date'} 리스트 (모두 같은 크기/좌표계)
+        out_path (str): 출력 경로
+        index_name (str): 지수 이름 (밴드 설명으로 기록)
+        method (str): 'median', 'mean', 'max', 'max_ndvi'
+        ndvi_inputs (list, optional): max_ndvi에서 날짜 선택에 쓸 NDVI 입력 (inputs와 같은 날짜 순서)
+        chunk_rows (int): 한 번에 읽는 행 수
+
+    Returns:
+        int: 합성에 사용한 날짜 수
+    """
+    readers = [GeoTiffReader(item["path"]) for item in inputs]
+    height, width = readers[0].height, readers[0].width
+    for item, reader in zip(inputs, readers):
+        if (reader.height, reader.width) != (height, width):
+            raise ValueError(f"입력 크기가 다릅니다: {item['path']} ({reader.height}x{reader.width} != {height}x{width})")
+
+    ndvi_readers = None
+    if method == "max_ndvi":
+        ndvi_inputs = ndvi_inputs if ndvi_inputs is not None else inputs
+        ndvi_readers = [GeoTiffReader(item["path"]) for item in ndvi_inputs]
+
+    # 첫 입력의 좌표 정보를 그대로 복사 (같은 농장 bbox/해상도이므로 모든 날짜가 동일)
+    source_tags = read_tiff_tags(inputs[0]["path"])
+    tags = {tag: source_tags[tag] for tag in GEO_TAGS if tag in source_tags}
+    tags[TAG_GDAL_METADATA] = gdal_metadata_xml(
+        items={"COMPOSITE_METHOD": method, "COMPOSITE_DATES": ",".join(item["date"] for item in inputs)},
+        band_items={0: {"description": index_name}},
+    )
+    tags[TAG_GDAL_NODATA] = "nan"
+
+    with TiffStripWriter(out_path, width, height, "float32", tags=tags) as writer:
+        for row_off in range(0, height, chunk_rows):
+            rows = min(chunk_rows, height - row_off)
+            window = (row_off, 0, rows, width)
+            stack = np.stack([_read_masked(r, item["band"], window) for item, r in zip(inputs, readers)])
+            ndvi_stack = None
+            if ndvi_readers is not None:
+                ndvi_stack = np.stack([_read_masked(r, item["band"], window)
+                                       for item, r in zip(ndvi_inputs, ndvi_readers)])
+            writer.write_rows(_reduce(stack, method, ndvi_stack))
+
+    return len(inputs)
+
+
+def build_composites(farm_id, index_name, out_folder, period="month", method="median",
+                     product_index=None, output_folder=None, chunk_rows=256):
+    """
+    농장 하나의 지수를 기간별로 합성
+
+    Args:
+        farm_id (str): 농장 ID
+        index_name (str): 지수 이름 (예: 'NDVI')
+        out_folder (str): 합성 결과 폴더 ({farm_id}_{기간}_{지수}_{방식}.tif)
+        period (str): 'month' 또는 'year'
+        method (str): 'median', 'mean', 'max', 'max_ndvi'
+        product_index (ProductIndex, optional): 입력 검색 및 결과 등록에 사용할 산출물 인덱스
+        output_folder (str, optional): product_index가 없을 때 입력을 탐색할 폴더
+
+    Returns:
+        list: 생성한 합성 파일 경로 리스트
+    """
+    inputs = find_inputs(farm_id, index_name, product_index, output_folder)
+    ndvi_by_date = {}
+    if method == "max_ndvi" and index_name != "NDVI":
+        ndvi_by_date = {item["date"]: item for item in find_inputs(farm_id, "NDVI", product_index, output_folder)}
+        inputs = [item for item in inputs if item["date"] in ndvi_by_date]
+
+    groups = defaultdict(list)
+    for item in inputs:
+        groups[period_of(item["date"], period)].append(item)
+
+    os.makedirs(out_folder, exist_ok=True)
+    written = []
+    for key in sorted(groups):
+        group = groups[key]
+        ndvi_inputs = [ndvi_by_date[item["date"]] for item in group] if ndvi_by_date else None
+        out_path = os.path.join(out_folder, f"{farm_id}_{key}_{index_name}_{method}.tif")
+        count = composite_period(group, out_path, index_name, method, ndvi_inputs, chunk_rows)
+        print(f"      -> 🧩 {key} {index_name} {method} 합성 완료 ({count}개 날짜)")
+        written.append(out_path)
+
+        if product_index is not None:
+            first = product_index.query(index_name=index_name, farm_id=farm_id, start_date=group[0]["date"],
+                                        end_date=group[0]["date"])
+            if first:
+                product_index.add(out_path, farm_id, group[0]["date"], f"{index_name}_{method}",
+                                  first[0]["epsg"], first[0]["bbox"])
+    return written
@@ -0,0 +1,125 @@
+"""
+촬영 범위(coverage) 사전 진단
+- 모든 농장/후보 날짜에 대해 저해상도 dataMask 미리보기만 동시에 요청
+- 농장 폴리곤 안에서 유효 픽셀 비율(coverage)을 계산하여 표로 보고
+- 촬영 경로(swath) 가장자리에 걸쳐 일부만 찍힌 날짜를 본 다운로드 전에 걸러내는 데 사용
+"""
+
+import os
+import csv
+
+import numpy as np
+from sentinelhub import (
+    SentinelHubRequest,
+    SentinelHubDownloadClient,
+    DataCollection,
+    MimeType,
+    bbox_to_dimensions,
+)
+
+from sentinel_evalscripts import EVALSCRIPT_DATAMASK
+from sentinel_zonal import polygon_mask
+
+COVERAGE_COLUMNS = ["farm_id", "date", "cloud", "pixel_count", "valid_count", "coverage"]
+
+
+def preview_size(farm_bbox, resolution=60, max_pixels=64):
+    """미리보기 크기 (resolution 기준, 긴 변이 max_pixels를 넘지 않도록 축소, 최소 1픽셀)"""
+    width, height = bbox_to_dimensions(farm_bbox, resolution=resolution)
+    ratio = min(1.0, max_pixels / max(width, height, 1))
+    return max(1, int(round(width * ratio))), max(1, int(round(height * ratio)))
+
+
+def build_coverage_request(farm_bbox, target_date, config, size):
+    """날짜 하나의 dataMask 미리보기 요청"""
+    return SentinelHubRequest(
+        evalscript=EVALSCRIPT_DATAMASK,
+        input_data=[
+            SentinelHubRequest.input_data(
+                data_collection=DataCollection.SENTINEL2_L2A,
+                time_interval=(target_date, target_date),
+                mosaicking_order='leastCC',
+            )
+        ],
+        responses=[SentinelHubRequest.output_response("dataMask", MimeType.TIFF)],
+        bbox=farm_bbox,
+        size=size,
+        config=config,
+    )
+
+
+def coverage_fraction(data_mask, mask=None):
+    """
+    유효 픽셀 비율
+
+    Args:
+        data_mask (np.ndarray): dataMask 미리보기 (height, width) 또는 (height, width, 1)
+        mask (np.ndarray, optional): polygon_mask 결과 (없으면 bbox 전체)
+
+    Returns:
+        dict: pixel_count, valid_count, coverage(0~1, 폴리곤 안에 중심이 들어오는 미리보기 픽셀이 없으면 None)
+    """
+    values = np.asarray(data_mask).reshape(data_mask.shape[:2])
+    if mask is not None:
+        values = values[mask]
+    pixel_count = int(values.size)
+    valid_count = int(np.count_nonzero(values))
+    return {
+        "pixel_count": pixel_count,
+        "valid_count": valid_count,
+        # 작거나 가는 필지는 미리보기 픽셀 중심이 하나도 안 들어올 수 있음 → 0이 아니라 판단 불가
+        "coverage": valid_count / pixel_count if pixel_count else None,
+    }
+
+
+def check_coverage(farms, config, bbox_of, geometry_of=None, resolution=60, max_pixels=64, max_threads=10):
+    """
+    여러 농장/날짜의 촬영 범위를 동시에 진단
+
+    Args:
+        farms (list): plan_farm 결과 리스트 ({'farm_id', 'dates', ...})
+        config (SHConfig): Sentinel Hub 설정
+        bbox_of (callable): 농장 계획 -> BBox
+        geometry_of (callable, optional): 농장 계획 -> 폴리곤 (없으면 bbox 전체 기준)
+        resolution (int): 미리보기 해상도 (미터)
+        max_pixels (int): 미리보기 긴 변의 최대 픽셀 수
+        max_threads (int): 동시 요청 수
+
+    Returns:
+        list: {'farm_id', 'date', 'cloud', 'pixel_count', 'valid_count', 'coverage'} 리스트
+              (요청이 실패한 날짜는 pixel_count/valid_count/coverage가 None)
+    """
+    keys, download_list, masks = [], [], []
+    for farm in farms:
+        farm_bbox = bbox_of(farm)
+        size = preview_size(farm_bbox, resolution, max_pixels)
+        geometry = geometry_of(farm) if geometry_of else None
+        mask = polygon_mask(geometry, list(farm_bbox), size) if geometry is not None else None
+        for item in farm['dates']:
+            request = build_coverage_request(farm_bbox, item['date'], config, size)
+            download_list.append(request.download_list[0])
+            keys.append((farm['farm_id'], item['date'], item.get('cloud')))
+            masks.append(mask)
+
+    client = SentinelHubDownloadClient(config=config, raise_download_errors=False)
+    responses = client.download(download_list, max_threads=max_threads)
+
+    rows = []
+    for (farm_id, date, cloud), mask, data_mask in zip(keys, masks, responses):
+        if data_mask is None:
+            # 요청 실패 (일시적인 네트워크 오류 등)는 촬영 범위를 모르는 것으로 기록 (0으로 보고 제외하지 않음)
+            stats = {"pixel_count": None, "valid_count": None, "coverage": None}
+        else:
+            stats = coverage_fraction(data_mask, mask)
+        rows.append({"farm_id": farm_id, "date": date, "cloud": cloud, **stats})
+    return rows
+
+
+def write_coverage_report(rows, path):
+    """진단 결과를 CSV로 저장 (기존 파일이 있으면 이어쓰기)"""
+    write_header = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=COVERAGE_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
@@ -0,0 +1,74 @@
+"""
+생육 지수 INT16 압축 인코딩
+- 지수 값(약 -1 ~ 1)을 10000배 하여 INT16으로 저장 (FLOAT32 대비 절반 크기)
+- scale/offset/NoData를 GeoTIFF(GDAL) 메타데이터에 기록
+- decode_index / read_index로 다시 float 배열로 복원 (NoData는 NaN)
+"""
+
+import numpy as np
+
+from sentinel_reader import GeoTiffReader
+from sentinel_tiff import TAG_GDAL_METADATA, TAG_GDAL_NODATA, add_tiff_tags, gdal_metadata_xml
+
+INT16_SCALE = 0.0001
+INT16_OFFSET = 0.0
+INT16_NODATA = -32768
+
+
+def tag_index_bands(path, identifiers, encoding="FLOAT32",
+                    scale=INT16_SCALE, offset=INT16_OFFSET, nodata=INT16_NODATA):
+    """
+    지수 TIFF에 밴드 설명(지수 이름)과, INT16이면 scale/offset/NoData 태그 기록
+
+    Args:
+        path (str): TIFF 경로
+        identifiers (list): 밴드 순서대로의 지수 이름 (예: ['NDVI', 'NDMI', ...])
+        encoding (str): "FLOAT32" 또는 "INT16"
+    """
+    band_items = {}
+    for band, identifier in enumerate(identifiers):
+        band_items[band] = {"description": identifier}
+        if encoding == "INT16":
+            band_items[band].update({"scale": scale, "offset": offset})
+
+    tags = {TAG_GDAL_METADATA: gdal_metadata_xml(
+        items={"ENCODING": "SCALED_INT16" if encoding == "INT16" else encoding},
+        band_items=band_items,
+    )}
+    if encoding == "INT16":
+        tags[TAG_GDAL_NODATA] = str(nodata)
+    add_tiff_tags(path, tags)
+
+
+def decode_index(array, scale=INT16_SCALE, offset=INT16_OFFSET, nodata=INT16_NODATA):
+    """
+    INT16 지수 배열을 float32로 복원 (NoData는 NaN)
+
+    Args:
+        array (np.ndarray): INT16 배열 (이미 float이면 그대로 float32로 반환)
+
+    Returns:
+        np.ndarray: float32 배열
+    """
+    array = np.asarray(array)
+    if np.issubdtype(array.dtype, np.floating):
+        return array.astype(np.float32, copy=False)
+
+    decoded = array.astype(np.float32) * np.float32(scale) + np.float32(offset)
+    decoded[array == nodata] = np.nan
+    return decoded
+
+
+def read_index(path, band=0, window=None):
+    """
+    지수 TIFF를 float32 배열로 읽기 (INT16이면 자동 복원, FLOAT32면 그대로)
+
+    Args:
+        path (str): {farm_id}_{date}_{identifier}.tif 경로
+        band (int or str): 다중 밴드 파일에서 읽을 밴드 번호 또는 지수 이름
+        window (tuple, optional): (row_off, col_off, height, width)
+
+    Returns:
+        np.ndarray: float32 배열
+    """
+    return GeoTiffReader(path).read(band, window).astype(np.float32, copy=False)
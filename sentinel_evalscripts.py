@@ -0,0 +1,259 @@
+"""
+Evalscript 레지스트리 (지수 정의를 한 곳에서 관리)
+- 지수마다 필요한 밴드와 계산식을 한 번만 선언
+- 요청할 지수 조합에 필요한 밴드(합집합)만 input에 넣은 최소 evalscript를 생성
+  (예: NDVI만 받으면 B04/B08만 요청 → B03/B05/B11을 받지 않아 PU 비용 감소)
+- 생성 결과는 (지수 조합, 자료형, 출력 형태)별로 캐시
+- 다른 광학 컬렉션(Landsat, HLS)은 밴드 이름 대응표(band_map)만 넘기면 같은 계산식을 재사용
+"""
+
+from functools import lru_cache
+
+# 지수 정의: 필요한 밴드 + 계산식 (밴드 변수는 소문자 b03, b04, ...)
+#  - ratio(a, b) = (a - b) / (a + b), safeDiv(a, b) = a / b (분모가 0이면 0)
+INDEX_DEFINITIONS = {
+    "NDVI":  {"bands": ("B04", "B08"), "formula": "ratio(b08, b04)"},
+    "NDMI":  {"bands": ("B08", "B11"), "formula": "ratio(b08, b11)"},
+    "GNDVI": {"bands": ("B03", "B08"), "formula": "ratio(b08, b03)"},
+    "OSAVI": {"bands": ("B04", "B08"), "formula": "safeDiv(1.16 * (b08 - b04), b08 + b04 + 0.16)"},
+    "NDRE":  {"bands": ("B05", "B08"), "formula": "ratio(b08, b05)"},
+    "LCI":   {"bands": ("B04", "B05", "B08"), "formula": "safeDiv(b08 - b05, b08 + b04)"},
+}
+
+RGB_BANDS = ("B02", "B03", "B04")
+
+HELPER_FUNCTIONS = """
+function safeDiv(a, b) {
+    return (b === 0) ? 0 : a / b;
+}
+function ratio(a, b) {
+    return safeDiv(a - b, a + b);
+}"""
+
+
+def required_bands(indices):
+    """
+    지수 목록 계산에 필요한 밴드 합집합
+
+    Args:
+        indices (list): 지수 이름 리스트 (예: ['NDVI', 'NDRE'])
+
+    Returns:
+        list: 밴드 이름 리스트 (정렬됨, dataMask 제외)
+    """
+    bands = set()
+    for name in indices:
+        if name not in INDEX_DEFINITIONS:
+            raise KeyError(f"'{name}' 지수가 정의되어 있지 않습니다. (사용 가능: {list(INDEX_DEFINITIONS)})")
+        bands.update(INDEX_DEFINITIONS[name]["bands"])
+    return sorted(bands)
+
+
+def _band_variables(bands, band_map=None):
+    band_map = dict(band_map or ())
+    return "var " + ", ".join(f"{band.lower()} = sample.{band_map.get(band, band)} || 0" for band in bands) + ";"
+
+
+def _input_bands(bands, band_map=None):
+    band_map = dict(band_map or ())
+    return ", ".join(f'"{band_map.get(band, band)}"' for band in list(bands) + ["dataMask"])
+
+
+def _band_map_key(band_map):
+    return tuple(sorted(band_map.items())) if band_map else ()
+
+
+def _index_variables(indices):
+    return "\n  ".join(f"var val_{name.lower()} = {INDEX_DEFINITIONS[name]['formula']};" for name in indices)
+
+
+@lru_cache(maxsize=None)
+def _build_index_evalscript(indices, sample_type, stacked, stacked_id, band_map, prefix):
+    bands = required_bands(indices)
+    values = [f"scale(val_{name.lower()})" for name in indices]
+    ids = [f"{prefix}{name}" for name in indices]
+    nodata = "-32768" if sample_type == "INT16" else "0"
+
+    if stacked:
+        outputs = f'[{{ id: "{stacked_id}", bands: {len(indices)}, sampleType: "{sample_type}" }}]'
+        returned = f"{{ {stacked_id}: [" + ", ".join(values) + "] }"
+        zero = f"{{ {stacked_id}: [" + ", ".join([nodata] * len(indices)) + "] }"
+    else:
+        outputs = "[\n" + ",\n".join(
+            f'      {{ id: "{name}", bands: 1, sampleType: "{sample_type}" }}' for name in ids
+        ) + "\n    ]"
+        returned = "{ " + ", ".join(f"{name}: [{v}]" for name, v in zip(ids, values)) + " }"
+        zero = "{ " + ", ".join(f"{name}: [{nodata}]" for name in ids) + " }"
+
+    if sample_type == "INT16":
+        scale_expr = "Math.max(-32767, Math.min(32767, Math.round(value * 10000)))"
+    else:
+        scale_expr = "value"
+
+    return f"""
+function setup() {{
+  return {{
+    input: [{_input_bands(bands, band_map)}],
+    output: {outputs},
+    mosaicking: "ORBIT"
+  }};
+}}
+function evaluatePixel(samples) {{
+  if (samples.length === 0) return createZero();
+  var sample = samples[0];
+  if (!sample.dataMask || sample.dataMask === 0) return createZero();
+
+  {_band_variables(bands, band_map)}
+  {_index_variables(indices)}
+
+  return {returned};
+}}{HELPER_FUNCTIONS}
+function scale(value) {{
+    return {scale_expr};
+}}
+function createZero() {{
+    return {zero};
+}}
+"""
+
+
+def build_index_evalscript(indices, sample_type="FLOAT32", stacked=False, stacked_id="VIs", band_map=None,
+                           prefix=""):
+    """
+    생육 지수 evalscript 생성 (필요한 밴드만 요청)
+
+    Args:
+        indices (list): 지수 이름 리스트 (출력 순서)
+        sample_type (str): "FLOAT32" 또는 "INT16" (지수 x 10000, NoData -32768)
+        stacked (bool): True면 지수를 밴드로 쌓은 출력 1개 (tar 압축 없음)
+        stacked_id (str): stacked 출력 이름
+        band_map (dict, optional): Sentinel-2 밴드 이름 → 컬렉션 밴드 이름 (예: {'B08': 'B05'} = Landsat NIR)
+        prefix (str): 지수별 출력 이름 접두사 (예: "L8_" → L8_NDVI)
+
+    Returns:
+        str: evalscript
+    """
+    return _build_index_evalscript(tuple(indices), sample_type, stacked, stacked_id, _band_map_key(band_map), prefix)
+
+
+@lru_cache(maxsize=None)
+def _build_rgb_evalscript(sample_type, gain, band_map, output_id):
+    names = [dict(band_map).get(band, band) for band in RGB_BANDS]
+    if sample_type == "UINT8":
+        channels = [f"Math.max(0, Math.min(255, Math.round(sample.{band} * {gain} * 255)))"
+                    for band in reversed(names)]
+    elif sample_type == "UINT16":
+        # 반사율 × 10000 (L2A 원본 DN과 같은 눈금, 밝기 보정 없음)
+        channels = [f"Math.max(0, Math.min(65535, Math.round(sample.{band} * 10000)))"
+                    for band in reversed(names)]
+    else:
+        channels = [f"sample.{band}" for band in reversed(names)]
+
+    return f"""
+function setup() {{
+  return {{
+    input: [{_input_bands(RGB_BANDS, band_map)}],
+    output: [{{ id: "{output_id}", bands: 3, sampleType: "{sample_type}" }}],
+    mosaicking: "ORBIT"
+  }};
+}}
+function evaluatePixel(samples) {{
+  if (samples.length === 0) return {{ {output_id}: [0,0,0] }};
+  var sample = samples[0];
+  if (!sample.dataMask || sample.dataMask === 0) return {{ {output_id}: [0,0,0] }};
+
+  return {{ {output_id}: [{", ".join(channels)}] }};
+}}
+"""
+
+
+def build_rgb_evalscript(sample_type="UINT8", gain=2.5, band_map=None, output_id="RGB"):
+    """
+    트루컬러 RGB evalscript 생성
+
+    Args:
+        sample_type (str): "UINT8" (0~255로 밝기 보정), "UINT16" (반사율 × 10000) 또는 "FLOAT32" (반사율 그대로)
+        gain (float): UINT8 밝기 보정 배율
+        band_map (dict, optional): Sentinel-2 밴드 이름 → 컬렉션 밴드 이름
+        output_id (str): 출력 이름
+    """
+    return _build_rgb_evalscript(sample_type, gain, _band_map_key(band_map), output_id)
+
+
+@lru_cache(maxsize=None)
+def build_sar_evalscript(polarizations=("VV", "VH"), output_id="SAR"):
+    """
+    Sentinel-1 후방산란계수 evalscript 생성 (편파별 선형 값을 밴드로 쌓음, NoData 0)
+
+    Args:
+        polarizations (tuple): 편파 이름 (출력 밴드 순서)
+        output_id (str): 출력 이름
+    """
+    zero = ", ".join("0" for _ in polarizations)
+    input_bands = ", ".join(f'"{band}"' for band in polarizations + ("dataMask",))
+    return f"""
+function setup() {{
+  return {{
+    input: [{input_bands}],
+    output: [{{ id: "{output_id}", bands: {len(polarizations)}, sampleType: "FLOAT32" }}],
+    mosaicking: "ORBIT"
+  }};
+}}
+function evaluatePixel(samples) {{
+  if (samples.length === 0) return {{ {output_id}: [{zero}] }};
+  var sample = samples[0];
+  if (!sample.dataMask || sample.dataMask === 0) return {{ {output_id}: [{zero}] }};
+
+  return {{ {output_id}: [{", ".join(f"sample.{band}" for band in polarizations)}] }};
+}}
+"""
+
+
+@lru_cache(maxsize=None)
+def _build_statistics_evalscript(indices):
+    bands = required_bands(indices)
+    outputs = ",\n".join(f'      {{ id: "{name}", bands: 1, sampleType: "FLOAT32" }}' for name in indices)
+    returned = ", ".join(f"{name}: [val_{name.lower()}]" for name in indices)
+    input_bands = _input_bands(bands)
+    return f"""
+//VERSION=3
+function setup() {{
+  return {{
+    input: [{{ bands: [{input_bands}] }}],
+    output: [
+{outputs},
+      {{ id: "dataMask", bands: 1 }}
+    ]
+  }};
+}}
+function evaluatePixel(sample) {{
+  {_band_variables(bands)}
+  {_index_variables(indices)}
+
+  return {{
+    {returned},
+    dataMask: [sample.dataMask]
+  }};
+}}{HELPER_FUNCTIONS}
+"""
+
+
+def build_statistics_evalscript(indices):
+    """Statistical API용 evalscript 생성 (지수별 출력 + dataMask, 필요한 밴드만 요청)"""
+    return _build_statistics_evalscript(tuple(indices))
+
+
+# 촬영 범위 진단용: dataMask만 요청 (지수 다운로드와 같은 ORBIT/leastCC 기준)
+EVALSCRIPT_DATAMASK = """
+function setup() {
+  return {
+    input: ["dataMask"],
+    output: [{ id: "dataMask", bands: 1, sampleType: "UINT8" }],
+    mosaicking: "ORBIT"
+  };
+}
+function evaluatePixel(samples) {
+  if (samples.length === 0) return { dataMask: [0] };
+  return { dataMask: [samples[0].dataMask ? 1 : 0] };
+}
+"""
@@ -0,0 +1,295 @@
+"""
+산출물 무결성 검사 및 복구용 매니페스트
+- 저장을 시작하기 전에 만들 제품을 pending으로 먼저 기록 (tar 해제 도중 중단되어도 누락 제품으로 검사되어 다시 받음)
+- 저장 시점에 제품(TIFF)마다 크기/SHA-256/다시 받기 위한 작업 정보(농장 범위, 날짜, 작업)를 매니페스트(SQLite)에 기록
+- 출력 폴더를 병렬로 검사: TIFF 헤더, strip/tile이 파일 크기 안에 있는지, (선택) 체크섬, 픽셀 해제 가능 여부
+- 제품별 유효 픽셀 비율(NoData가 아닌 픽셀 = dataMask 비율)을 매니페스트에 기록
+- 손상/누락 제품만 (농장, 날짜, 작업) 작업 항목으로 되돌려 다시 받음 (전체 재실행 불필요)
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from sentinel_products import PRODUCT_NAME_PATTERN
+from sentinel_reader import GeoTiffReader
+
+OK = "ok"
+PENDING = "pending"
+MISSING = "missing"
+TRUNCATED = "truncated"
+CORRUPT = "corrupt"
+CHECKSUM_MISMATCH = "checksum_mismatch"
+
+
+def file_checksum(path, chunk_size=1024 * 1024):
+    """파일 SHA-256 (1MB씩 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def valid_fraction(reader):
+    """
+    유효 픽셀 비율 (모든 밴드가 NoData인 픽셀 제외, NoData 태그가 없으면 0을 NoData로 봄)
+    모든 strip/tile을 해제하므로 압축 데이터 손상도 여기서 드러남
+    """
+    nodata = reader.nodata if reader.nodata is not None else 0
+    valid = np.zeros((reader.height, reader.width), dtype=bool)
+    for band in range(reader.samples):
+        array = reader.read(band, decode=False)
+        band_valid = array != nodata
+        if array.dtype.kind == "f":
+            band_valid &= ~np.isnan(array)
+        valid |= band_valid
+    return float(valid.mean()) if valid.size else 0.0
+
+
+def verify_product(path, expected=None, checksums=False, coverage=True):
+    """
+    제품 파일 하나 검사
+
+    Args:
+        path (str): 제품 경로
+        expected (dict, optional): 매니페스트 기록 (size, sha256)
+        checksums (bool): True면 기록된 SHA-256과 비교 (파일 전체를 읽음)
+        coverage (bool): True면 픽셀을 모두 해제하여 유효 픽셀 비율 계산
+
+    Returns:
+        dict: path, status(ok/missing/truncated/corrupt/checksum_mismatch), error, size, coverage
+    """
+    result = {"path": path, "status": OK, "error": None, "size": None, "coverage": None}
+    if not os.path.exists(path):
+        result["status"] = MISSING
+        return result
+
+    size = os.path.getsize(path)
+    result["size"] = size
+    if expected and expected.get("size") is not None and expected["size"] != size:
+        result.update(status=TRUNCATED, error=f"크기 {size} != 기록 {expected['size']}")
+        return result
+
+    try:
+        reader = GeoTiffReader(path)
+    except Exception as e:
+        result.update(status=CORRUPT, error=f"헤더 오류: {type(e).__name__}: {e}")
+        return result
+
+    ends = [offset + count for offset, count in zip(reader.offsets, reader.byte_counts)]
+    expected_blocks = reader.blocks_across * reader.blocks_down * (reader.samples if reader.planar == 2 else 1)
+    if len(ends) < expected_blocks or max(ends, default=0) > size:
+        result.update(status=TRUNCATED, error=f"데이터 블록이 파일 끝({size})을 넘음")
+        return result
+
+    if checksums and expected and expected.get("sha256") and file_checksum(path) != expected["sha256"]:
+        result.update(status=CHECKSUM_MISMATCH, error="SHA-256 불일치")
+        return result
+
+    if coverage:
+        try:
+            result["coverage"] = valid_fraction(reader)
+        except Exception as e:
+            result.update(status=CORRUPT, error=f"픽셀 해제 오류: {type(e).__name__}: {e}")
+    return result
+
+
+def verify_products(paths, expected=None, checksums=False, coverage=True, max_workers=8):
+    """
+    여러 제품을 병렬 검사 (zlib 해제/NumPy 연산은 GIL을 놓으므로 스레드로 충분)
+
+    Args:
+        paths (list): 제품 경로 리스트
+        expected (dict, optional): 경로 → 매니페스트 기록
+        max_workers (int): 동시 검사 수
+
+    Returns:
+        list: verify_product 결과 리스트 (paths 순서)
+    """
+    expected = expected or {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="verify") as executor:
+        return list(executor.map(
+            lambda path: verify_product(path, expected.get(path), checksums, coverage), paths
+        ))
+
+
+def find_partials(folder, exclude=()):
+    """
+    중간에 끊긴 저장의 흔적 (남은 .tar, 이름 정리 전 응답 TIFF) 목록
+
+    Args:
+        folder (str): 출력 폴더
+        exclude (tuple): 검사하지 않을 하위 폴더 (예: 합성 결과 폴더)
+    """
+    exclude = {os.path.abspath(path) for path in exclude}
+    partials = []
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) not in exclude]
+        for name in files:
+            lower = name.lower()
+            if lower.endswith(".tar") or (lower.endswith((".tif", ".tiff")) and not PRODUCT_NAME_PATTERN.match(name)):
+                partials.append(os.path.join(root, name))
+    return sorted(partials)
+
+
+class ProductManifest:
+    """제품별 체크섬/작업 정보/검사 결과 저장소"""
+
+    def __init__(self, db_path):
+        """
+        초기화
+
+        Args:
+            db_path (str): 매니페스트 SQLite 파일 경로
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS manifest (
+                path        TEXT PRIMARY KEY,
+                farm_id     TEXT NOT NULL,
+                date        TEXT NOT NULL,
+                identifier  TEXT NOT NULL,
+                task        TEXT,
+                collection  TEXT,
+                epsg        TEXT,
+                bbox        TEXT,
+                geometry    TEXT,
+                cloud       REAL,
+                size        INTEGER,
+                sha256      TEXT,
+                written_at  REAL,
+                status      TEXT,
+                error       TEXT,
+                coverage    REAL,
+                checked_at  REAL
+            )
+        """)
+        self.conn.commit()
+
+    def reserve(self, products, farm_id, date, task, collection, epsg, bbox, geometry=None, cloud=None):
+        """
+        저장 시작 전에 만들 제품을 pending으로 기록 (저장이 끝나면 record가 교체)
+
+        Args:
+            products (list): (제품 경로, 식별자) 리스트
+            나머지 인자는 record와 같음
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO manifest (path, farm_id, date, identifier, task, collection, epsg, bbox, "
+                "geometry, cloud, written_at, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path, farm_id, date, identifier, task, collection, epsg, json.dumps(list(bbox)), geometry, cloud,
+                  now, PENDING) for path, identifier in products]
+            )
+            self.conn.commit()
+
+    def record(self, path, farm_id, date, identifier, task, collection, epsg, bbox, geometry=None, cloud=None,
+               checksum=True):
+        """
+        저장 직후 제품 기록 (같은 경로는 교체)
+
+        Args:
+            path (str): 제품 경로
+            farm_id (str): 농장 ID
+            date (str): 촬영 날짜 'YYYY-MM-DD'
+            identifier (str): 파일 이름의 지수/작업 식별자
+            task (str): 다시 받을 때 사용할 작업 이름
+            collection (str): 컬렉션 이름
+            epsg (str): 좌표계 EPSG 코드
+            bbox (list): 농장 범위 [min_x, min_y, max_x, max_y]
+            geometry (str, optional): 농장 폴리곤 WKT
+            cloud (float, optional): 장면 구름 비율 (%)
+            checksum (bool): True면 SHA-256 기록
+        """
+        size = os.path.getsize(path)
+        sha256 = file_checksum(path) if checksum else None
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO manifest (path, farm_id, date, identifier, task, collection, epsg, bbox, "
+                "geometry, cloud, size, sha256, written_at, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, farm_id, date, identifier, task, collection, epsg, json.dumps(list(bbox)), geometry, cloud,
+                 size, sha256, time.time(), OK)
+            )
+            self.conn.commit()
+
+    def entries(self):
+        """경로 → 기록 딕셔너리"""
+        with self.lock:
+            cur = self.conn.execute("SELECT * FROM manifest")
+            columns = [c[0] for c in cur.description]
+            rows = cur.fetchall()
+        entries = {}
+        for row in rows:
+            entry = dict(zip(columns, row))
+            entry["bbox"] = json.loads(entry["bbox"]) if entry["bbox"] else None
+            entries[entry["path"]] = entry
+        return entries
+
+    def update_checks(self, results, products=()):
+        """
+        검사 결과 기록 (매니페스트에 없던 제품은 scan_products 정보로 새로 추가)
+
+        Args:
+            results (list): verify_products 결과
+            products (list): scan_products 결과 (path, farm_id, date, identifier)
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO manifest (path, farm_id, date, identifier) VALUES (?, ?, ?, ?)",
+                [(p["path"], p["farm_id"], p["date"], p["identifier"]) for p in products]
+            )
+            self.conn.executemany(
+                "UPDATE manifest SET status = ?, error = ?, coverage = COALESCE(?, coverage), checked_at = ? "
+                "WHERE path = ?",
+                [(r["status"], r["error"], r["coverage"], now, r["path"]) for r in results]
+            )
+            self.conn.commit()
+
+    def remove(self, path):
+        with self.lock:
+            self.conn.execute("DELETE FROM manifest WHERE path = ?", (path,))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def requeue_items(results, entries):
+    """
+    손상/누락 제품을 다시 받을 (농장, 날짜, 작업) 작업 항목으로 변환 (같은 작업은 한 번만)
+
+    Args:
+        results (list): verify_products 결과 중 status가 ok가 아닌 항목
+        entries (dict): ProductManifest.entries() 결과
+
+    Returns:
+        tuple: (작업 항목 리스트, 작업 정보가 없어 되돌릴 수 없는 경로 리스트)
+    """
+    items, unmapped, seen = [], [], set()
+    for result in results:
+        entry = entries.get(result["path"])
+        if not entry or not entry.get("task") or not entry.get("bbox"):
+            unmapped.append(result["path"])
+            continue
+        key = (entry["farm_id"], entry["date"], entry["task"])
+        if key in seen:
+            continue
+        seen.add(key)
+        items.append({
+            "farm_id": entry["farm_id"], "bbox": entry["bbox"], "epsg": entry["epsg"],
+            "geometry": entry["geometry"], "date": entry["date"], "cloud": entry["cloud"],
+            "collection": entry["collection"], "task": entry["task"],
+        })
+    return items, unmapped
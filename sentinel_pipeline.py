@@ -0,0 +1,207 @@
+"""
+메모리 상한이 있는 단계별 파이프라인 (producer → fetch → decode → write)
+- 단계 사이를 크기가 정해진 큐로 연결하여, 뒤 단계가 느리면 앞 단계가 기다림 (backpressure)
+- 동시에 메모리에 머무는 응답 수 = 단계별 작업자 수 + 큐 크기 합계로 제한
+- 실행 요약에 처리 건수, 오류, 소요 시간, 최대 메모리 사용량(peak RSS) 보고
+- prefetch: 다음 농장의 AOI 로드/카탈로그 검색을 현재 농장 다운로드와 겹쳐 미리 진행
+- BackgroundWriter: 저장/tar 해제/이름 정리를 별도 스레드에서 처리하는 동안 다음 다운로드 진행
+"""
+
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+def peak_rss_mb():
+    """
+    현재 프로세스의 최대 메모리 사용량 (MB)
+
+    Returns:
+        float: peak RSS (측정할 수 없으면 None)
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux는 KB, macOS는 바이트 단위
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        pass
+
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+class BoundedPipeline:
+    """크기가 제한된 큐로 연결된 다단계 스레드 파이프라인"""
+
+    def __init__(self, stages, queue_size=4):
+        """
+        초기화
+
+        Args:
+            stages (list): (단계 이름, 처리 함수, 작업자 수) 튜플 리스트
+                처리 함수는 항목을 받아 다음 단계로 넘길 항목을 반환 (None이면 여기서 종료)
+            queue_size (int): 단계 사이 큐의 최대 길이
+        """
+        self.stages = stages
+        self.queue_size = queue_size
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.processed = {name: 0 for name, _, _ in stages}
+        self.errors = []
+        self.on_error = None
+        self.lock = threading.Lock()
+
+    def _run_stage(self, index, func, remaining):
+        name = self.stages[index][0]
+        in_queue = self.queues[index]
+        out_queue = self.queues[index + 1] if index + 1 < len(self.stages) else None
+
+        while True:
+            item = in_queue.get()
+            if item is _DONE:
+                break
+            try:
+                result = func(item)
+            except Exception as e:
+                # 항목(응답 bytes 포함)은 보관하지 않아 오류가 많아도 메모리가 늘지 않음
+                with self.lock:
+                    self.errors.append({"stage": name, "error": e})
+                if self.on_error is not None:
+                    self.on_error(name, item, e)
+                continue
+
+            with self.lock:
+                self.processed[name] += 1
+            if result is not None and out_queue is not None:
+                out_queue.put(result)
+
+        # 이 단계의 마지막 작업자가 다음 단계 작업자 수만큼 종료 신호 전달
+        with self.lock:
+            remaining[index] -= 1
+            last = remaining[index] == 0
+        if last and out_queue is not None:
+            for _ in range(self.stages[index + 1][2]):
+                out_queue.put(_DONE)
+
+    def run(self, items, on_error=None):
+        """
+        항목들을 파이프라인에 흘려보내고 모든 단계가 끝날 때까지 대기
+
+        Args:
+            items (iterable): 첫 단계에 넣을 항목 (제너레이터 권장 - 필요할 때만 생성)
+            on_error (callable, optional): 오류 발생 시 (단계 이름, 항목, 예외)로 호출
+
+        Returns:
+            dict: processed(단계별 처리 수), errors, elapsed_sec, peak_rss_mb
+        """
+        start = time.time()
+        self.on_error = on_error
+        remaining = [workers for _, _, workers in self.stages]
+        threads = []
+        for index, (name, func, workers) in enumerate(self.stages):
+            for _ in range(workers):
+                thread = threading.Thread(target=self._run_stage, args=(index, func, remaining),
+                                          name=f"{name}-{len(threads)}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                self.queues[0].put(item)
+        except Exception as e:
+            with self.lock:
+                self.errors.append({"stage": "producer", "error": e})
+            if on_error is not None:
+                on_error("producer", None, e)
+        finally:
+            for _ in range(self.stages[0][2]):
+                self.queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+        return {
+            "processed": dict(self.processed),
+            "errors": len(self.errors),
+            "elapsed_sec": time.time() - start,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def prefetch(items, depth=1, name="prefetch"):
+    """
+    항목 생성을 백그라운드 스레드에서 depth개 앞서 진행 (생성 중 예외는 소비 쪽에서 다시 발생)
+
+    Args:
+        items (iterable): 생성 비용이 큰 항목 (예: 카탈로그 검색까지 마친 농장 계획)
+        depth (int): 미리 만들어 둘 항목 수 (0 이하면 미리 만들지 않음)
+        name (str): 스레드 이름
+
+    Examples:
+        >>> for farm in prefetch(planned_farms(files), depth=1):
+        ...     download(farm)  # 이 동안 다음 농장 계획이 진행됨
+    """
+    if depth <= 0:
+        yield from items
+        return
+
+    buffer = queue.Queue(maxsize=depth)
+    failure = []
+
+    def produce():
+        try:
+            for item in items:
+                buffer.put(item)
+        except Exception as e:
+            failure.append(e)
+        finally:
+            buffer.put(_DONE)
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    while True:
+        item = buffer.get()
+        if item is _DONE:
+            break
+        yield item
+    thread.join()
+    if failure:
+        raise failure[0]
+
+
+class BackgroundWriter:
+    """뒤처리 작업을 스레드 하나에서 제출 순서대로 실행 (대기 작업 수 상한 = 메모리 상한)"""
+
+    def __init__(self, max_pending=4, name="write"):
+        """
+        초기화
+
+        Args:
+            max_pending (int): 실행 중 + 대기 중 작업 수 상한 (넘으면 submit이 기다림)
+            name (str): 스레드 이름 접두사
+        """
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self.slots = threading.BoundedSemaphore(max(1, max_pending))
+
+    def submit(self, func, *args, **kwargs):
+        """작업 제출 (concurrent.futures.Future 반환, 결과/예외는 future.result()로 확인)"""
+        self.slots.acquire()
+        try:
+            future = self.executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def close(self):
+        """남은 작업을 모두 마치고 종료"""
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,132 @@
+"""
+결정적 작업 계획(plan) 내보내기/불러오기
+- 계획 단계에서 전체 작업 그래프(농장, bbox, 크기, 날짜, 작업, evalscript 해시, 예상 바이트)를 파일로 저장
+- 같은 계획 파일은 언제 실행해도 같은 작업 목록 (다시 실행/재현 가능)
+- 실행 순서 최적화(큰 작업 먼저), 여러 호스트로 분할(job_id 해시 기준)
+"""
+
+import json
+import hashlib
+import datetime
+
+from sentinel_queue import make_job_key
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+PLAN_VERSION = 1
+ORDER_STRATEGIES = ("plan", "largest_first", "date", "farm")
+
+
+def evalscript_hash(evalscript):
+    """evalscript 내용 해시 (계획 이후 evalscript가 바뀌었는지 확인용)"""
+    return hashlib.sha256(evalscript.encode("utf-8")).hexdigest()[:16]
+
+
+def make_job(item, task, sample_bytes):
+    """
+    작업 항목 하나를 계획 레코드로 변환
+
+    Args:
+        item (dict): plan_work_items 결과 항목
+        task (dict): build_download_tasks 결과 중 item['task']에 해당하는 작업 (output_bands 포함)
+        sample_bytes (int): 출력 픽셀 자료형 크기 (바이트)
+
+    Returns:
+        dict: 작업 항목 + job_id, size, resolution, evalscript_sha, est_bytes
+    """
+    width, height = task['size']
+    return {
+        **item,
+        "job_id": make_job_key(item),
+        "size": list(task['size']),
+        "resolution": task.get('resolution'),
+        "evalscript_sha": evalscript_hash(task['evalscript']),
+        "est_bytes": width * height * task['output_bands'] * sample_bytes,
+    }
+
+
+def order_jobs(jobs, strategy="plan"):
+    """
+    실행 순서 정렬 (항상 같은 입력이면 같은 순서)
+
+    Args:
+        jobs (list): 계획 레코드 리스트
+        strategy (str): "plan" (계획 순서 그대로), "largest_first" (예상 바이트 큰 것 먼저 → 마지막 대기 시간 감소),
+                        "date" (날짜순), "farm" (농장순)
+    """
+    if strategy == "plan":
+        return list(jobs)
+    if strategy == "largest_first":
+        return sorted(jobs, key=lambda job: (-job['est_bytes'], job['job_id']))
+    if strategy == "date":
+        return sorted(jobs, key=lambda job: (job['date'], job['job_id']))
+    if strategy == "farm":
+        return sorted(jobs, key=lambda job: (job['farm_id'], job['date'], job['task']))
+    raise ValueError(f"지원하지 않는 정렬 방식입니다: {strategy} (사용 가능: {ORDER_STRATEGIES})")
+
+
+def split_jobs(jobs, parts, part):
+    """
+    계획을 parts개로 나눈 것 중 part번째(0부터) 몫 (job_id 해시 기준이라 호스트마다 겹치지 않음)
+
+    Examples:
+        >>> split_jobs(jobs, 3, 0) + split_jobs(jobs, 3, 1) + split_jobs(jobs, 3, 2)  # 전체와 같은 집합
+    """
+    if parts <= 1:
+        return list(jobs)
+    return [job for job in jobs
+            if int(hashlib.sha1(job['job_id'].encode("utf-8")).hexdigest(), 16) % parts == part]
+
+
+def write_plan(jobs, path, meta=None):
+    """
+    계획 저장 (.json 또는 .parquet)
+
+    Args:
+        jobs (list): 계획 레코드 리스트
+        path (str): 출력 경로
+        meta (dict, optional): 계획 조건 (기간, 구름 비율, 지수 등)
+    """
+    if path.lower().endswith(".parquet"):
+        if pa is None:
+            raise ImportError("Parquet 출력에는 'pip install pyarrow'가 필요합니다. (.json 경로를 사용하세요)")
+        rows = [{**job, "size": list(job['size']), "bbox": list(job['bbox'])} for job in jobs]
+        table = pa.Table.from_pylist(rows)
+        table = table.replace_schema_metadata({"plan_meta": json.dumps(meta or {}, ensure_ascii=False)})
+        pq.write_table(table, path)
+        return
+
+    document = {
+        "version": PLAN_VERSION,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "meta": meta or {},
+        "jobs": jobs,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=1)
+
+
+def read_plan(path):
+    """
+    계획 불러오기
+
+    Returns:
+        tuple: (jobs 리스트, meta 딕셔너리)
+    """
+    if path.lower().endswith(".parquet"):
+        if pq is None:
+            raise ImportError("Parquet 계획을 읽으려면 'pip install pyarrow'가 필요합니다.")
+        table = pq.read_table(path)
+        meta = json.loads((table.schema.metadata or {}).get(b"plan_meta", b"{}"))
+        return table.to_pylist(), meta
+
+    with open(path, encoding="utf-8") as f:
+        document = json.load(f)
+    if document.get("version") != PLAN_VERSION:
+        raise ValueError(f"지원하지 않는 계획 파일 버전입니다: {document.get('version')}")
+    return document["jobs"], document.get("meta", {})
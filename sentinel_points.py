@@ -0,0 +1,127 @@
+"""
+표본 지점(point) 시계열 추출
+- 점 레이어(.zip/.geojson/.shp)를 읽어 지점마다 UTM 좌표계를 정하고 (파일, UTM 존)별로 묶음
+- 지점을 덮는 10m 픽셀 하나짜리 폴리곤으로 Statistical API를 요청하여 날짜별 지수 값만 받음
+  (래스터 전체를 받지 않으므로 비용은 농장 면적이 아니라 지점 수에 비례)
+- 결과는 (지점, 날짜, 지수, 값) 형태의 긴 표(CSV)
+"""
+
+import os
+import csv
+import math
+from collections import defaultdict
+
+import numpy as np
+import shapely
+from sentinelhub import BBox, CRS
+
+from sentinel_aoi import WGS84, get_transformer, read_aoi_file, utm_epsg_codes
+from sentinel_statistics import build_statistics_request, download_statistics, statistics_rows
+
+POINT_COLUMNS = ["point_id", "farm_id", "lon", "lat", "date", "index", "value"]
+
+
+def load_points(file_path, id_column=None):
+    """
+    점 레이어를 읽어 지점 목록 생성 (점이 아닌 피처는 대표점 사용)
+
+    Args:
+        file_path (str): 점 레이어 파일 경로
+        id_column (str, optional): 지점 ID 컬럼 (없으면 {파일명}_{순번})
+
+    Returns:
+        list: {'point_id', 'farm_id', 'lon', 'lat', 'epsg', 'x', 'y'} 리스트 (x/y는 UTM 좌표)
+    """
+    farm_id = os.path.splitext(os.path.basename(file_path))[0]
+    gdf = read_aoi_file(file_path)
+    src_crs = gdf.crs.to_wkt() if gdf.crs is not None else WGS84
+
+    geometries = np.asarray(gdf.geometry.values, dtype=object)
+    points = shapely.point_on_surface(geometries)
+    lons, lats = get_transformer(src_crs, WGS84).transform(shapely.get_x(points), shapely.get_y(points))
+    epsg_codes = utm_epsg_codes(lons, lats)
+
+    if id_column:
+        point_ids = [str(value) for value in gdf[id_column]]
+    else:
+        point_ids = [f"{farm_id}_{i}" for i in range(len(points))]
+
+    result = [None] * len(points)
+    for epsg_code in np.unique(epsg_codes):
+        indices = np.nonzero(epsg_codes == epsg_code)[0]
+        xs, ys = get_transformer(WGS84, f"EPSG:{epsg_code}").transform(lons[indices], lats[indices])
+        for i, x, y in zip(indices, xs, ys):
+            result[i] = {
+                "point_id": point_ids[i], "farm_id": farm_id,
+                "lon": float(lons[i]), "lat": float(lats[i]),
+                "epsg": str(epsg_code), "x": float(x), "y": float(y),
+            }
+    return result
+
+
+def group_points(points):
+    """
+    지점을 (농장, UTM 존)별로 묶음 (같은 묶음은 같은 좌표계로 한 번에 요청)
+
+    농장 = 점 레이어 파일, 타일 = UTM 존 (Sentinel-2 MGRS 타일 격자 없이 좌표계 단위로 묶음)
+    """
+    groups = defaultdict(list)
+    for point in points:
+        groups[(point['farm_id'], point['epsg'])].append(point)
+    return groups
+
+
+def pixel_bbox(point, resolution=10):
+    """지점이 속한 픽셀 하나의 범위 (UTM 격자에 맞춤)"""
+    x0 = math.floor(point['x'] / resolution) * resolution
+    y0 = math.floor(point['y'] / resolution) * resolution
+    return BBox(bbox=[x0, y0, x0 + resolution, y0 + resolution], crs=CRS(point['epsg']))
+
+
+def sample_points(points, time_interval, config, indices, resolution=10, max_cc_percent=100.0, max_threads=5):
+    """
+    지점별 날짜별 지수 값 추출
+
+    Args:
+        points (list): load_points 결과
+        time_interval (tuple): (START_DATE, END_DATE)
+        config (SHConfig): Sentinel Hub 설정
+        indices (list): 지수 이름 리스트
+        resolution (int): 픽셀 크기 (미터)
+        max_cc_percent (float): 장면 구름 비율 상한 (%)
+        max_threads (int): 동시 요청 수
+
+    Returns:
+        list: {'point_id', 'farm_id', 'lon', 'lat', 'date', 'index', 'value'} 리스트 (요청이 실패한 지점은 제외)
+    """
+    requests = []
+    for point in points:
+        bbox = pixel_bbox(point, resolution)
+        requests.append(build_statistics_request(
+            bbox, time_interval, config, geometry=shapely.box(*list(bbox)), resolution=resolution,
+            max_cc_percent=max_cc_percent, indices=indices
+        ))
+
+    rows = []
+    for point, response in zip(points, download_statistics(requests, config, max_threads=max_threads)):
+        if response is None:
+            # 지점 하나의 요청 실패가 같은 묶음의 다른 지점 결과를 버리지 않도록 건너뜀
+            print(f"   ⚠️ 지점 {point['point_id']} 통계 요청 실패 (다시 실행하세요)")
+            continue
+        for stat in statistics_rows(point['point_id'], response, indices):
+            rows.append({
+                "point_id": point['point_id'], "farm_id": point['farm_id'],
+                "lon": point['lon'], "lat": point['lat'],
+                "date": stat['date'], "index": stat['index'], "value": stat['mean'],
+            })
+    return rows
+
+
+def write_point_rows(rows, path):
+    """지점 시계열을 CSV로 저장 (기존 파일이 있으면 이어쓰기)"""
+    write_header = not os.path.exists(path)
+    with open(path, "a", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=POINT_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        writer.writerows(rows)
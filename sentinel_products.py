@@ -0,0 +1,201 @@
+"""
+다운로드한 산출물의 공간 인덱스 (SQLite + R-tree)
+- 저장 단계에서 산출물마다 범위(footprint), 좌표계, 날짜, 지수 이름, 구름 비율, 파일 경로 기록
+- "이 폴리곤과 겹치는 X~Y 기간의 NDVI 파일" 같은 질의를 폴더 탐색 없이 바로 응답
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+
+import shapely
+import shapely.wkt
+
+from sentinel_aoi import WGS84, transform_geometries
+
+
+# {farm_id}_{YYYYMMDD}_{identifier}.tif (farm_id에는 '_'가 들어갈 수 있음, 식별자는 컬렉션 접두사 포함 가능: L8_NDVI)
+PRODUCT_NAME_PATTERN = re.compile(r"^(?P<farm_id>.+)_(?P<date>\d{8})_(?P<identifier>[A-Za-z0-9]+(?:_[A-Za-z0-9]+)?)\.tif$")
+
+
+def scan_products(folder):
+    """
+    출력 폴더를 탐색하여 샘플러 산출물 파일 목록 생성 (인덱스가 없을 때의 대안)
+
+    Returns:
+        list: {'path', 'farm_id', 'date'('YYYY-MM-DD'), 'identifier'} 리스트
+    """
+    products = []
+    for root, _, files in os.walk(folder):
+        for name in files:
+            match = PRODUCT_NAME_PATTERN.match(name)
+            if match is None:
+                continue
+            date = match.group("date")
+            products.append({
+                "path": os.path.join(root, name),
+                "farm_id": match.group("farm_id"),
+                "date": f"{date[:4]}-{date[4:6]}-{date[6:]}",
+                "identifier": match.group("identifier"),
+            })
+    products.sort(key=lambda p: (p["farm_id"], p["date"], p["identifier"]))
+    return products
+
+
+class ProductIndex:
+    """산출물 공간 인덱스"""
+
+    def __init__(self, db_path):
+        """
+        초기화
+
+        Args:
+            db_path (str): 인덱스 SQLite 파일 경로
+        """
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS products (
+                id            INTEGER PRIMARY KEY AUTOINCREMENT,
+                path          TEXT NOT NULL,
+                band          INTEGER NOT NULL DEFAULT 0,
+                farm_id       TEXT NOT NULL,
+                date          TEXT NOT NULL,
+                index_name    TEXT NOT NULL,
+                epsg          TEXT NOT NULL,
+                bbox          TEXT NOT NULL,
+                cloud_cover   REAL,
+                footprint_wkt TEXT NOT NULL,
+                UNIQUE (path, index_name)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_products_name_date ON products (index_name, date)")
+
+        # WGS84 범위 인덱스 (R-tree 모듈이 없는 SQLite면 일반 테이블 + B-tree 인덱스로 대체)
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS product_bounds USING rtree(id, min_x, max_x, min_y, max_y)"
+            )
+        except sqlite3.OperationalError:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS product_bounds (
+                    id INTEGER PRIMARY KEY, min_x REAL, max_x REAL, min_y REAL, max_y REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_product_bounds_x ON product_bounds (min_x, max_x)")
+        self.conn.commit()
+
+    def add(self, path, farm_id, date, index_name, epsg, bbox, cloud_cover=None, band=0):
+        """
+        산출물 하나를 인덱스에 등록 (같은 경로/지수는 교체)
+
+        Args:
+            path (str): 산출물 파일 경로
+            farm_id (str): 농장 ID
+            date (str): 촬영 날짜 'YYYY-MM-DD'
+            index_name (str): 지수 이름 (RGB, NDVI, ...)
+            epsg (str): 산출물 좌표계 EPSG 코드
+            bbox (list): 산출물 범위 [min_x, min_y, max_x, max_y] (epsg 좌표)
+            cloud_cover (float, optional): 장면 구름 비율 (%)
+            band (int): 다중 밴드 파일에서의 밴드 번호
+        """
+        footprint = transform_geometries(
+            shapely.box(*bbox), f"EPSG:{epsg}", WGS84
+        )
+        min_x, min_y, max_x, max_y = footprint.bounds
+
+        with self.lock:
+            old = self.conn.execute(
+                "SELECT id FROM products WHERE path = ? AND index_name = ?", (path, index_name)
+            ).fetchone()
+            if old is not None:
+                self.conn.execute("DELETE FROM product_bounds WHERE id = ?", old)
+                self.conn.execute("DELETE FROM products WHERE id = ?", old)
+
+            cur = self.conn.execute(
+                "INSERT INTO products (path, band, farm_id, date, index_name, epsg, bbox, cloud_cover, footprint_wkt) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, band, farm_id, date, index_name, epsg, json.dumps(list(bbox)), cloud_cover, footprint.wkt)
+            )
+            self.conn.execute(
+                "INSERT INTO product_bounds (id, min_x, max_x, min_y, max_y) VALUES (?, ?, ?, ?, ?)",
+                (cur.lastrowid, min_x, max_x, min_y, max_y)
+            )
+            self.conn.commit()
+
+    def remove(self, path):
+        """파일 경로에 해당하는 모든 항목 삭제"""
+        with self.lock:
+            ids = self.conn.execute("SELECT id FROM products WHERE path = ?", (path,)).fetchall()
+            self.conn.executemany("DELETE FROM product_bounds WHERE id = ?", ids)
+            self.conn.executemany("DELETE FROM products WHERE id = ?", ids)
+            self.conn.commit()
+
+    def query(self, geometry=None, start_date=None, end_date=None, index_name=None, farm_id=None):
+        """
+        조건에 맞는 산출물 검색
+
+        Args:
+            geometry (shapely.Geometry, optional): WGS84 경위도 지오메트리 (점/폴리곤)
+            start_date (str, optional): 시작 날짜 'YYYY-MM-DD' (포함)
+            end_date (str, optional): 종료 날짜 'YYYY-MM-DD' (포함)
+            index_name (str, optional): 지수 이름 (예: 'NDVI')
+            farm_id (str, optional): 농장 ID
+
+        Returns:
+            list: {'path', 'band', 'farm_id', 'date', 'index_name', 'epsg', 'bbox', 'cloud_cover'} 리스트 (날짜순)
+
+        Examples:
+            >>> index.query(shapely.box(127.48, 36.86, 127.50, 36.88), "2026-01-01", "2026-03-31", "NDVI")
+        """
+        sql = ("SELECT p.path, p.band, p.farm_id, p.date, p.index_name, p.epsg, p.bbox, p.cloud_cover, "
+               "p.footprint_wkt FROM products p")
+        conditions, params = [], []
+
+        if geometry is not None:
+            sql += " JOIN product_bounds b ON b.id = p.id"
+            min_x, min_y, max_x, max_y = geometry.bounds
+            conditions += ["b.max_x >= ?", "b.min_x <= ?", "b.max_y >= ?", "b.min_y <= ?"]
+            params += [min_x, max_x, min_y, max_y]
+        if start_date:
+            conditions.append("p.date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("p.date <= ?")
+            params.append(end_date)
+        if index_name:
+            conditions.append("p.index_name = ?")
+            params.append(index_name)
+        if farm_id:
+            conditions.append("p.farm_id = ?")
+            params.append(farm_id)
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY p.date, p.farm_id"
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        results = []
+        for path, band, row_farm_id, date, row_index, epsg, bbox, cloud_cover, footprint_wkt in rows:
+            # R-tree는 범위 사각형만 비교하므로 실제 지오메트리로 한 번 더 확인
+            if geometry is not None and not shapely.intersects(geometry, shapely.wkt.loads(footprint_wkt)):
+                continue
+            results.append({
+                "path": path, "band": band, "farm_id": row_farm_id, "date": date, "index_name": row_index,
+                "epsg": epsg, "bbox": json.loads(bbox), "cloud_cover": cloud_cover,
+            })
+        return results
+
+    def farm_ids(self):
+        """인덱스에 등록된 농장 ID 목록"""
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT DISTINCT farm_id FROM products ORDER BY farm_id")]
+
+    def close(self):
+        self.conn.close()
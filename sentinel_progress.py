@@ -0,0 +1,237 @@
+"""
+장시간 실행의 진행 상태 저장 및 실시간 상태 조회
+- (농장, 날짜, 작업)마다 상태/시도 횟수/수신 바이트/소요 시간/오류를 SQLite에 기록 (재시작 후에도 유지)
+- 최근 처리 속도로 처리량, 남은 시간(ETA), 실행 중인 작업자, 오류율 계산
+- 로컬 HTTP 엔드포인트: GET /status (JSON), GET / (자동 새로고침 텍스트 화면)
+"""
+
+import html
+import json
+import time
+import sqlite3
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class RunState:
+    """(농장, 날짜, 작업) 단위 진행 상태 저장소"""
+
+    def __init__(self, db_path, window_sec=300, stale_sec=600):
+        """
+        초기화
+
+        Args:
+            db_path (str): 상태 SQLite 파일 경로
+            window_sec (int): 처리량/ETA 계산에 쓰는 최근 구간 (초)
+            stale_sec (int): 이 시간보다 오래 running인 항목은 중단된 실행으로 보고 대기 상태로 되돌림
+                             (같은 파일을 쓰는 다른 작업자가 처리 중인 항목은 건드리지 않도록 큐 임대 시간과 맞춤)
+        """
+        self.db_path = db_path
+        self.window_sec = window_sec
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS run_items (
+                farm_id     TEXT NOT NULL,
+                date        TEXT NOT NULL,
+                task        TEXT NOT NULL,
+                status      TEXT NOT NULL,
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                bytes       INTEGER NOT NULL DEFAULT 0,
+                worker      TEXT,
+                started_at  REAL,
+                finished_at REAL,
+                elapsed_sec REAL,
+                error       TEXT,
+                PRIMARY KEY (farm_id, date, task)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_run_items_status ON run_items (status, finished_at)")
+        # 이전 실행이 중간에 종료되어 running으로 남은 항목은 다시 대기 상태로
+        self.conn.execute(
+            "UPDATE run_items SET status = ?, worker = NULL WHERE status = ? AND COALESCE(started_at, 0) < ?",
+            (PENDING, RUNNING, self.started_at - stale_sec)
+        )
+        self.conn.commit()
+
+    def plan(self, items):
+        """
+        처리 예정 항목 등록 (이미 있는 항목은 상태 유지, 실패 항목은 다시 대기로)
+
+        Args:
+            items (list): {'farm_id', 'date', 'task'} 딕셔너리 리스트
+        """
+        rows = [(item['farm_id'], item['date'], item['task']) for item in items]
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO run_items (farm_id, date, task, status) VALUES (?, ?, ?, 'pending')", rows
+            )
+            self.conn.executemany(
+                "UPDATE run_items SET status = 'pending' WHERE farm_id = ? AND date = ? AND task = ? "
+                "AND status = 'failed'", rows
+            )
+            self.conn.commit()
+
+    def start(self, farm_id, date, task, worker=None):
+        """항목 처리 시작 기록 (시도 횟수 증가)"""
+        worker = worker or threading.current_thread().name
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO run_items (farm_id, date, task, status) VALUES (?, ?, ?, 'pending')",
+                (farm_id, date, task)
+            )
+            self.conn.execute(
+                "UPDATE run_items SET status = ?, attempts = attempts + 1, worker = ?, started_at = ?, "
+                "finished_at = NULL, error = NULL WHERE farm_id = ? AND date = ? AND task = ?",
+                (RUNNING, worker, time.time(), farm_id, date, task)
+            )
+            self.conn.commit()
+
+    def finish(self, farm_id, date, task, nbytes=0):
+        """항목 처리 완료 기록"""
+        self._close(farm_id, date, task, DONE, nbytes=nbytes)
+
+    def fail(self, farm_id, date, task, error):
+        """항목 처리 실패 기록"""
+        self._close(farm_id, date, task, FAILED, error=f"{type(error).__name__}: {error}")
+
+    def _close(self, farm_id, date, task, status, nbytes=0, error=None):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "UPDATE run_items SET status = ?, bytes = ?, finished_at = ?, "
+                "elapsed_sec = ? - COALESCE(started_at, ?), error = ?, worker = NULL "
+                "WHERE farm_id = ? AND date = ? AND task = ?",
+                (status, nbytes, now, now, now, error, farm_id, date, task)
+            )
+            self.conn.commit()
+
+    def summary(self):
+        """
+        현재 진행 요약
+
+        Returns:
+            dict: counts(상태별 건수), total, throughput_per_min, bytes_per_sec, eta_sec,
+                  error_rate, errors(오류 종류별 건수), active_workers, avg_elapsed_sec
+        """
+        now = time.time()
+        since = max(self.started_at, now - self.window_sec)
+        with self.lock:
+            counts = dict(self.conn.execute("SELECT status, COUNT(*) FROM run_items GROUP BY status").fetchall())
+            recent_done, recent_bytes, avg_elapsed = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0), AVG(elapsed_sec) FROM run_items "
+                "WHERE status = 'done' AND finished_at >= ?", (since,)
+            ).fetchone()
+            recent_failed = self.conn.execute(
+                "SELECT COUNT(*) FROM run_items WHERE status = 'failed' AND finished_at >= ?", (since,)
+            ).fetchone()[0]
+            errors = self.conn.execute(
+                "SELECT substr(error, 1, instr(error || ':', ':') - 1) AS kind, COUNT(*) FROM run_items "
+                "WHERE status = 'failed' GROUP BY kind ORDER BY COUNT(*) DESC"
+            ).fetchall()
+            workers = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT worker FROM run_items WHERE status = 'running' ORDER BY worker"
+            )]
+
+        elapsed = max(now - since, 1e-6)
+        throughput = recent_done / elapsed * 60.0
+        remaining = counts.get(PENDING, 0) + counts.get(RUNNING, 0)
+        attempted = recent_done + recent_failed
+        return {
+            "counts": {status: counts.get(status, 0) for status in (PENDING, RUNNING, DONE, FAILED)},
+            "total": sum(counts.values()),
+            "throughput_per_min": throughput,
+            "bytes_per_sec": recent_bytes / elapsed,
+            "eta_sec": remaining / throughput * 60.0 if throughput > 0 else None,
+            "error_rate": recent_failed / attempted if attempted else 0.0,
+            "errors": dict(errors),
+            "active_workers": workers,
+            "avg_elapsed_sec": avg_elapsed,
+            "uptime_sec": now - self.started_at,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def format_duration(seconds):
+    """초 → 'H:MM:SS' (하루 이상이면 '{일}d HH:MM:SS')"""
+    minutes, secs = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    days, hours = divmod(hours, 24)
+    if days:
+        return f"{days}d {hours:02}:{minutes:02}:{secs:02}"
+    return f"{hours:02}:{minutes:02}:{secs:02}"
+
+
+def format_summary(summary):
+    """요약을 사람이 읽는 여러 줄 텍스트로 변환"""
+    counts = summary['counts']
+    eta = summary['eta_sec']
+    eta_text = format_duration(eta) if eta is not None else "계산 중"
+    lines = [
+        f"진행: 완료 {counts[DONE]} / 전체 {summary['total']} "
+        f"(대기 {counts[PENDING]}, 실행 중 {counts[RUNNING]}, 실패 {counts[FAILED]})",
+        f"처리량: {summary['throughput_per_min']:.1f}건/분, {summary['bytes_per_sec'] / 1024 ** 2:.2f} MB/s",
+        f"남은 시간(ETA): {eta_text}",
+        f"오류율(최근): {summary['error_rate']:.1%}",
+        f"실행 중 작업자 ({len(summary['active_workers'])}): {', '.join(summary['active_workers']) or '-'}",
+    ]
+    for kind, count in summary['errors'].items():
+        lines.append(f"  - {kind}: {count}건")
+    return "\n".join(lines)
+
+
+class StatusServer:
+    """RunState 요약을 제공하는 로컬 HTTP 서버 (백그라운드 스레드)"""
+
+    def __init__(self, state, host="127.0.0.1", port=8765):
+        """
+        초기화 및 서버 시작
+
+        Args:
+            state (RunState): 진행 상태 저장소
+            host (str): 바인드 주소 (기본값은 로컬에서만 접근)
+            port (int): 포트 번호 (0이거나 이미 사용 중이면 빈 포트 자동 선택, 실제 주소는 self.url)
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                summary = state.summary()
+                if self.path.startswith("/status"):
+                    body = json.dumps(summary, ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json; charset=utf-8"
+                elif self.path == "/":
+                    body = (f"<html><head><meta charset='utf-8'><meta http-equiv='refresh' content='5'></head>"
+                            f"<body><pre>{html.escape(format_summary(summary))}</pre></body></html>").encode("utf-8")
+                    content_type = "text/html; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # 요청마다 콘솔에 로그를 남기지 않음
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError:
+            # 같은 호스트의 다른 작업자가 이미 포트를 쓰고 있으면 빈 포트 자동 선택
+            self.server = ThreadingHTTPServer((host, 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, name="status-server", daemon=True)
+        self.thread.start()
+        self.url = f"http://{host}:{self.server.server_address[1]}/"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,378 @@
+"""
+(농장, 날짜, 작업) 단위 작업 큐
+- SQLite 기반 로컬 큐 (기본값)
+- Redis 기반 큐 (여러 노드에서 공유, redis 패키지 필요)
+- lease / ack 방식: 작업자가 죽으면 lease가 만료되어 다른 작업자가 재시도
+"""
+
+import json
+import sqlite3
+import time
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+def make_job_key(item):
+    """작업 항목의 고유 키 (같은 작업이 두 번 발행되지 않도록 사용)"""
+    return f"{item['farm_id']}|{item['date']}|{item['task']}"
+
+
+class SQLiteWorkQueue:
+    """SQLite 파일을 사용하는 내구성 있는 작업 큐"""
+
+    def __init__(self, db_path, lease_seconds=600, max_attempts=3):
+        """
+        초기화
+
+        Args:
+            db_path (str): SQLite DB 파일 경로 (여러 작업자가 같은 파일을 공유)
+            lease_seconds (int): 작업 하나를 붙잡고 있을 수 있는 시간 (초)
+            max_attempts (int): 실패/만료 시 최대 시도 횟수
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        # 작업 스레드와 lease 연장(heartbeat) 스레드가 같은 연결을 공유
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id          INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_key     TEXT UNIQUE NOT NULL,
+                payload     TEXT NOT NULL,
+                status      TEXT NOT NULL DEFAULT 'pending',
+                attempts    INTEGER NOT NULL DEFAULT 0,
+                worker      TEXT,
+                lease_until REAL,
+                last_error  TEXT,
+                updated_at  REAL
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, lease_until)")
+
+    def publish(self, items):
+        """
+        작업 항목들을 큐에 등록 (이미 등록된 작업은 무시)
+
+        Args:
+            items (list): {'farm_id', 'date', 'task', ...} 딕셔너리 리스트
+
+        Returns:
+            int: 새로 등록된 작업 수
+        """
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (job_key, payload, updated_at) VALUES (?, ?, ?)",
+                    [(make_job_key(item), json.dumps(item), now) for item in items]
+                )
+                added = self.conn.total_changes - before
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return added
+
+    def requeue(self, items):
+        """
+        작업 항목을 다시 대기열에 올림 (이미 완료/실패한 작업도 시도 횟수를 초기화하여 재등록, 처리 중인 작업은 그대로)
+
+        Args:
+            items (list): {'farm_id', 'date', 'task', ...} 딕셔너리 리스트
+
+        Returns:
+            int: 대기열에 올린 작업 수
+        """
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    "INSERT INTO jobs (job_key, payload, updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT (job_key) DO UPDATE SET payload = excluded.payload, status = 'pending', attempts = 0, "
+                    "worker = NULL, lease_until = NULL, last_error = NULL, updated_at = excluded.updated_at "
+                    "WHERE jobs.status IN ('done', 'failed')",
+                    [(make_job_key(item), json.dumps(item), now) for item in items]
+                )
+                requeued = self.conn.total_changes - before
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+            return requeued
+
+    def lease(self, worker_id):
+        """
+        대기 중이거나 lease가 만료된 작업 하나를 가져옴
+
+        Args:
+            worker_id (str): 작업자 식별자 (예: 호스트명-PID)
+
+        Returns:
+            dict: 작업 항목 (job_id, attempt 포함), 가져올 작업이 없으면 None
+        """
+        with self.lock:
+            now = time.time()
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 재시도 횟수를 모두 소진한 채 lease가 만료된 작업은 실패 처리
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'failed', last_error = 'lease expired', updated_at = ? "
+                    "WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts)
+                )
+                row = self.conn.execute(
+                    "SELECT id, payload, attempts FROM jobs "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+
+                job_id, payload, attempts = row
+                self.conn.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = ?, worker = ?, lease_until = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    (attempts + 1, worker_id, now + self.lease_seconds, now, job_id)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            item = json.loads(payload)
+            item['job_id'] = job_id
+            item['attempt'] = attempts + 1
+            item['worker'] = worker_id
+            return item
+
+    def ack(self, item):
+        """
+        작업 완료 처리 (lease를 잡고 있는 작업자만 완료할 수 있음)
+
+        Returns:
+            bool: 완료 처리 성공 여부 (lease가 이미 다른 작업자에게 넘어갔으면 False)
+        """
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = 'done', lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND worker = ? AND attempts = ?",
+                (time.time(), item['job_id'], item['worker'], item['attempt'])
+            )
+            return cur.rowcount == 1
+
+    def fail(self, item, error=""):
+        """
+        작업 실패 처리 (남은 시도 횟수가 있으면 다시 대기열로, 없으면 failed)
+
+        Returns:
+            bool: 실패 처리 성공 여부
+        """
+        with self.lock:
+            status = 'failed' if item['attempt'] >= self.max_attempts else 'pending'
+            cur = self.conn.execute(
+                "UPDATE jobs SET status = ?, lease_until = NULL, last_error = ?, updated_at = ? "
+                "WHERE id = ? AND status = 'leased' AND worker = ? AND attempts = ?",
+                (status, str(error), time.time(), item['job_id'], item['worker'], item['attempt'])
+            )
+            return cur.rowcount == 1
+
+    def extend_lease(self, item):
+        """오래 걸리는 작업의 lease 연장"""
+        with self.lock:
+            cur = self.conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'leased' AND worker = ? AND attempts = ?",
+                (time.time() + self.lease_seconds, item['job_id'], item['worker'], item['attempt'])
+            )
+            return cur.rowcount == 1
+
+    def stats(self):
+        """상태별 작업 수 ({'pending': n, 'leased': n, 'done': n, 'failed': n})"""
+        with self.lock:
+            counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+            for status, count in self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status"):
+                counts[status] = count
+            return counts
+
+    def close(self):
+        self.conn.close()
+
+
+# KEYS: owners, leases, 대상(done/failed set 또는 pending list) / ARGV: job_key, "worker|attempt", 'sadd' 또는 'rpush'
+RELEASE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[1], ARGV[1])
+redis.call(ARGV[3], KEYS[3], ARGV[1])
+return 1
+"""
+
+# KEYS: owners, leases / ARGV: job_key, "worker|attempt", 새 만료 시각
+EXTEND_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+return 1
+"""
+
+# KEYS: leases, owners, attempts, failed, pending / ARGV: job_key, 현재 시각, 최대 시도 횟수
+RECLAIM_SCRIPT = """
+local expires = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if not expires or tonumber(expires) > tonumber(ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+if tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or 0) >= tonumber(ARGV[3]) then
+    redis.call('SADD', KEYS[4], ARGV[1])
+else
+    redis.call('RPUSH', KEYS[5], ARGV[1])
+end
+return 1
+"""
+
+
+class RedisWorkQueue:
+    """Redis를 사용하는 작업 큐 (여러 노드가 같은 Redis 서버를 공유)"""
+
+    def __init__(self, url, name="sentinel", lease_seconds=600, max_attempts=3):
+        """
+        초기화
+
+        Args:
+            url (str): Redis 접속 주소 (예: 'redis://host:6379/0')
+            name (str): 키 접두사 (여러 큐를 같은 서버에서 구분)
+            lease_seconds (int): 작업 하나를 붙잡고 있을 수 있는 시간 (초)
+            max_attempts (int): 실패/만료 시 최대 시도 횟수
+        """
+        if redis is None:
+            raise ImportError("RedisWorkQueue를 사용하려면 'pip install redis'가 필요합니다.")
+
+        self.client = redis.Redis.from_url(url)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+        self.key_payloads = f"{name}:payloads"  # hash: job_key -> payload(JSON)
+        self.key_pending = f"{name}:pending"    # list: 대기 중인 job_key
+        self.key_leases = f"{name}:leases"      # zset: job_key -> lease 만료 시각
+        self.key_owners = f"{name}:owners"      # hash: job_key -> "worker|attempt"
+        self.key_attempts = f"{name}:attempts"  # hash: job_key -> 시도 횟수
+        self.key_done = f"{name}:done"          # set
+        self.key_failed = f"{name}:failed"      # set
+
+        # lease 소유자 확인과 상태 변경을 한 번에 처리 (확인 후 다른 작업자가 끼어드는 경우 방지)
+        self._release = self.client.register_script(RELEASE_SCRIPT)
+        self._extend = self.client.register_script(EXTEND_SCRIPT)
+        self._reclaim = self.client.register_script(RECLAIM_SCRIPT)
+
+    def publish(self, items):
+        added = 0
+        for item in items:
+            job_key = make_job_key(item)
+            if self.client.hsetnx(self.key_payloads, job_key, json.dumps(item)):
+                self.client.rpush(self.key_pending, job_key)
+                added += 1
+        return added
+
+    def requeue(self, items):
+        requeued = 0
+        for item in items:
+            job_key = make_job_key(item)
+            known = self.client.hexists(self.key_payloads, job_key)
+            finished = (self.client.srem(self.key_done, job_key) + self.client.srem(self.key_failed, job_key)) > 0
+            if known and not finished:
+                continue  # 대기 중이거나 처리 중인 작업
+            self.client.hset(self.key_payloads, job_key, json.dumps(item))
+            self.client.hdel(self.key_attempts, job_key)
+            self.client.rpush(self.key_pending, job_key)
+            requeued += 1
+        return requeued
+
+    def _requeue_expired(self):
+        now = time.time()
+        keys = [self.key_leases, self.key_owners, self.key_attempts, self.key_failed, self.key_pending]
+        for raw_key in self.client.zrangebyscore(self.key_leases, 0, now):
+            # 만료 확인부터 재등록까지 한 번에 처리 (그 사이 연장/완료된 작업이나 동시 회수는 건너뜀)
+            self._reclaim(keys=keys, args=[raw_key, now, self.max_attempts])
+
+    def lease(self, worker_id):
+        self._requeue_expired()
+
+        raw_key = self.client.lpop(self.key_pending)
+        if raw_key is None:
+            return None
+
+        job_key = raw_key.decode()
+        attempt = self.client.hincrby(self.key_attempts, job_key, 1)
+        self.client.hset(self.key_owners, job_key, f"{worker_id}|{attempt}")
+        self.client.zadd(self.key_leases, {job_key: time.time() + self.lease_seconds})
+
+        item = json.loads(self.client.hget(self.key_payloads, job_key))
+        item['job_id'] = job_key
+        item['attempt'] = attempt
+        item['worker'] = worker_id
+        return item
+
+    def _owner(self, item):
+        return f"{item['worker']}|{item['attempt']}"
+
+    def ack(self, item):
+        keys = [self.key_owners, self.key_leases, self.key_done]
+        return self._release(keys=keys, args=[item['job_id'], self._owner(item), 'sadd']) == 1
+
+    def fail(self, item, error=""):
+        if item['attempt'] >= self.max_attempts:
+            keys, action = [self.key_owners, self.key_leases, self.key_failed], 'sadd'
+        else:
+            keys, action = [self.key_owners, self.key_leases, self.key_pending], 'rpush'
+        return self._release(keys=keys, args=[item['job_id'], self._owner(item), action]) == 1
+
+    def extend_lease(self, item):
+        keys = [self.key_owners, self.key_leases]
+        args = [item['job_id'], self._owner(item), time.time() + self.lease_seconds]
+        return self._extend(keys=keys, args=args) == 1
+
+    def stats(self):
+        return {
+            'pending': self.client.llen(self.key_pending),
+            'leased': self.client.zcard(self.key_leases),
+            'done': self.client.scard(self.key_done),
+            'failed': self.client.scard(self.key_failed),
+        }
+
+    def close(self):
+        self.client.close()
+
+
+def open_work_queue(url, **kwargs):
+    """
+    주소 형식에 따라 작업 큐 생성
+
+    Args:
+        url (str): 'sqlite:///경로.db' 또는 'redis://host:port/db'
+        **kwargs: lease_seconds, max_attempts 등 큐 옵션
+
+    Returns:
+        SQLiteWorkQueue 또는 RedisWorkQueue
+    """
+    if url.startswith("sqlite:///"):
+        return SQLiteWorkQueue(url[len("sqlite:///"):], **kwargs)
+    if url.startswith(("redis://", "rediss://")):
+        return RedisWorkQueue(url, **kwargs)
+    raise ValueError(f"지원하지 않는 큐 주소입니다: {url}")
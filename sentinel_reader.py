@@ -0,0 +1,306 @@
+"""
+샘플러 출력 GeoTIFF 리더
+- 다중 밴드 TIFF에서 밴드 이름(NDVI 등)으로 한 밴드만 선택
+- 요청한 창(window)과 겹치는 strip/tile만 읽고 해제 (비압축/Deflate/LZW)
+- GDAL 메타데이터의 scale/offset/NoData가 있으면 float32로 자동 복원
+- 비압축 파일은 메모리 맵(np.memmap)으로 열어 복사 없이 NumPy 뷰로 제공 (view, open_views)
+"""
+
+import zlib
+
+import numpy as np
+
+from sentinel_tiff import (
+    TAG_IMAGE_WIDTH,
+    TAG_IMAGE_LENGTH,
+    TAG_BITS_PER_SAMPLE,
+    TAG_COMPRESSION,
+    TAG_STRIP_OFFSETS,
+    TAG_SAMPLES_PER_PIXEL,
+    TAG_ROWS_PER_STRIP,
+    TAG_STRIP_BYTE_COUNTS,
+    TAG_PLANAR_CONFIG,
+    TAG_PREDICTOR,
+    TAG_TILE_WIDTH,
+    TAG_TILE_LENGTH,
+    TAG_TILE_OFFSETS,
+    TAG_TILE_BYTE_COUNTS,
+    TAG_SAMPLE_FORMAT,
+    TAG_GDAL_METADATA,
+    TAG_GDAL_NODATA,
+    parse_gdal_metadata,
+    read_byteorder,
+    read_tiff_tags,
+)
+
+COMPRESSION_NONE = 1
+COMPRESSION_LZW = 5
+COMPRESSION_DEFLATE = (8, 32946)
+
+# (SampleFormat, BitsPerSample) -> numpy 자료형
+SAMPLE_DTYPES = {
+    (1, 8): "u1", (1, 16): "u2", (1, 32): "u4",
+    (2, 8): "i1", (2, 16): "i2", (2, 32): "i4",
+    (3, 32): "f4", (3, 64): "f8",
+}
+
+
+def _lzw_decode(data):
+    """TIFF LZW 해제 (MSB 우선, early change)"""
+    clear_code, eoi_code = 256, 257
+    table = [bytes([i]) for i in range(256)] + [b"", b""]
+    out = bytearray()
+    bit_pos, code_len, prev = 0, 9, None
+    total_bits = len(data) * 8
+
+    while bit_pos + code_len <= total_bits:
+        byte_pos = bit_pos >> 3
+        chunk = int.from_bytes(data[byte_pos:byte_pos + 3].ljust(3, b"\x00"), "big")
+        code = (chunk >> (24 - (bit_pos & 7) - code_len)) & ((1 << code_len) - 1)
+        bit_pos += code_len
+
+        if code == clear_code:
+            table = table[:258]
+            code_len, prev = 9, None
+            continue
+        if code == eoi_code:
+            break
+
+        if prev is None:
+            entry = table[code]
+        else:
+            entry = table[code] if code < len(table) else prev + prev[:1]
+            table.append(prev + entry[:1])
+        out += entry
+        prev = entry
+
+        if len(table) >= (1 << code_len) - 1 and code_len < 12:
+            code_len += 1
+
+    return bytes(out)
+
+
+class GeoTiffReader:
+    """샘플러 출력 GeoTIFF 한 개를 밴드/창 단위로 읽는 리더"""
+
+    def __init__(self, path):
+        """
+        초기화 (태그만 읽고 픽셀 데이터는 읽지 않음)
+
+        Args:
+            path (str): {farm_id}_{date}_{identifier}.tif 경로
+        """
+        self.path = path
+        self.byteorder = read_byteorder(path)
+        tags = read_tiff_tags(path)
+
+        self.width = tags[TAG_IMAGE_WIDTH][0]
+        self.height = tags[TAG_IMAGE_LENGTH][0]
+        self.samples = tags.get(TAG_SAMPLES_PER_PIXEL, (1,))[0]
+        self.planar = tags.get(TAG_PLANAR_CONFIG, (1,))[0]
+        self.compression = tags.get(TAG_COMPRESSION, (COMPRESSION_NONE,))[0]
+        self.predictor = tags.get(TAG_PREDICTOR, (1,))[0]
+
+        bits = tags[TAG_BITS_PER_SAMPLE][0]
+        sample_format = tags.get(TAG_SAMPLE_FORMAT, (1,))[0]
+        if (sample_format, bits) not in SAMPLE_DTYPES:
+            raise ValueError(f"지원하지 않는 픽셀 형식입니다: SampleFormat={sample_format}, Bits={bits}")
+        self.dtype = np.dtype(self.byteorder + SAMPLE_DTYPES[(sample_format, bits)])
+
+        if TAG_TILE_WIDTH in tags:
+            self.block_width = tags[TAG_TILE_WIDTH][0]
+            self.block_height = tags[TAG_TILE_LENGTH][0]
+            self.offsets = tags[TAG_TILE_OFFSETS]
+            self.byte_counts = tags[TAG_TILE_BYTE_COUNTS]
+            self.tiled = True
+        else:
+            self.block_width = self.width
+            self.block_height = min(tags.get(TAG_ROWS_PER_STRIP, (self.height,))[0], self.height)
+            self.offsets = tags[TAG_STRIP_OFFSETS]
+            self.byte_counts = tags[TAG_STRIP_BYTE_COUNTS]
+            self.tiled = False
+
+        self.blocks_across = -(-self.width // self.block_width)
+        self.blocks_down = -(-self.height // self.block_height)
+
+        _, band_items = parse_gdal_metadata(tags.get(TAG_GDAL_METADATA))
+        self.band_names = [band_items.get(i, {}).get("description", str(i)) for i in range(self.samples)]
+        self.scales = [float(band_items.get(i, {}).get("scale", 1.0)) for i in range(self.samples)]
+        self.offsets_value = [float(band_items.get(i, {}).get("offset", 0.0)) for i in range(self.samples)]
+        nodata = tags.get(TAG_GDAL_NODATA)
+        self.nodata = float(nodata) if nodata not in (None, "") else None
+        self._image_map = None
+
+    def band_index(self, band):
+        """밴드 이름(예: 'NDVI') 또는 번호를 0부터 시작하는 번호로 변환"""
+        if isinstance(band, int):
+            return band
+        if band not in self.band_names:
+            raise KeyError(f"'{band}' 밴드가 없습니다. (사용 가능: {self.band_names})")
+        return self.band_names.index(band)
+
+    def _block_samples(self):
+        return 1 if self.planar == 2 else self.samples
+
+    def _block_rows(self, block_row):
+        # strip은 마지막 블록이 짧을 수 있고, tile은 항상 전체 크기(패딩 포함)
+        if self.tiled:
+            return self.block_height
+        return min(self.block_height, self.height - block_row * self.block_height)
+
+    def _decode_block(self, f, index, rows):
+        f.seek(self.offsets[index])
+        raw = f.read(self.byte_counts[index])
+
+        if self.compression in COMPRESSION_DEFLATE:
+            raw = zlib.decompress(raw)
+        elif self.compression == COMPRESSION_LZW:
+            raw = _lzw_decode(raw)
+        elif self.compression != COMPRESSION_NONE:
+            raise ValueError(f"지원하지 않는 압축 방식입니다: {self.compression}")
+
+        samples = self._block_samples()
+        count = rows * self.block_width * samples
+
+        if self.predictor == 3:
+            # 부동소수점 예측: 바이트 차분 복원 후 바이트 평면을 픽셀 순서로 재배열
+            # (차분 간격은 SamplesPerPixel이므로 밴드별로 누적)
+            item_size = self.dtype.itemsize
+            planes = np.frombuffer(raw, dtype=np.uint8, count=count * item_size)
+            planes = np.cumsum(planes.reshape(rows, self.block_width * item_size, samples), axis=1, dtype=np.uint8)
+            planes = planes.reshape(rows, item_size, self.block_width * samples).transpose(0, 2, 1)
+            block = np.ascontiguousarray(planes).view(self.dtype.newbyteorder(">")).reshape(rows, self.block_width, samples)
+            return block
+
+        block = np.frombuffer(raw, dtype=self.dtype, count=count).reshape(rows, self.block_width, samples)
+        if self.predictor == 2:
+            block = np.cumsum(block, axis=1, dtype=self.dtype)
+        return block
+
+    def read(self, band=0, window=None, decode=True):
+        """
+        밴드 하나를 읽기
+
+        Args:
+            band (int or str): 밴드 번호 또는 이름 (예: 'NDVI')
+            window (tuple, optional): (row_off, col_off, height, width), None이면 전체
+            decode (bool): scale/offset/NoData 메타데이터가 있으면 float32로 복원
+
+        Returns:
+            np.ndarray: (height, width) 배열
+        """
+        band = self.band_index(band)
+        row_off, col_off, height, width = window or (0, 0, self.height, self.width)
+        if row_off < 0 or col_off < 0 or row_off + height > self.height or col_off + width > self.width:
+            raise ValueError(f"창이 이미지 범위({self.height}x{self.width})를 벗어났습니다: {window}")
+
+        out = np.empty((height, width), dtype=self.dtype.newbyteorder("="))
+        blocks_per_plane = self.blocks_across * self.blocks_down
+        plane_offset = band * blocks_per_plane if self.planar == 2 else 0
+        sample = 0 if self.planar == 2 else band
+
+        with open(self.path, "rb") as f:
+            for block_row in range(row_off // self.block_height, (row_off + height - 1) // self.block_height + 1):
+                for block_col in range(col_off // self.block_width, (col_off + width - 1) // self.block_width + 1):
+                    index = plane_offset + block_row * self.blocks_across + block_col
+                    block = self._decode_block(f, index, self._block_rows(block_row))
+
+                    top = block_row * self.block_height
+                    left = block_col * self.block_width
+                    r0, r1 = max(row_off, top), min(row_off + height, top + self.block_height)
+                    c0, c1 = max(col_off, left), min(col_off + width, left + self.block_width)
+                    out[r0 - row_off:r1 - row_off, c0 - col_off:c1 - col_off] = \
+                        block[r0 - top:r1 - top, c0 - left:c1 - left, sample]
+
+        if not decode:
+            return out
+        return self._apply_scaling(out, band)
+
+    @property
+    def mappable(self):
+        """비압축이고 예측(predictor)이 없어 파일 바이트를 그대로 배열로 볼 수 있는지"""
+        return self.compression == COMPRESSION_NONE and self.predictor == 1
+
+    def _strips_contiguous(self):
+        # strip들이 파일 안에서 빈틈 없이 이어져 있으면 이미지 전체를 배열 하나로 매핑 가능
+        return all(self.offsets[i] + self.byte_counts[i] == self.offsets[i + 1] for i in range(len(self.offsets) - 1))
+
+    def _map_image(self):
+        if self._image_map is None:
+            shape = ((self.samples, self.height, self.width) if self.planar == 2
+                     else (self.height, self.width, self.samples))
+            self._image_map = np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offsets[0], shape=shape)
+        return self._image_map
+
+    def _map_tile(self, index):
+        rows, samples = self.block_height, self._block_samples()
+        return np.memmap(self.path, dtype=self.dtype, mode="r", offset=self.offsets[index],
+                         shape=(rows, self.block_width, samples))
+
+    def view(self, band=0, window=None):
+        """
+        밴드 하나를 복사 없이 메모리 맵 뷰로 반환 (scale/offset 복원 없음, 원본 자료형 그대로)
+        - 비압축 strip 파일: 항상 뷰
+        - 비압축 tile 파일: 창이 tile 하나 안에 있으면 뷰, 여러 tile에 걸치면 그 창만 읽은 배열
+        - 압축 파일: 창과 겹치는 strip/tile만 해제한 배열 (read(decode=False)와 동일)
+
+        Args:
+            band (int or str): 밴드 번호 또는 이름
+            window (tuple, optional): (row_off, col_off, height, width), None이면 전체
+
+        Returns:
+            np.ndarray: (height, width) 배열 (INT16 지수는 sentinel_encoding.decode_index로 복원)
+        """
+        band = self.band_index(band)
+        row_off, col_off, height, width = window or (0, 0, self.height, self.width)
+        if not self.mappable:
+            return self.read(band, window, decode=False)
+
+        if not self.tiled and self._strips_contiguous():
+            image = self._map_image()
+            if self.planar == 2:
+                return image[band, row_off:row_off + height, col_off:col_off + width]
+            return image[row_off:row_off + height, col_off:col_off + width, band]
+
+        block_row, block_col = row_off // self.block_height, col_off // self.block_width
+        if (self.tiled and (row_off + height - 1) // self.block_height == block_row
+                and (col_off + width - 1) // self.block_width == block_col):
+            blocks_per_plane = self.blocks_across * self.blocks_down
+            plane_offset = band * blocks_per_plane if self.planar == 2 else 0
+            tile = self._map_tile(plane_offset + block_row * self.blocks_across + block_col)
+            top, left = block_row * self.block_height, block_col * self.block_width
+            sample = 0 if self.planar == 2 else band
+            return tile[row_off - top:row_off - top + height, col_off - left:col_off - left + width, sample]
+
+        return self.read(band, window, decode=False)
+
+    def _apply_scaling(self, array, band):
+        scale, offset = self.scales[band], self.offsets_value[band]
+        if scale == 1.0 and offset == 0.0 and self.nodata is None:
+            return array
+
+        decoded = array.astype(np.float32) * np.float32(scale) + np.float32(offset)
+        if self.nodata is not None:
+            decoded[array == self.nodata] = np.nan
+        return decoded
+
+
+def read_band(path, band, window=None):
+    """
+    파일 하나에서 밴드 하나만 읽는 단축 함수
+
+    Examples:
+        >>> ndvi = read_band("farm_20260105_VIs.tif", "NDVI", window=(0, 0, 64, 64))
+    """
+    return GeoTiffReader(path).read(band, window)
+
+
+def open_views(paths, band=0, window=None):
+    """
+    여러 날짜 파일의 같은 밴드/창을 메모리 맵 뷰 리스트로 열기 (실제 읽기는 뷰를 사용할 때 필요한 페이지만)
+
+    Examples:
+        >>> views = open_views(sorted(glob.glob("out/*/farm_*_NDVI.tif")), window=(0, 0, 64, 64))
+        >>> series = np.stack([v[10, 20] for v in views])  # 한 픽셀의 시계열
+    """
+    return [GeoTiffReader(path).view(band, window) for path in paths]
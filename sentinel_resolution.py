@@ -0,0 +1,105 @@
+"""
+AOI 크기별 출력 해상도/분할 정책
+- 작업마다 선호 해상도와 허용 최저 해상도(가장 거친 값)를 두고, 요청당 픽셀 예산을 넘으면 한 단계씩 거칠게 선택
+- 가장 거친 해상도에서도 Process API 한 변 제한(2500픽셀)을 넘으면 그때만 격자로 분할
+- 작은 농장은 선호 해상도 그대로, 큰 농장은 수백 개 요청으로 쪼개는 대신 거친 해상도 1건으로 처리
+"""
+
+import math
+
+import shapely
+
+# Process API 요청 한 변의 최대 픽셀 수
+MAX_REQUEST_SIDE = 2500
+
+# 선택 가능한 해상도 단계 (미터, Sentinel-2 밴드 해상도와 그 배수)
+RESOLUTION_LEVELS = (5, 10, 20, 30, 60, 120, 240)
+
+# 출력 자료형별 픽셀 크기 (바이트)
+SAMPLE_BYTES = {"UINT8": 1, "UINT16": 2, "INT16": 2, "FLOAT32": 4}
+
+
+def _dimensions(bbox, resolution):
+    min_x, min_y, max_x, max_y = bbox
+    return (max(1, int(round((max_x - min_x) / resolution))),
+            max(1, int(round((max_y - min_y) / resolution))))
+
+
+def choose_resolution(bbox, preferred, coarsest, max_pixels, max_side=MAX_REQUEST_SIDE):
+    """
+    AOI 범위에 맞는 출력 해상도 선택
+
+    Args:
+        bbox (list): [min_x, min_y, max_x, max_y] (UTM 미터 좌표)
+        preferred (float): 선호 해상도 (미터, 예산 안이면 그대로 사용)
+        coarsest (float): 허용하는 가장 거친 해상도 (미터)
+        max_pixels (int): 요청 하나의 픽셀 예산 (width x height)
+        max_side (int): 요청 한 변의 최대 픽셀 수
+
+    Returns:
+        dict: resolution, size(width, height), tiles(열, 행) - tiles가 (1, 1)이 아니면 분할 필요
+    """
+    candidates = [preferred] + [level for level in RESOLUTION_LEVELS if preferred < level <= coarsest]
+    for resolution in candidates:
+        width, height = _dimensions(bbox, resolution)
+        if width * height <= max_pixels and max(width, height) <= max_side:
+            return {"resolution": resolution, "size": (width, height), "tiles": (1, 1)}
+
+    # 가장 거친 해상도에서도 초과: 타일 하나가 예산/한 변 제한 안에 들어오도록 격자 분할
+    resolution = candidates[-1]
+    width, height = _dimensions(bbox, resolution)
+    side = min(max_side, int(math.sqrt(max_pixels)))
+    tiles = (math.ceil(width / side), math.ceil(height / side))
+    return {"resolution": resolution, "size": (math.ceil(width / tiles[0]), math.ceil(height / tiles[1])),
+            "tiles": tiles}
+
+
+def estimate_processing_units(size, bands, sample_bytes=4):
+    """
+    요청 하나의 대략적인 PU (512x512 픽셀, 3밴드 = 1 PU, FLOAT32는 2배, 최소 0.01)
+
+    Args:
+        size (tuple): (width, height)
+        bands (int): 입력 밴드 수 (dataMask 제외)
+        sample_bytes (int): 출력 픽셀 자료형 크기 (UINT8=1, INT16=2, FLOAT32=4)
+    """
+    units = (size[0] * size[1]) / (512 * 512) * (bands / 3.0)
+    if sample_bytes >= 4:
+        units *= 2
+    return max(0.01, units)
+
+
+def split_aoi(aoi, tiles):
+    """
+    AOI를 (열, 행) 격자로 분할 (폴리곤과 겹치지 않는 칸은 제외)
+
+    Args:
+        aoi (dict): {'farm_id', 'bbox', 'epsg', 'geometry'} (sentinel_aoi.normalize_aois 결과)
+        tiles (tuple): (열 수, 행 수)
+
+    Returns:
+        list: 칸별 AOI 딕셔너리 리스트 (farm_id = {farm_id}-r{행}c{열}, 행 0이 북쪽)
+    """
+    cols, rows = tiles
+    if (cols, rows) == (1, 1):
+        return [aoi]
+
+    min_x, min_y, max_x, max_y = aoi['bbox']
+    step_x = (max_x - min_x) / cols
+    step_y = (max_y - min_y) / rows
+
+    parts = []
+    for row in range(rows):
+        for col in range(cols):
+            cell = shapely.box(min_x + col * step_x, max_y - (row + 1) * step_y,
+                               min_x + (col + 1) * step_x, max_y - row * step_y)
+            geometry = shapely.intersection(aoi['geometry'], cell)
+            if geometry.is_empty:
+                continue
+            parts.append({
+                **aoi,
+                "farm_id": f"{aoi['farm_id']}-r{row}c{col}",
+                "bbox": list(cell.bounds),
+                "geometry": geometry,
+            })
+    return parts
@@ -1,19 +1,47 @@
 import os
+import re
+import time
+import socket
 import tarfile
 import datetime
+import threading
 import urllib3
 import requests
-import geopandas as gpd
+import shapely.wkt
 from sentinelhub import (
     SHConfig,
     SentinelHubRequest,
     SentinelHubCatalog,
-    DataCollection,
+    SentinelHubDownloadClient,
     MimeType,
     CRS,
     BBox,
-    bbox_to_dimensions,
 )
+from sentinelhub.decoding import decode_data
+from sentinelhub.io_utils import read_data
+from sentinel_aoi import load_aois as normalize_aois_file
+from sentinel_queue import open_work_queue
+from sentinel_cache import ResponseCache
+from sentinel_zonal import ZonalStatsWriter, polygon_mask, zonal_statistics
+from sentinel_encoding import INT16_NODATA, decode_index, tag_index_bands
+from sentinel_pipeline import BackgroundWriter, BoundedPipeline, prefetch
+from sentinel_watermark import WatermarkStore, incremental_interval
+from sentinel_products import ProductIndex, scan_products
+from sentinel_composite import build_composites
+from sentinel_evalscripts import (
+    RGB_BANDS, build_index_evalscript, build_rgb_evalscript, build_sar_evalscript, required_bands
+)
+from sentinel_collections import (
+    DEFAULT_COLLECTION, data_collection, get_collection, prefixed, supported_indices, watermark_key
+)
+from sentinel_clip import clip_savings, request_geometry, write_clip_report
+from sentinel_coverage import check_coverage, write_coverage_report
+from sentinel_integrity import OK, ProductManifest, find_partials, requeue_items, verify_products
+from sentinel_plan import evalscript_hash, make_job, order_jobs, read_plan, split_jobs, write_plan
+from sentinel_points import group_points, load_points, sample_points, write_point_rows
+from sentinel_progress import RunState, StatusServer, format_summary
+from sentinel_resolution import SAMPLE_BYTES, choose_resolution, estimate_processing_units, split_aoi
+from sentinel_statistics import build_statistics_request, download_statistics, statistics_rows
 
 # =======================================================================
 # [보안 우회 설정] 사내 보안 프로그램으로 인한 SSL 인증 에러 강제 무시
@@ -43,38 +71,197 @@ START_DATE = "2026-01-01"
 END_DATE = "2026-03-31"
 MAX_CC_PERCENT = 10.0
 
+# 수집할 위성 컬렉션 (한 번의 실행에서 같은 계획/다운로드 엔진으로 함께 처리)
+#  - "S2L2A" (Sentinel-2 L2A), "S1IW" (Sentinel-1 SAR, 구름 필터 없음), "L8L2" (Landsat 8/9 L2), "HLS"
+#  - 구름 많은 시기의 공백을 SAR/Landsat으로 채울 때 예: ["S2L2A", "S1IW", "L8L2"]
+#  - Sentinel-2 외 컬렉션의 작업/파일 이름에는 접두사가 붙음 (예: {farm_id}_{date}_L8_NDVI.tif, S1_SAR)
+COLLECTIONS = ["S2L2A"]
+
 # 하이브리드 다운로드를 위해 대상을 두 그룹으로 분리합니다.
 RGB_INDEX = ["RGB"]
 VI_INDICES = ["NDVI", "NDMI", "GNDVI", "OSAVI", "NDRE", "LCI"]
 
+# 해상도 정책: 작업별 선호 해상도(미터)로 요청하되, 픽셀 수가 MAX_PIXELS_PER_REQUEST를 넘으면
+# 한 단계씩 거칠게(최대 coarsest까지) 선택. 그래도 넘으면 AOI를 격자로 분할 ({farm_id}-r{행}c{열})
+RESOLUTION_POLICY = {
+    "RGB": {"preferred": 5, "coarsest": 20},
+    "VIs": {"preferred": 10, "coarsest": 60},
+}
+MAX_PIXELS_PER_REQUEST = 2000 * 2000
+
+# 필지 레이어: True면 AOI 파일 안의 피처 하나하나를 별도 농장으로 처리 ({파일명}_{AOI_ID_COLUMN 값})
+AOI_SPLIT_FEATURES = False
+AOI_ID_COLUMN = None  # None이면 피처 순번 사용
+
+# UTM 존 경계/적도에 걸친 농장을 존별 조각({farm_id}-z{존}{N|S})으로 나눠 각자 자기 존 좌표계로 요청
+AOI_SPLIT_ZONES = True
+
+# 폴리곤 요청: bbox 사각형 대신 농장 폴리곤을 함께 보내 밭 바깥 픽셀은 서버에서 NoData로 처리
+# (꼭짓점이 CLIP_MAX_VERTICES를 넘으면 폴리곤을 감싸도록 단순화)
+CLIP_TO_GEOMETRY = True
+CLIP_MAX_VERTICES = 500
+CLIP_REPORT_PATH = os.path.join(OUTPUT_FOLDER, 'clip_savings.csv')  # None이면 절감 추정치 보고 안 함
+
+# 실행 모드: "local"   = 한 호스트에서 계획 + 다운로드
+#           "publish" = 작업 계획만 수행하여 큐에 등록
+#           "worker"  = 큐에서 작업을 가져와 다운로드 (여러 노드에서 동시 실행)
+#           "statistics" = 래스터 없이 Statistical API로 농장별 일별 지수 통계만 수집
+#           "pipeline" = 계획/다운로드/디코딩/저장을 메모리 상한이 있는 단계별 파이프라인으로 실행
+#           "diagnostics" = 모든 농장/후보 날짜의 촬영 범위(dataMask 비율)만 진단하여 표로 저장
+#           "plan"    = 전체 작업 계획만 PLAN_PATH에 저장 (다운로드 없음, dry-run)
+#           "execute" = PLAN_PATH의 계획을 파이프라인으로 실행 (PLAN_ORDER 순서, PLAN_PARTS개 중 PLAN_PART번째 몫)
+#           "points"  = POINTS_FOLDER_PATH의 표본 지점별 날짜별 지수 값만 추출 (래스터 다운로드 없음)
+#           "verify"  = 출력 폴더의 제품을 병렬 검사하고 손상/누락 제품만 QUEUE_URL에 재등록 (이후 "worker"로 다시 받음)
+RUN_MODE = "local"
+QUEUE_URL = "sqlite:///sentinel_jobs.db"  # 여러 노드 공유 시 "redis://host:6379/0"
+QUEUE_LEASE_SECONDS = 600                 # 작업자가 죽으면 이 시간 뒤 다른 작업자가 재시도
+QUEUE_POLL_SECONDS = 30
+PLAN_PATH = os.path.join(OUTPUT_FOLDER, 'plan.json')  # .parquet도 가능 (pyarrow 필요)
+PLAN_ORDER = "largest_first"  # "plan", "largest_first", "date", "farm"
+PLAN_PARTS = 1                # 여러 호스트로 나눌 때 전체 몫 수
+PLAN_PART = 0                 # 이 호스트가 실행할 몫 번호 (0부터)
+
+# 표본 지점 시계열: 점 레이어(.zip/.geojson/.shp) 파일별로 지점마다 픽셀 하나의 값을 Statistical API로 추출
+POINTS_FOLDER_PATH = 'points'
+POINT_ID_COLUMN = None  # None이면 {파일명}_{순번}
+POINTS_OUTPUT_PATH = os.path.join(OUTPUT_FOLDER, 'point_timeseries.csv')
+
+# 촬영 범위 사전 진단: 저해상도 dataMask 미리보기로 농장 폴리곤 안의 유효 픽셀 비율 계산
+# MIN_COVERAGE > 0이면 계획 단계에서 비율이 이보다 낮은 날짜(촬영 경로 가장자리)를 다운로드 전에 제외
+MIN_COVERAGE = 0.0
+COVERAGE_REPORT_PATH = os.path.join(OUTPUT_FOLDER, 'coverage.csv')
+COVERAGE_RESOLUTION = 60   # 미리보기 해상도 (미터)
+COVERAGE_MAX_THREADS = 10  # 동시 미리보기 요청 수
+
+# 증분 실행: 농장별 마지막 처리 촬영 시각(워터마크) 이후의 장면만 조회 (START_DATE ~ 오늘)
+# 워터마크가 없는 농장은 START_DATE부터 처리
+INCREMENTAL = False
+WATERMARK_PATH = 'sentinel_watermarks.json'
+
+# 산출물 공간 인덱스: 저장한 파일마다 범위/날짜/지수/구름 비율/경로를 SQLite R-tree에 기록
+USE_PRODUCT_INDEX = True
+PRODUCT_INDEX_PATH = os.path.join(OUTPUT_FOLDER, 'products.sqlite')
+
+# 무결성 매니페스트: 제품 저장 직후 크기/SHA-256/다시 받기 위한 작업 정보를 기록
+# "verify" 모드는 TIFF 헤더/블록 범위/픽셀 해제를 검사하고 제품별 유효 픽셀 비율을 매니페스트에 기록
+RECORD_MANIFEST = True
+MANIFEST_PATH = os.path.join(OUTPUT_FOLDER, 'manifest.sqlite')
+RECORD_CHECKSUMS = True     # 저장 시 SHA-256 계산
+VERIFY_CHECKSUMS = False    # "verify" 모드에서 SHA-256까지 비교 (파일 전체를 한 번 더 읽음)
+VERIFY_WORKERS = 8          # "verify" 모드 동시 검사 수
+VERIFY_REMOVE_BAD = True    # 손상 제품과 중간에 끊긴 .tar/응답 TIFF를 삭제 (인덱스에서도 제거, 다운로드 중이 아닐 때 실행)
+
+# 진행 상태: (농장, 날짜, 작업)별 상태/바이트/소요 시간을 SQLite에 기록하고 (재시작 후에도 유지)
+# STATUS_PORT가 있으면 http://127.0.0.1:{STATUS_PORT}/ 에서 처리량/ETA/작업자/오류율 실시간 확인 (/status는 JSON)
+# (같은 호스트에서 작업자를 여러 개 띄워 포트가 이미 사용 중이면 빈 포트를 자동 선택하고 실제 주소를 출력)
+TRACK_PROGRESS = True
+RUN_STATE_PATH = os.path.join(OUTPUT_FOLDER, 'run_state.sqlite')
+STATUS_PORT = 8765  # 0이면 항상 빈 포트 자동 선택, None이면 HTTP 상태 서버 사용 안 함
+
+# 응답 캐시: 같은 evalscript/bbox/크기/날짜/처리옵션 요청은 다시 다운로드하지 않음
+USE_RESPONSE_CACHE = True
+CACHE_FOLDER = 'sentinel_cache'
+CACHE_MAX_GB = 20.0
+
+# 구역 통계: VI 배열이 도착할 때마다 AOI 폴리곤 안의 평균/중앙값/백분위수를 표로 누적
+ZONAL_STATS = False
+ZONAL_STATS_PATH = os.path.join(OUTPUT_FOLDER, 'zonal_stats.csv')  # .csv (이어쓰기) 또는 .parquet (실행별 part 파일을 모은 폴더, pyarrow 필요)
+WRITE_VI_TIFFS = True                 # False면 VI는 통계만 계산하고 TIFF는 저장하지 않음
+# VI 인코딩: "FLOAT32" 또는 "INT16" (값 x 10000, NoData -32768, scale/offset은 TIFF 메타데이터에 기록)
+VI_ENCODING = "FLOAT32"
+# VI 출력 형식: "separate" = 지수별 TIFF 6개 (tar로 수신 후 분리)
+#              "stack"    = 6밴드 TIFF 1개 ({farm_id}_{date}_VIs.tif, 밴드 설명 = 지수 이름)
+VI_OUTPUT = "separate"
+# RGB 픽셀 자료형: "UINT8" (0~255 밝기 보정), "UINT16" (반사율 x 10000), "FLOAT32" (반사율 그대로)
+RGB_SAMPLE_TYPE = "UINT8"
+# 보간법 ("BILINEAR", "BICUBIC", "NEAREST"): RGB는 선호 해상도(5m)로 부드럽게, VI는 원본 반사율 보존
+# (조합별 응답 크기/디코딩 시간/PU 비교는 sentinel_benchmark.py)
+RGB_INTERPOLATION = "BILINEAR"
+VI_INTERPOLATION = "NEAREST"
+PIPELINE_FETCH_WORKERS = 4  # "pipeline" 모드: 동시 다운로드 수
+PIPELINE_QUEUE_SIZE = 4     # "pipeline" 모드: 단계 사이 대기 응답 수 상한 (메모리 상한)
+PREFETCH_FARMS = 1          # 현재 농장을 받는 동안 미리 AOI 로드/카탈로그 검색을 끝내 둘 농장 수 (0이면 순차)
+WRITE_BACKLOG = 4           # "local" 모드: 저장/tar 해제를 기다리는 응답 수 상한 (그동안 다음 다운로드 진행)
+STATS_BATCH_SIZE = 50                 # "statistics" 모드: 한 번에 요청할 농장 수
+STATS_MAX_THREADS = 5                 # "statistics" 모드: 동시 요청 수
+
+# 기간별 합성: 수집이 끝난 뒤 날짜별 지수 TIFF를 기간별로 합성 (None이면 합성 안 함)
+# - COMPOSITE_PERIOD: "month" (YYYY-MM) 또는 "year"
+# - COMPOSITE_METHOD: "median", "mean", "max", "max_ndvi" (픽셀별 NDVI 최대 날짜 값)
+COMPOSITE_PERIOD = None
+COMPOSITE_METHOD = "median"
+COMPOSITE_INDICES = ["NDVI"]
+COMPOSITE_FOLDER = os.path.join(OUTPUT_FOLDER, 'composites')
+COMPOSITE_CHUNK_ROWS = 256            # 한 번에 읽는 행 수 (메모리 = 날짜 수 x 행 수 x 열 수)
+
 
 # =============================================================================
 # [2] 파일 불러오기 및 위성 원본 좌표계(UTM) 자동 계산/변환 함수
 # =============================================================================
-def get_bbox_from_file(file_path):
+def load_aois(file_path):
     print(f"   📂 공간 데이터 로드 중: {os.path.basename(file_path)}")
 
-    if file_path.lower().endswith('.zip'):
-        read_path = f"zip://{file_path}"
-    else:
-        read_path = file_path
+    # 모든 지오메트리의 UTM 존(남반구 포함)을 한 번에 계산하고, 존별로 한 번씩만 변환
+    # (여러 존/반구에 걸친 농장은 존별 조각으로 나눔)
+    aois = normalize_aois_file(file_path, id_column=AOI_ID_COLUMN, dissolve=not AOI_SPLIT_FEATURES,
+                               split_zones=AOI_SPLIT_ZONES)
+    zone_parts = [aoi['farm_id'] for aoi in aois if re.search(r"-z\d+[NS]$", aoi['farm_id'])]
+    if zone_parts:
+        print(f"   🌐 UTM 존/적도 경계에 걸친 농장을 존별로 분할: {', '.join(zone_parts)}")
+
+    for epsg_str in sorted({aoi['epsg'] for aoi in aois}):
+        print(f"   🔄 위성 원본 좌표계(EPSG:{epsg_str})로 변환 완료")
 
-    gdf = gpd.read_file(read_path)
-    gdf_wgs = gdf.to_crs(epsg=4326)
+    # 가장 거친 허용 해상도에서도 요청 한도를 넘는 AOI만 격자로 분할
+    split = []
+    for aoi in aois:
+        tiles = max((choose_resolution(aoi['bbox'], policy['preferred'], policy['coarsest'],
+                                       MAX_PIXELS_PER_REQUEST)['tiles'] for policy in resolution_policies()),
+                    key=lambda t: t[0] * t[1])
+        parts = split_aoi(aoi, tiles)
+        if len(parts) > 1:
+            print(f"   🧱 {aoi['farm_id']}: 요청 한도 초과로 {tiles[0]}x{tiles[1]} 격자 분할 ({len(parts)}개)")
+        split.extend(parts)
 
-    min_lon, min_lat, max_lon, max_lat = gdf_wgs.total_bounds
-    center_lon = (min_lon + max_lon) / 2.0
+    if clip_reported is not None:
+        report_clip_savings(split)
+    return split
 
-    utm_zone = int((center_lon + 180) / 6) + 1
-    epsg_code = 32600 + utm_zone
-    epsg_str = str(epsg_code)
 
-    print(f"   🔄 위성 원본 좌표계(EPSG:{epsg_str})로 변환 중...")
+def resolution_policies():
+    """수집하는 모든 컬렉션/작업의 해상도 정책"""
+    policies = list(RESOLUTION_POLICY.values())
+    for collection in COLLECTIONS:
+        if get_collection(collection)['resolution'] is not None:
+            policies.append(get_collection(collection)['resolution'])
+    return policies
 
-    gdf_utm = gdf.to_crs(epsg=epsg_code)
-    bounds = gdf_utm.total_bounds
 
-    return bounds.tolist(), epsg_str
+def report_clip_savings(aois):
+    """농장/작업별 폴리곤 요청의 PU/바이트 절감 추정치를 CLIP_REPORT_PATH에 기록 (실행마다 농장당 한 번)"""
+    with clip_report_lock:
+        aois = [aoi for aoi in aois if aoi['farm_id'] not in clip_reported]
+        clip_reported.update(aoi['farm_id'] for aoi in aois)
+    rows = [clip_savings(aoi['farm_id'], aoi['geometry'], task, CLIP_MAX_VERTICES)
+            for aoi in aois for collection in COLLECTIONS for task in build_download_tasks(aoi['bbox'], collection)]
+    with clip_report_lock:
+        write_clip_report(rows, CLIP_REPORT_PATH)
+    for aoi in aois:
+        farm_rows = [row for row in rows if row['farm_id'] == aoi['farm_id']]
+        print(f"   ✂️ {aoi['farm_id']}: 폴리곤 요청으로 밭 밖 {1 - farm_rows[0]['field_ratio']:.0%} 제외 "
+              f"(약 {sum(row['pu_saved'] for row in farm_rows):.2f} PU, "
+              f"{sum(row['bytes_saved'] for row in farm_rows) / 1024 ** 2:.1f} MB 절감/날짜)")
+
+
+def load_aoi(file_path):
+    # 기존 단일 bbox 인터페이스: 존 분할 없이 중심 기준 UTM 존 하나로 변환
+    aoi = normalize_aois_file(file_path, split_zones=False)[0]
+    return aoi['bbox'], aoi['epsg'], aoi['geometry']
+
+
+def get_bbox_from_file(file_path):
+    raw_bbox, epsg_str, _ = load_aoi(file_path)
+    return raw_bbox, epsg_str
 
 
 # =============================================================================
@@ -84,213 +271,1083 @@ config = SHConfig()
 config.sh_client_id = CLIENT_ID
 config.sh_client_secret = CLIENT_SECRET
 
-if not os.path.exists(OUTPUT_FOLDER): os.makedirs(OUTPUT_FOLDER)
-if not os.path.exists(AOI_FOLDER_PATH): os.makedirs(AOI_FOLDER_PATH)
+zonal_writer = None   # main()에서 ZONAL_STATS 설정 시 생성
+product_index = None  # main()에서 USE_PRODUCT_INDEX 설정 시 생성
+run_state = None      # main()에서 TRACK_PROGRESS 설정 시 생성
+manifest = None       # main()에서 RECORD_MANIFEST 설정 시 생성
+clip_reported = None  # main()에서 Process API 요청을 만드는 모드일 때 생성 (이번 실행에서 절감 추정치를 기록한 농장)
+clip_report_lock = threading.Lock()
+WORKER_ID = f"{socket.gethostname()}-{os.getpid()}"  # 큐 lease/진행 상태에 기록하는 작업자(호스트-프로세스) 이름
+download_client = SentinelHubDownloadClient(config=config)
+watermarks = WatermarkStore(WATERMARK_PATH) if INCREMENTAL else None
+response_cache = ResponseCache(CACHE_FOLDER, max_bytes=int(CACHE_MAX_GB * 1024 ** 3)) if USE_RESPONSE_CACHE else None
 
 # =============================================================================
 # [4] Evalscripts (RGB용과 생육 지수용 분리)
 # =============================================================================
-EVALSCRIPT_RGB = """
-function setup() {
-  return {
-    input: ["B02", "B03", "B04", "dataMask"],
-    output: [{ id: "RGB", bands: 3, sampleType: "UINT8" }],
-    mosaicking: "ORBIT"
-  };
-}
-function evaluatePixel(samples) {
-  if (samples.length === 0) return { RGB: [0,0,0] };
-  var sample = samples[0];
-  if (!sample.dataMask || sample.dataMask === 0) return { RGB: [0,0,0] };
+# 지수 정의는 sentinel_evalscripts에서 한 번만 선언하고, 필요한 밴드만 요청하는 evalscript를 생성
+#  - VI_ENCODING: "FLOAT32" 또는 "INT16" (지수 x 10000, NoData -32768)
+#  - VI_OUTPUT == "stack"이면 VI_INDICES를 밴드로 쌓은 TIFF 1개 (tar 압축 없음)
+EVALSCRIPT_RGB = build_rgb_evalscript(RGB_SAMPLE_TYPE)
+EVALSCRIPT_VIS = build_index_evalscript(VI_INDICES)
 
-  var r = Math.max(0, Math.min(255, Math.round(sample.B04 * 2.5 * 255)));
-  var g = Math.max(0, Math.min(255, Math.round(sample.B03 * 2.5 * 255)));
-  var b = Math.max(0, Math.min(255, Math.round(sample.B02 * 2.5 * 255)));
 
-  return { RGB: [r, g, b] };
-}
-"""
-
-EVALSCRIPT_VIS = """
-function setup() {
-  return {
-    input: ["B03", "B04", "B05", "B08", "B11", "dataMask"],
-    output: [
-      { id: "NDVI",  bands: 1, sampleType: "FLOAT32" },
-      { id: "NDMI",  bands: 1, sampleType: "FLOAT32" },
-      { id: "GNDVI", bands: 1, sampleType: "FLOAT32" },
-      { id: "OSAVI", bands: 1, sampleType: "FLOAT32" },
-      { id: "NDRE",  bands: 1, sampleType: "FLOAT32" },
-      { id: "LCI",   bands: 1, sampleType: "FLOAT32" }
-    ],
-    mosaicking: "ORBIT"
-  };
-}
-function evaluatePixel(samples) {
-  if (samples.length === 0) return createZero();
-  var sample = samples[0];
-  if (!sample.dataMask || sample.dataMask === 0) return createZero();
-
-  var b03 = sample.B03 || 0, b04 = sample.B04 || 0;
-  var b05 = sample.B05 || 0, b08 = sample.B08 || 0, b11 = sample.B11 || 0;
-
-  var val_ndvi = calcIndex(b08, b04);
-  var val_ndmi = calcIndex(b08, b11);
-  var val_gndvi = calcIndex(b08, b03);
-  var val_ndre = calcIndex(b08, b05);
-  var val_lci = calcIndex(b08, b04, b05); 
-  var osavi_denom = b08 + b04 + 0.16;
-  var val_osavi = (osavi_denom === 0) ? 0 : (1.16 * (b08 - b04)) / osavi_denom;
-
-  return {
-    NDVI: [val_ndvi], NDMI: [val_ndmi], GNDVI: [val_gndvi], 
-    OSAVI: [val_osavi], NDRE: [val_ndre], LCI: [val_lci]
-  };
-}
-function calcIndex(nir, other, other2) {
-    if (other2 !== undefined) return (nir + other === 0) ? 0 : (nir - other2) / (nir + other);
-    return (nir + other === 0) ? 0 : (nir - other) / (nir + other);
-}
-function createZero() {
-    return { NDVI: [0], NDMI: [0], GNDVI: [0], OSAVI: [0], NDRE: [0], LCI: [0] };
-}
-"""
+# =============================================================================
+# [5] 작업 계획 (AOI 로드 → 카탈로그 검색 → 작업 항목 생성)
+# =============================================================================
+def collection_config(collection):
+    """컬렉션을 제공하는 배포(service_url)로 요청하는 설정 (Landsat/HLS는 services-uswest2에만 있음)"""
+    service_url = data_collection(collection).service_url
+    if not service_url or service_url == config.sh_base_url:
+        return config
+    collection_cfg = config.copy()
+    collection_cfg.sh_base_url = service_url
+    return collection_cfg
+
+
+def search_valid_dates(farm_bbox, since=None, collection=DEFAULT_COLLECTION):
+    """카탈로그에서 조건에 맞는 촬영 날짜 검색 (구름 필터는 광학 컬렉션에만 적용, SAR는 모든 장면)"""
+    spec = get_collection(collection)
+    if watermarks is not None:
+        # 증분 실행: 워터마크 직후부터 오늘까지
+        time_interval = incremental_interval(since, START_DATE)
+    else:
+        time_interval = (START_DATE, END_DATE)
+
+    catalog = SentinelHubCatalog(config=collection_config(collection))
+    fields = ["id", "properties.datetime"] + (["properties.eo:cloud_cover"] if spec['cloud_filter'] else [])
+    search_iterator = catalog.search(
+        collection=data_collection(collection),
+        time=time_interval,
+        bbox=farm_bbox,
+        fields={"include": fields, "exclude": []}
+    )
+
+    valid_dates = []
+    for feature in search_iterator:
+        obs_date_str = feature["properties"]["datetime"]
+        cloud_cover = feature["properties"].get("eo:cloud_cover") if spec['cloud_filter'] else None
+        if cloud_cover is None or cloud_cover <= MAX_CC_PERCENT:
+            dt_obj = datetime.datetime.fromisoformat(obs_date_str.replace('Z', '+00:00'))
+            if since and dt_obj <= since:
+                continue
+            date_str = dt_obj.strftime("%Y-%m-%d")
+            same_date = [d for d in valid_dates if d['date'] == date_str]
+            if not same_date:
+                valid_dates.append({'date': date_str, 'cloud': cloud_cover, 'datetime': dt_obj.isoformat(),
+                                    'collection': collection})
+            elif dt_obj.isoformat() > same_date[0]['datetime']:
+                same_date[0]['datetime'] = dt_obj.isoformat()
+
+    valid_dates.sort(key=lambda x: x['date'])
+    return valid_dates
+
+
+def task_resolution(farm_bbox, name, collection=DEFAULT_COLLECTION):
+    """RESOLUTION_POLICY(Sentinel-2) 또는 컬렉션 해상도 정책에 따라 작업별 해상도/크기 선택 (AOI가 클수록 거칠게)"""
+    policy = get_collection(collection)['resolution'] or RESOLUTION_POLICY[name]
+    return choose_resolution(list(farm_bbox), policy['preferred'], policy['coarsest'], MAX_PIXELS_PER_REQUEST)
+
+
+def build_collection_tasks(farm_bbox, collection):
+    """Sentinel-2 외 컬렉션의 작업 목록 (SAR 1건, 광학은 RGB + 계산 가능한 지수)"""
+    spec = get_collection(collection)
+    resolution = task_resolution(farm_bbox, None, collection)
+    common = {
+        "collection": collection,
+        "size": resolution['size'],
+        "resolution": resolution['resolution'],
+    }
+
+    if spec['polarizations']:
+        name = prefixed(collection, "SAR")
+        return [{
+            **common,
+            "name": name,
+            "evalscript": build_sar_evalscript(spec['polarizations'], name),
+            "input_bands": len(spec['polarizations']),
+            "output_bands": len(spec['polarizations']),
+            "indices": [name],
+            "bands": [prefixed(collection, band) for band in spec['polarizations']],
+            "processing": {**spec['processing'], "upsampling": "NEAREST", "downsampling": "NEAREST"},
+            "zonal": ZONAL_STATS,
+            "write": True,
+            "encoding": "FLOAT32"
+        }]
+
+    tasks = []
+    if spec['rgb']:
+        name = prefixed(collection, "RGB")
+        tasks.append({
+            **common,
+            "name": name,
+            "evalscript": build_rgb_evalscript("UINT8", band_map=spec['band_map'], output_id=name),
+            "input_bands": len(RGB_BANDS),
+            "output_bands": 3,
+            "indices": [name],
+            "processing": {**spec['processing'], "upsampling": "BILINEAR", "downsampling": "BILINEAR"},
+            "zonal": False,
+            "write": True,
+            "bands": [name],
+            "encoding": "UINT8"
+        })
+
+    indices = supported_indices(collection, VI_INDICES, required_bands)
+    if indices:
+        names = [prefixed(collection, index) for index in indices]
+        stacked_id = prefixed(collection, "VIs")
+        tasks.append({
+            **common,
+            "name": stacked_id,
+            "evalscript": build_index_evalscript(indices, VI_ENCODING, stacked=VI_OUTPUT == "stack",
+                                                 stacked_id=stacked_id, band_map=spec['band_map'],
+                                                 prefix=prefixed(collection, "")),
+            "input_bands": len(required_bands(indices)),
+            "output_bands": len(indices),
+            "indices": [stacked_id] if VI_OUTPUT == "stack" else names,
+            "bands": names,
+            "processing": {**spec['processing'], "upsampling": "NEAREST", "downsampling": "NEAREST"},
+            "zonal": ZONAL_STATS,
+            "write": WRITE_VI_TIFFS or not ZONAL_STATS,
+            "encoding": VI_ENCODING
+        })
+    return tasks
+
+
+def build_download_tasks(farm_bbox, collection=DEFAULT_COLLECTION):
+    if collection != DEFAULT_COLLECTION:
+        return build_collection_tasks(farm_bbox, collection)
+
+    # =======================================================
+    # [핵심 수정] 작업별 업샘플링 옵션(BILINEAR vs NEAREST) 지정
+    # =======================================================
+    return [
+        rgb_task(task_resolution(farm_bbox, "RGB")),
+        vi_task(task_resolution(farm_bbox, "VIs")),
+    ]
+
+
+def rgb_task(choice, sample_type=RGB_SAMPLE_TYPE, interpolation=RGB_INTERPOLATION):
+    """
+    Sentinel-2 RGB 작업 정의
+
+    Args:
+        choice (dict): task_resolution 결과 (size, resolution)
+        sample_type (str): "UINT8", "UINT16" 또는 "FLOAT32"
+        interpolation (str): 업/다운샘플링 보간법
+    """
+    return {
+        "name": "RGB",
+        "collection": DEFAULT_COLLECTION,
+        "evalscript": build_rgb_evalscript(sample_type),
+        "size": choice['size'],
+        "resolution": choice['resolution'],
+        "input_bands": len(RGB_BANDS),
+        "output_bands": 3,
+        "indices": RGB_INDEX,
+        "processing": {"upsampling": interpolation, "downsampling": interpolation},
+        "zonal": False,
+        "write": True,
+        "bands": RGB_INDEX,
+        "encoding": sample_type
+    }
+
+
+def vi_task(choice, encoding=VI_ENCODING, interpolation=VI_INTERPOLATION, output=VI_OUTPUT):
+    """
+    Sentinel-2 생육 지수 작업 정의
+
+    Args:
+        choice (dict): task_resolution 결과 (size, resolution)
+        encoding (str): "FLOAT32" 또는 "INT16"
+        interpolation (str): 업/다운샘플링 보간법
+        output (str): "separate" (지수별 TIFF, tar) 또는 "stack" (다중 밴드 TIFF 1개)
+    """
+    return {
+        "name": "VIs",
+        "collection": DEFAULT_COLLECTION,
+        "evalscript": build_index_evalscript(VI_INDICES, encoding, stacked=output == "stack"),
+        "size": choice['size'],
+        "resolution": choice['resolution'],
+        "input_bands": len(required_bands(VI_INDICES)),
+        "output_bands": len(VI_INDICES),
+        "indices": ["VIs"] if output == "stack" else VI_INDICES,
+        "bands": VI_INDICES,
+        "processing": {"upsampling": interpolation, "downsampling": interpolation},
+        "zonal": ZONAL_STATS,
+        "write": WRITE_VI_TIFFS or not ZONAL_STATS,
+        "encoding": encoding
+    }
+
+def farm_bbox_of(item):
+    return BBox(bbox=item['bbox'], crs=CRS(item['epsg']))
+
+
+def farm_geometry_of(item):
+    return shapely.wkt.loads(item['geometry']) if item.get('geometry') else None
+
+
+def item_task(item):
+    """작업 항목의 (컬렉션, 작업 이름)에 해당하는 작업 정의"""
+    tasks = build_download_tasks(farm_bbox_of(item), item.get('collection', DEFAULT_COLLECTION))
+    return {task['name']: task for task in tasks}[item['task']]
+
+
+def plan_farm(aoi, prune=True):
+    """AOI(농장) 하나에 대해 맑은 날짜 목록을 계산 (prune이고 MIN_COVERAGE > 0이면 촬영 범위 부족 날짜 제외)"""
+    farm_id = aoi['farm_id']
+    farm_bbox = BBox(bbox=aoi['bbox'], crs=CRS(aoi['epsg']))
+
+    dates = []
+    for collection in COLLECTIONS:
+        since = watermarks.get(watermark_key(farm_id, collection)) if watermarks else None
+        try:
+            dates.extend(search_valid_dates(farm_bbox, since, collection))
+        except Exception as e:
+            # 한 컬렉션의 검색 실패가 다른 컬렉션 날짜까지 버리지 않도록 컬렉션별로 처리
+            print(f"   ⚠️ {collection} 카탈로그 검색 실패, 이번 실행에서 제외: {e}")
+    dates.sort(key=lambda d: (d['date'], COLLECTIONS.index(d['collection'])))
+
+    farm = {
+        "farm_id": farm_id,
+        "bbox": aoi['bbox'],
+        "epsg": aoi['epsg'],
+        "geometry": aoi['geometry'].wkt,
+        "dates": dates,
+    }
+    if prune and MIN_COVERAGE > 0 and farm['dates']:
+        prune_uncovered_dates(farm)
+    return farm
+
+
+def plan_file(file_path, prune=True):
+    """AOI 파일 하나의 농장별 계획 (AOI_SPLIT_FEATURES면 피처마다 농장 하나)"""
+    return [plan_farm(aoi, prune) for aoi in load_aois(file_path)]
+
+
+def prune_uncovered_dates(farm):
+    """dataMask 미리보기로 농장 폴리곤 안의 촬영 범위가 MIN_COVERAGE 미만인 날짜 제외 (Sentinel-2 날짜만 진단)"""
+    s2_dates = [d for d in farm['dates'] if d.get('collection', DEFAULT_COLLECTION) == DEFAULT_COLLECTION]
+    if not s2_dates:
+        return
+    rows = check_coverage([{**farm, "dates": s2_dates}], config, farm_bbox_of, farm_geometry_of,
+                          resolution=COVERAGE_RESOLUTION, max_threads=COVERAGE_MAX_THREADS)
+    coverage = {row['date']: row['coverage'] for row in rows}
+    unknown = [d['date'] for d in s2_dates if coverage.get(d['date']) is None]
+    if unknown:
+        print(f"   ⚠️ 촬영 범위를 판단하지 못한 날짜 {len(unknown)}개는 제외하지 않고 유지: {', '.join(unknown)}")
+    skipped = [d['date'] for d in s2_dates if d['date'] not in unknown and coverage[d['date']] < MIN_COVERAGE]
+    if skipped:
+        farm['dates'] = [d for d in farm['dates']
+                         if d.get('collection', DEFAULT_COLLECTION) != DEFAULT_COLLECTION or d['date'] not in skipped]
+        print(f"   ✂️ 촬영 범위 {MIN_COVERAGE:.0%} 미만 날짜 {len(skipped)}개 제외: {', '.join(skipped)}")
+
+
+def plan_work_items(farm):
+    """농장 계획을 (농장, 날짜, 작업) 단위 작업 항목으로 분해 (날짜마다 그 날짜 컬렉션의 작업)"""
+    farm_bbox = farm_bbox_of(farm)
+    task_names = {collection: [task['name'] for task in build_download_tasks(farm_bbox, collection)]
+                  for collection in {item.get('collection', DEFAULT_COLLECTION) for item in farm['dates']}}
+    return [
+        {"farm_id": farm['farm_id'], "bbox": farm['bbox'], "epsg": farm['epsg'], "geometry": farm['geometry'],
+         "date": item['date'], "acquired": item['datetime'], "cloud": item['cloud'],
+         "collection": item.get('collection', DEFAULT_COLLECTION), "task": name}
+        for item in farm['dates']
+        for name in task_names[item.get('collection', DEFAULT_COLLECTION)]
+    ]
+
+
+# =============================================================================
+# [6] 다운로드 및 파일 정리
+# =============================================================================
+def record_zonal_stats(farm_id, target_date, responses, task, farm_bbox, geometry):
+    """응답 배열(메모리)에서 바로 구역 통계를 계산하여 표에 추가"""
+    mask = polygon_mask(geometry, list(farm_bbox), task['size'])
+
+    if len(task['indices']) == 1 and len(task['bands']) > 1:
+        # 다중 밴드 VI 응답: (height, width, bands) 배열을 지수별로 분리
+        stack = responses.get(f"{task['indices'][0]}.tif") if isinstance(responses, dict) else responses
+        arrays = {identifier: stack[..., band] for band, identifier in enumerate(task['bands'])}
+    elif isinstance(responses, dict):
+        arrays = {identifier: responses.get(f"{identifier}.tif") for identifier in task['indices']}
+    else:
+        arrays = {task['indices'][0]: responses}
+
+    for identifier, array in arrays.items():
+        if array is None:
+            continue
+        if task['encoding'] == "INT16":
+            stats = zonal_statistics(decode_index(array, nodata=INT16_NODATA), mask, nodata=None)
+        else:
+            stats = zonal_statistics(array, mask)
+        zonal_writer.add(farm_id, target_date, identifier, stats)
+
+
+def build_request(farm_bbox, target_date, task, geometry=None, sh_config=None):
+    if not CLIP_TO_GEOMETRY:
+        geometry = None
+    collection = task.get('collection', DEFAULT_COLLECTION)
+    return SentinelHubRequest(
+        evalscript=task['evalscript'],
+        input_data=[
+            SentinelHubRequest.input_data(
+                data_collection=data_collection(collection),
+                time_interval=(target_date, target_date),
+                mosaicking_order=get_collection(collection)['mosaicking_order'],
+                other_args={'processing': task['processing']}  # 지정한 보간법을 API에 전달
+            )
+        ],
+        responses=[
+            SentinelHubRequest.output_response(name, MimeType.TIFF) for name in task['indices']
+        ],
+        bbox=farm_bbox,
+        geometry=request_geometry(geometry, farm_bbox, task['resolution'], CLIP_MAX_VERTICES),
+        size=task['size'],
+        config=sh_config or config,
+        data_folder=OUTPUT_FOLDER
+    )
+
+
+def fetch_response(request, tar_path):
+    """
+    응답 원본(bytes)을 디코딩하지 않고 받아옴
+    캐시 적중 시 tar_path에 바로 복사하고 content는 None
+    """
+    # 동일한 요청 본문의 응답이 캐시에 있으면 다운로드 생략
+    cache_key = response_cache.key_for(request) if response_cache else None
+    if cache_key and response_cache.get(cache_key, tar_path):
+        print(f"         💾 캐시 사용 ({cache_key[:12]})")
+        return None, cache_key
+
+    response = download_client.download(request.download_list, decode_data=False)[0]
+    return getattr(response, 'content', response), cache_key
+
+
+def decode_response(content, tar_path, task):
+    """구역 통계용 배열 복원 (메모리의 bytes 또는 캐시에서 복사된 파일)"""
+    if content is None:
+        return read_data(tar_path)
+    return decode_data(content, MimeType.TAR if len(task['indices']) > 1 else MimeType.TIFF)
+
+
+def register_product(path, farm_id, target_date, task, farm_bbox, cloud, identifier, geometry=None):
+    if farm_bbox is None:
+        return
+    epsg = str(farm_bbox.crs.epsg)
+    if manifest is not None:
+        manifest.record(path, farm_id, target_date, identifier, task['name'], task.get('collection', DEFAULT_COLLECTION),
+                        epsg, list(farm_bbox), geometry.wkt if geometry is not None else None, cloud,
+                        checksum=RECORD_CHECKSUMS)
+    if product_index is None:
+        return
+    if len(task['indices']) == 1 and len(task['bands']) > 1:
+        # 다중 밴드 파일은 밴드(지수)마다 항목 하나
+        for band, name in enumerate(task['bands']):
+            product_index.add(path, farm_id, target_date, name, epsg, list(farm_bbox), cloud, band=band)
+    else:
+        product_index.add(path, farm_id, target_date, identifier, epsg, list(farm_bbox), cloud)
+
+
+def reserve_products(tar_path, farm_id, target_date, task, farm_bbox, cloud, geometry=None):
+    """저장/tar 해제 전에 만들 제품을 매니페스트에 pending으로 기록 (도중에 중단되면 "verify" 모드가 다시 받음)"""
+    if manifest is None or farm_bbox is None:
+        return
+    folder_path = os.path.dirname(tar_path)
+    date_clean = target_date.replace("-", "")
+    products = [(os.path.join(folder_path, f"{farm_id}_{date_clean}_{identifier}.tif"), identifier)
+                for identifier in task['indices']]
+    manifest.reserve(products, farm_id, target_date, task['name'], task.get('collection', DEFAULT_COLLECTION),
+                     str(farm_bbox.crs.epsg), list(farm_bbox), geometry.wkt if geometry is not None else None, cloud)
+
+
+def write_response(content, tar_path, cache_key, farm_id, target_date, task, farm_bbox=None, cloud=None, geometry=None):
+    """응답 저장 → 캐시 등록 → tar 해제/파일명 정리 → 산출물 인덱스 등록"""
+    date_clean = target_date.replace("-", "")
+    if task['write']:
+        reserve_products(tar_path, farm_id, target_date, task, farm_bbox, cloud, geometry)
+
+    if content is not None and task['write']:
+        os.makedirs(os.path.dirname(tar_path), exist_ok=True)
+        with open(tar_path, 'wb') as f:
+            f.write(content)
+        if cache_key:
+            response_cache.put(cache_key, tar_path)
+
+    # TIFF를 저장하지 않는 경우 (통계만 필요)
+    if not task['write']:
+        if os.path.exists(tar_path): os.remove(tar_path)
+        return date_clean
+
+    # 압축파일(.tar) 처리 (생육 지수용)
+    if tar_path.endswith('.tar') and os.path.exists(tar_path):
+        folder_path = os.path.dirname(tar_path)
+        with tarfile.open(tar_path) as tar:
+            tar.extractall(path=folder_path, filter='data')
+
+        for identifier in task['indices']:
+            old_file_path = os.path.join(folder_path, f"{identifier}.tif")
+            new_name = f"{farm_id}_{date_clean}_{identifier}.tif"
+            new_file_path = os.path.join(folder_path, new_name)
+
+            if os.path.exists(old_file_path):
+                if task['encoding'] == "INT16": tag_index_bands(old_file_path, [identifier], task['encoding'])
+                if os.path.exists(new_file_path): os.remove(new_file_path)
+                os.rename(old_file_path, new_file_path)
+                register_product(new_file_path, farm_id, target_date, task, farm_bbox, cloud, identifier, geometry)
+
+        os.remove(tar_path)
+
+    # 단일 파일(.tiff) 처리 (RGB용)
+    elif (tar_path.endswith('.tif') or tar_path.endswith('.tiff')) and os.path.exists(tar_path):
+        folder_path = os.path.dirname(tar_path)
+
+        identifier = task['indices'][0]
+        new_name = f"{farm_id}_{date_clean}_{identifier}.tif"
+        new_file_path = os.path.join(folder_path, new_name)
+
+        # 다중 밴드 VI 파일: 밴드 설명(지수 이름)과 scale/offset 기록
+        if len(task['bands']) > 1: tag_index_bands(tar_path, task['bands'], task['encoding'])
+        if os.path.exists(new_file_path): os.remove(new_file_path)
+        os.rename(tar_path, new_file_path)
+        register_product(new_file_path, farm_id, target_date, task, farm_bbox, cloud, identifier, geometry)
+
+    return date_clean
+
+
+def fetch_task(farm_id, farm_bbox, target_date, task, geometry=None):
+    """요청 하나를 받아 응답 원본만 반환 (디코딩/저장은 finish_task에서)"""
+    pu = estimate_processing_units(task['size'], task['input_bands'], SAMPLE_BYTES[task['encoding']])
+    print(f"      -> {task['name']} 데이터 수집 중... "
+          f"(해상도: {task['resolution']}m, {task['size'][0]}x{task['size'][1]} 픽셀, 약 {pu:.2f} PU)")
+
+    if run_state is not None: run_state.start(farm_id, target_date, task['name'], worker=WORKER_ID)
+    try:
+        request = build_request(farm_bbox, target_date, task, geometry)
+        tar_path = os.path.join(OUTPUT_FOLDER, request.get_filename_list()[0])
+        content, cache_key = fetch_response(request, tar_path)
+    except Exception as e:
+        if run_state is not None: run_state.fail(farm_id, target_date, task['name'], e)
+        raise
+    return {"tar_path": tar_path, "content": content, "cache_key": cache_key}
+
+
+def finish_task(fetched, farm_id, farm_bbox, target_date, task, geometry=None, cloud=None):
+    """받은 응답의 구역 통계 → 저장/tar 해제/이름 정리 → 진행 상태 기록"""
+    content, tar_path = fetched['content'], fetched['tar_path']
+    try:
+        if zonal_writer is not None and task['zonal'] and geometry is not None:
+            record_zonal_stats(farm_id, target_date, decode_response(content, tar_path, task), task, farm_bbox, geometry)
+
+        date_clean = write_response(content, tar_path, fetched['cache_key'], farm_id, target_date, task,
+                                    farm_bbox, cloud, geometry)
+    except Exception as e:
+        if run_state is not None: run_state.fail(farm_id, target_date, task['name'], e)
+        raise
+
+    if run_state is not None: run_state.finish(farm_id, target_date, task['name'], len(content or b""))
+    return date_clean
+
+
+def download_task(farm_id, farm_bbox, target_date, task, geometry=None, cloud=None):
+    fetched = fetch_task(farm_id, farm_bbox, target_date, task, geometry)
+    return finish_task(fetched, farm_id, farm_bbox, target_date, task, geometry, cloud)
+
+
+def run_work_item(item):
+    """큐에서 받은 작업 항목 하나를 실행 (작업자 노드용)"""
+    download_task(item['farm_id'], farm_bbox_of(item), item['date'], item_task(item), farm_geometry_of(item),
+                  item.get('cloud'))
+
 
 # =============================================================================
-# [5] 다중 POI 자동 수집 루프 (Core Logic)
+# [7] 실행 모드별 루프 (Core Logic)
 # =============================================================================
-supported_extensions = ('.zip', '.geojson', '.shp')
-poi_files = [f for f in os.listdir(AOI_FOLDER_PATH) if f.lower().endswith(supported_extensions)]
+def list_poi_files():
+    supported_extensions = ('.zip', '.geojson', '.shp')
+    return [f for f in os.listdir(AOI_FOLDER_PATH) if f.lower().endswith(supported_extensions)]
+
 
-if not poi_files:
-    print(f"\n❌ '{AOI_FOLDER_PATH}' 폴더에 파일이 없습니다.")
-    exit()
+def planned_farms(poi_files):
+    """AOI 파일을 차례로 불러와 카탈로그 검색까지 마친 농장 계획을 하나씩 생성 (오류 난 파일/농장은 건너뜀)"""
+    for poi_idx, file_name in enumerate(poi_files):
+        print(f"\n🌾 [{poi_idx + 1}/{len(poi_files)}] 대상지 계획: {os.path.splitext(file_name)[0]}")
+        try:
+            aois = load_aois(os.path.join(AOI_FOLDER_PATH, file_name))
+        except Exception as e:
+            print(f"\n   ❌ 처리 중 오류 발생: {e}")
+            continue
 
-for poi_idx, file_name in enumerate(poi_files):
-    farm_id = os.path.splitext(file_name)[0]
-    file_path = os.path.join(AOI_FOLDER_PATH, file_name)
+        for aoi in aois:
+            try:
+                farm = plan_farm(aoi)
+            except Exception as e:
+                print(f"\n   ❌ 처리 중 오류 발생: {aoi['farm_id']} ({e})")
+                continue
+            yield farm
 
-    print(f"\n{'=' * 60}")
-    print(f"🌾 [{poi_idx + 1}/{len(poi_files)}] 대상지 처리 시작: {farm_id}")
-    print(f"{'=' * 60}")
 
+def run_local(poi_files):
+    """
+    다중 POI 자동 수집 루프 (단일 호스트)
+    - 현재 농장을 받는 동안 다음 농장(PREFETCH_FARMS개)의 AOI 로드/카탈로그 검색을 미리 진행
+    - 저장/tar 해제는 별도 스레드에서 처리하고 그동안 다음 요청을 보냄 (대기 응답 WRITE_BACKLOG개까지)
+    """
+    writer = BackgroundWriter(WRITE_BACKLOG)
     try:
-        raw_bbox, epsg_str = get_bbox_from_file(file_path)
-        min_x, min_y, max_x, max_y = raw_bbox
-        farm_bbox = BBox(bbox=[min_x, min_y, max_x, max_y], crs=CRS(epsg_str))
-
-        size_5m = bbox_to_dimensions(farm_bbox, resolution=5)
-        size_10m = bbox_to_dimensions(farm_bbox, resolution=10)
-
-        catalog = SentinelHubCatalog(config=config)
-        search_iterator = catalog.search(
-            collection=DataCollection.SENTINEL2_L2A,
-            time=(START_DATE, END_DATE),
-            bbox=farm_bbox,
-            fields={"include": ["id", "properties.datetime", "properties.eo:cloud_cover"], "exclude": []}
-        )
-
-        valid_dates = []
-        for feature in search_iterator:
-            obs_date_str = feature["properties"]["datetime"]
-            cloud_cover = feature["properties"]["eo:cloud_cover"]
-            if cloud_cover <= MAX_CC_PERCENT:
-                dt_obj = datetime.datetime.fromisoformat(obs_date_str.replace('Z', '+00:00'))
-                date_str = dt_obj.strftime("%Y-%m-%d")
-                if date_str not in [d['date'] for d in valid_dates]:
-                    valid_dates.append({'date': date_str, 'cloud': cloud_cover})
-
-        valid_dates.sort(key=lambda x: x['date'])
-
-        if not valid_dates:
-            print(f"   ⚠️ 맑은 날짜가 없습니다.")
+        for farm in prefetch(planned_farms(poi_files), PREFETCH_FARMS, name="plan"):
+            print(f"\n{'=' * 60}")
+            print(f"🌾 대상지 처리 시작: {farm['farm_id']}")
+            print(f"{'=' * 60}")
+            try:
+                run_local_farm(farm, writer)
+            except Exception as e:
+                print(f"\n   ❌ 처리 중 오류 발생: {farm['farm_id']} ({e})")
+    finally:
+        writer.close()
+
+
+def complete_dates(farm_id, pending, wait, failed):
+    """
+    뒤처리가 끝난 날짜부터 순서대로 완료 처리 (앞 날짜가 끝나기 전에는 워터마크를 옮기지 않음)
+
+    Args:
+        pending (list): (날짜 항목, 작업 리스트, Future 리스트) - 앞에서부터 꺼냄
+        wait (bool): True면 남은 날짜를 모두 기다림 (뒤처리 예외는 모두 기다린 뒤 다시 발생)
+        failed (set): 뒤처리가 실패한 컬렉션 (이후 날짜가 성공해도 워터마크를 옮기지 않음)
+    """
+    error = None
+    while pending and (wait or all(future.done() for future in pending[0][2])):
+        item, download_tasks, futures = pending.pop(0)
+        collection = item.get('collection', DEFAULT_COLLECTION)
+        try:
+            date_clean = [future.result() for future in futures][-1]
+        except Exception as e:
+            # 실패한 날짜에서 워터마크를 멈춰 다음 실행 때 이 날짜부터 다시 조회
+            failed.add(collection)
+            print(f"      ❌ 뒤처리 실패: {item['date']} ({e})")
+            error = error or e
+            if not wait:
+                break
             continue
+        if watermarks is not None and collection not in failed:
+            watermarks.update(watermark_key(farm_id, collection), item['datetime'])
+        print(f"      ✅ 완료: {date_clean} ("
+              + " & ".join(f"{task['name']} {task['resolution']}m" for task in download_tasks) + ")")
+    if error is not None:
+        raise error
+
 
+def run_local_farm(farm, writer):
+    farm_id = farm['farm_id']
+    farm_bbox = farm_bbox_of(farm)
+    geometry = farm_geometry_of(farm)
+    valid_dates = farm['dates']
+
+    if not valid_dates:
+        print(f"   ⚠️ 맑은 날짜가 없습니다. ({farm_id})")
+        return
+
+    download_tasks = {collection: build_download_tasks(farm_bbox, collection)
+                      for collection in {item.get('collection', DEFAULT_COLLECTION) for item in valid_dates}}
+    if run_state is not None:
+        run_state.plan([{"farm_id": farm_id, "date": item['date'], "task": task['name']}
+                        for item in valid_dates
+                        for task in download_tasks[item.get('collection', DEFAULT_COLLECTION)]])
+
+    pending, failed = [], set()
+    try:
         for d_idx, item in enumerate(valid_dates):
             target_date = item['date']
-            print(f"\n   🚀 [{d_idx + 1}/{len(valid_dates)}] 다운로드: {target_date}")
-
-            # =======================================================
-            # [핵심 수정] 작업별 업샘플링 옵션(BILINEAR vs NEAREST) 지정
-            # =======================================================
-            download_tasks = [
-                {
-                    "name": "RGB",
-                    "evalscript": EVALSCRIPT_RGB,
-                    "size": size_5m,
-                    "indices": RGB_INDEX,
-                    "processing": {"upsampling": "BILINEAR", "downsampling": "BILINEAR"}  # 5m로 부드럽게 보간
-                },
-                {
-                    "name": "VIs",
-                    "evalscript": EVALSCRIPT_VIS,
-                    "size": size_10m,
-                    "indices": VI_INDICES,
-                    "processing": {"upsampling": "NEAREST", "downsampling": "NEAREST"}  # 원본 데이터(반사율) 보존
-                }
-            ]
-
-            for task in download_tasks:
-                print(f"      -> {task['name']} 데이터 수집 중... (해상도: {task['size'][0]}x{task['size'][1]} 픽셀)")
-
-                request = SentinelHubRequest(
-                    evalscript=task['evalscript'],
-                    input_data=[
-                        SentinelHubRequest.input_data(
-                            data_collection=DataCollection.SENTINEL2_L2A,
-                            time_interval=(target_date, target_date),
-                            mosaicking_order='leastCC',
-                            other_args={'processing': task['processing']}  # 지정한 보간법을 API에 전달
-                        )
-                    ],
-                    responses=[
-                        SentinelHubRequest.output_response(name, MimeType.TIFF) for name in task['indices']
-                    ],
-                    bbox=farm_bbox,
-                    size=task['size'],
-                    config=config,
-                    data_folder=OUTPUT_FOLDER
-                )
-
-                data = request.get_data(save_data=True)
-                saved_paths = request.get_filename_list()
-                relative_tar_path = saved_paths[0]
-                tar_path = relative_tar_path if os.path.exists(relative_tar_path) else os.path.join(OUTPUT_FOLDER,
-                                                                                                    relative_tar_path)
-
-                # 압축파일(.tar) 처리 (생육 지수용)
-                if tar_path.endswith('.tar') and os.path.exists(tar_path):
-                    folder_path = os.path.dirname(tar_path)
-                    with tarfile.open(tar_path) as tar:
-                        tar.extractall(path=folder_path, filter='data')
-
-                    date_clean = target_date.replace("-", "")
-                    for identifier in task['indices']:
-                        old_file_path = os.path.join(folder_path, f"{identifier}.tif")
-                        new_name = f"{farm_id}_{date_clean}_{identifier}.tif"
-                        new_file_path = os.path.join(folder_path, new_name)
-
-                        if os.path.exists(old_file_path):
-                            if os.path.exists(new_file_path): os.remove(new_file_path)
-                            os.rename(old_file_path, new_file_path)
-
-                    os.remove(tar_path)
-
-                # 단일 파일(.tiff) 처리 (RGB용)
-                elif (tar_path.endswith('.tif') or tar_path.endswith('.tiff')) and os.path.exists(tar_path):
-                    folder_path = os.path.dirname(tar_path)
-                    date_clean = target_date.replace("-", "")
-
-                    identifier = task['indices'][0]
-                    new_name = f"{farm_id}_{date_clean}_{identifier}.tif"
-                    new_file_path = os.path.join(folder_path, new_name)
-
-                    if os.path.exists(new_file_path): os.remove(new_file_path)
-                    os.rename(tar_path, new_file_path)
-
-            print(f"      ✅ 완료: {date_clean} (RGB 5m & VIs 10m)")
+            print(f"\n   🚀 [{d_idx + 1}/{len(valid_dates)}] 다운로드: {farm_id} / {target_date}")
+
+            date_tasks = download_tasks[item.get('collection', DEFAULT_COLLECTION)]
+            futures = []
+            for task in date_tasks:
+                fetched = fetch_task(farm_id, farm_bbox, target_date, task, geometry)
+                futures.append(writer.submit(finish_task, fetched, farm_id, farm_bbox, target_date, task,
+                                             geometry, item['cloud']))
+            pending.append((item, date_tasks, futures))
+            complete_dates(farm_id, pending, wait=False, failed=failed)
+    finally:
+        # 다운로드 도중 실패해도 이미 받은 날짜의 뒤처리는 끝까지 마침
+        complete_dates(farm_id, pending, wait=True, failed=failed)
+
+
+def run_publish(poi_files, queue):
+    """작업 계획만 수행하고 (농장, 날짜, 작업) 항목을 큐에 등록"""
+    for poi_idx, file_name in enumerate(poi_files):
+        file_path = os.path.join(AOI_FOLDER_PATH, file_name)
+        print(f"\n📋 [{poi_idx + 1}/{len(poi_files)}] 작업 계획 중: {file_name}")
+
+        try:
+            for farm in plan_file(file_path):
+                added = queue.publish(plan_work_items(farm))
+                print(f"   ✅ {farm['farm_id']}: {len(farm['dates'])}개 날짜, 신규 작업 {added}건 등록")
+
+                # 큐에 등록된 작업은 큐가 재시도를 책임지므로 등록 시점에 워터마크 이동
+                if watermarks is not None:
+                    for collection in COLLECTIONS:
+                        acquired = [d['datetime'] for d in farm['dates']
+                                    if d.get('collection', DEFAULT_COLLECTION) == collection]
+                        if acquired: watermarks.update(watermark_key(farm['farm_id'], collection), max(acquired))
+        except Exception as e:
+            print(f"\n   ❌ 처리 중 오류 발생: {e}")
+
+    print(f"\n📊 큐 상태: {queue.stats()}")
+
+
+def keep_lease(queue, item, stop):
+    """작업이 끝날 때까지 lease를 주기적으로 연장 (lease 시간보다 오래 걸리는 작업이 다른 작업자에게 넘어가지 않도록)"""
+    while not stop.wait(QUEUE_LEASE_SECONDS / 3):
+        try:
+            if not queue.extend_lease(item):
+                print(f"\n   ⚠️ lease를 잃었습니다: {item['farm_id']} / {item['date']} / {item['task']}")
+                return
+        except Exception as e:
+            print(f"\n   ⚠️ lease 연장 실패 (다음 주기에 재시도): {e}")
+
+
+def run_worker(queue):
+    """큐에서 작업을 하나씩 가져와 다운로드 (여러 노드에서 동시에 실행 가능)"""
+    print(f"👷 작업자 시작: {WORKER_ID}")
+
+    while True:
+        item = queue.lease(WORKER_ID)
+        if item is None:
+            if queue.stats()['leased'] == 0:
+                break
+            # 다른 작업자가 처리 중인 작업의 lease 만료를 기다림
+            time.sleep(QUEUE_POLL_SECONDS)
+            continue
+
+        print(f"\n   🚀 {item['farm_id']} / {item['date']} / {item['task']} (시도 {item['attempt']})")
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=keep_lease, args=(queue, item, stop), daemon=True)
+        heartbeat.start()
+        try:
+            run_work_item(item)
+            stop.set()
+            heartbeat.join()
+            queue.ack(item)
+        except Exception as e:
+            stop.set()
+            heartbeat.join()
+            print(f"\n   ❌ 처리 중 오류 발생: {e}")
+            queue.fail(item, e)
+
+    print(f"\n📊 큐 상태: {queue.stats()}")
+
+
+# 파이프라인에서 농장별 남은 작업 수 (모두 성공해야 워터마크 이동)
+pipeline_farms = {}
+pipeline_lock = threading.Lock()
+
+
+def track_pipeline_farm(farm_id, items):
+    """농장의 작업이 모두 성공했을 때 워터마크를 옮기기 위해 남은 작업 수 등록"""
+    if not items:
+        return
+    latest = {}
+    for item in items:
+        key = watermark_key(farm_id, item.get('collection', DEFAULT_COLLECTION))
+        latest[key] = max(latest.get(key, item['acquired']), item['acquired'])
+    with pipeline_lock:
+        pipeline_farms[farm_id] = {
+            "remaining": len(items),
+            "failed": False,
+            "latest": latest,
+        }
+
+
+def pipeline_items(poi_files):
+    """
+    작업 항목을 필요할 때마다 생성 (AOI 로드/카탈로그 검색도 소비 속도에 맞춰 진행)
+    다음 농장 계획은 PREFETCH_FARMS개 앞서 백그라운드에서 진행하여, 앞 농장 항목이 큐에 다 들어가도
+    fetch 작업자가 카탈로그 검색을 기다리며 쉬지 않음
+    """
+    for farm in prefetch(planned_farms(poi_files), PREFETCH_FARMS, name="plan"):
+        items = plan_work_items(farm)
+        if run_state is not None: run_state.plan(items)
+        track_pipeline_farm(farm['farm_id'], items)
+        yield from items
+
+
+def plan_jobs(poi_files):
+    """모든 AOI 파일의 전체 작업 계획 (계획 레코드 리스트)"""
+    jobs = []
+    for poi_idx, file_name in enumerate(poi_files):
+        print(f"\n📋 [{poi_idx + 1}/{len(poi_files)}] 작업 계획 중: {file_name}")
+        try:
+            farms = plan_file(os.path.join(AOI_FOLDER_PATH, file_name))
+        except Exception as e:
+            print(f"\n   ❌ 처리 중 오류 발생: {e}")
+            continue
+
+        for farm in farms:
+            tasks = {(collection, task['name']): task for collection in COLLECTIONS
+                     for task in build_download_tasks(farm_bbox_of(farm), collection)}
+            farm_jobs = []
+            for item in plan_work_items(farm):
+                task = tasks[(item['collection'], item['task'])]
+                farm_jobs.append(make_job(item, task, SAMPLE_BYTES[task['encoding']]))
+            jobs.extend(farm_jobs)
+            print(f"   ✅ {farm['farm_id']}: {len(farm['dates'])}개 날짜, 작업 {len(farm_jobs)}건")
+    return jobs
+
+
+def plan_meta():
+    """계획 파일에 함께 저장하는 계획 조건"""
+    return {
+        "start_date": START_DATE, "end_date": END_DATE, "max_cc_percent": MAX_CC_PERCENT,
+        "collections": COLLECTIONS, "vi_indices": VI_INDICES, "vi_encoding": VI_ENCODING, "vi_output": VI_OUTPUT,
+        "resolution_policy": RESOLUTION_POLICY, "max_pixels_per_request": MAX_PIXELS_PER_REQUEST,
+    }
+
+
+def run_plan(poi_files):
+    """전체 작업 계획만 PLAN_PATH에 저장 (다운로드 없음)"""
+    jobs = plan_jobs(poi_files)
+    write_plan(jobs, PLAN_PATH, meta=plan_meta())
+    total_mb = sum(job['est_bytes'] for job in jobs) / 1024 ** 2
+    print(f"\n🗺️ 작업 계획 저장: {PLAN_PATH} (작업 {len(jobs)}건, 농장 {len({job['farm_id'] for job in jobs})}개, "
+          f"예상 {total_mb:.1f} MB)")
+
+
+def plan_items(jobs):
+    """계획 레코드를 파이프라인 작업 항목으로 공급 (농장별 남은 작업 수를 먼저 모두 등록)"""
+    by_farm = {}
+    for job in jobs:
+        by_farm.setdefault(job['farm_id'], []).append(job)
+    for farm_id, farm_jobs in by_farm.items():
+        track_pipeline_farm(farm_id, farm_jobs)
+    if run_state is not None: run_state.plan(jobs)
+    yield from jobs
+
+
+def run_execute():
+    """PLAN_PATH의 계획을 PLAN_ORDER 순서로 실행 (PLAN_PARTS개 중 PLAN_PART번째 몫만)"""
+    jobs, meta = read_plan(PLAN_PATH)
+    changed = [key for key, value in plan_meta().items() if key in meta and meta[key] != value]
+    if changed:
+        print(f"   ⚠️ 계획 이후 바뀐 설정: {', '.join(changed)} (evalscript/크기가 다르면 해당 작업은 실패 처리)")
+
+    jobs = order_jobs(split_jobs(jobs, PLAN_PARTS, PLAN_PART), PLAN_ORDER)
+    print(f"\n▶️ 계획 실행: {PLAN_PATH} (작업 {len(jobs)}건, 몫 {PLAN_PART + 1}/{PLAN_PARTS}, 순서 {PLAN_ORDER})")
+    run_pipeline(plan_items(jobs))
+
+
+def pipeline_finish(item, failed=False):
+    with pipeline_lock:
+        progress = pipeline_farms.get(item['farm_id'])
+        if progress is None:
+            return
+        progress['remaining'] -= 1
+        progress['failed'] = progress['failed'] or failed
+        done = progress['remaining'] == 0
+        if done:
+            del pipeline_farms[item['farm_id']]
+
+    if done and not progress['failed'] and watermarks is not None:
+        for key, acquired in progress['latest'].items():
+            watermarks.update(key, acquired)
+
+
+def pipeline_fetch(item):
+    farm_bbox = farm_bbox_of(item)
+    task = item_task(item)
+    if 'evalscript_sha' in item and (item['evalscript_sha'] != evalscript_hash(task['evalscript'])
+                                     or list(item['size']) != list(task['size'])):
+        # 계획 파일 재실행은 계획 당시와 똑같은 요청이어야 함
+        raise ValueError("계획 이후 evalscript 또는 크기가 바뀌었습니다. 계획을 다시 만드세요.")
+    request = build_request(farm_bbox, item['date'], task, farm_geometry_of(item))
+    tar_path = os.path.join(OUTPUT_FOLDER, request.get_filename_list()[0])
+
+    print(f"      -> {item['farm_id']} / {item['date']} / {task['name']} 수신 중...")
+    if run_state is not None: run_state.start(item['farm_id'], item['date'], item['task'], worker=WORKER_ID)
+    content, cache_key = fetch_response(request, tar_path)
+    return {**item, "spec": task, "tar_path": tar_path, "content": content, "cache_key": cache_key}
+
+
+def pipeline_decode(item):
+    # 배열은 통계 계산 직후 버려지고, 다음 단계로는 원본 bytes만 전달
+    geometry = farm_geometry_of(item)
+    if zonal_writer is not None and item['spec']['zonal'] and geometry is not None:
+        responses = decode_response(item['content'], item['tar_path'], item['spec'])
+        record_zonal_stats(item['farm_id'], item['date'], responses, item['spec'], farm_bbox_of(item), geometry)
+    return item
+
+
+def pipeline_write(item):
+    write_response(item['content'], item['tar_path'], item['cache_key'], item['farm_id'], item['date'], item['spec'],
+                   farm_bbox_of(item), item.get('cloud'), farm_geometry_of(item))
+    if run_state is not None: run_state.finish(item['farm_id'], item['date'], item['task'], len(item['content'] or b""))
+    item['content'] = None  # 저장 후 즉시 메모리에서 해제
+    pipeline_finish(item)
+    return None
+
+
+def run_pipeline(items):
+    """producer → fetch → decode → write 단계를 크기 제한 큐로 연결하여 실행"""
+    pipeline = BoundedPipeline([
+        ("fetch", pipeline_fetch, PIPELINE_FETCH_WORKERS),
+        ("decode", pipeline_decode, 1),
+        ("write", pipeline_write, 1),
+    ], queue_size=PIPELINE_QUEUE_SIZE)
+
+    def on_error(stage, item, error):
+        target = f"{item['farm_id']} / {item['date']} / {item['task']}" if item else ""
+        print(f"\n   ❌ [{stage}] 처리 중 오류 발생: {target} ({error})")
+        if item:
+            pipeline_finish(item, failed=True)
+            if run_state is not None: run_state.fail(item['farm_id'], item['date'], item['task'], error)
+
+    summary = pipeline.run(items, on_error=on_error)
+
+    peak = f"{summary['peak_rss_mb']:.0f} MB" if summary['peak_rss_mb'] is not None else "측정 불가"
+    print(f"\n📊 실행 요약: 저장 {summary['processed']['write']}건, 오류 {summary['errors']}건, "
+          f"소요 {summary['elapsed_sec']:.0f}초, 최대 메모리 {peak}")
+
+
+def run_statistics(poi_files, writer):
+    """Statistical API로 농장별 전체 기간 통계를 받아 표에 기록 (래스터 다운로드 없음)"""
+    for start in range(0, len(poi_files), STATS_BATCH_SIZE):
+        batch_files = poi_files[start:start + STATS_BATCH_SIZE]
+        print(f"\n📊 [{start + 1}-{start + len(batch_files)}/{len(poi_files)}] 통계 요청 준비 중...")
+
+        farm_ids, stats_requests = [], []
+        for file_name in batch_files:
+            try:
+                for aoi in load_aois(os.path.join(AOI_FOLDER_PATH, file_name)):
+                    farm_bbox = BBox(bbox=aoi['bbox'], crs=CRS(aoi['epsg']))
+                    stats_requests.append(build_statistics_request(
+                        farm_bbox, (START_DATE, END_DATE), config, geometry=aoi['geometry'],
+                        max_cc_percent=MAX_CC_PERCENT, indices=VI_INDICES
+                    ))
+                    farm_ids.append(aoi['farm_id'])
+            except Exception as e:
+                print(f"\n   ❌ 처리 중 오류 발생: {file_name} ({e})")
+
+        try:
+            responses = download_statistics(stats_requests, config, max_threads=STATS_MAX_THREADS)
+        except Exception as e:
+            print(f"\n   ❌ 처리 중 오류 발생: {e}")
+            continue
+
+        failed = [farm_id for farm_id, response in zip(farm_ids, responses) if response is None]
+        if failed:
+            print(f"   ⚠️ 통계 요청 실패 농장 {len(failed)}개 (다시 실행하세요): {', '.join(failed)}")
+
+        for farm_id, response in zip(farm_ids, responses):
+            if response is None:
+                continue
+            rows = statistics_rows(farm_id, response, VI_INDICES)
+            writer.add_rows(rows)
+            print(f"   ✅ {farm_id}: {len({row['date'] for row in rows})}개 날짜")
+
+
+def run_composites():
+    """수집된 날짜별 지수 TIFF를 농장/지수/기간별로 합성"""
+    if product_index is not None:
+        farm_ids = product_index.farm_ids()
+    else:
+        farm_ids = sorted({product["farm_id"] for product in scan_products(OUTPUT_FOLDER)})
+
+    print(f"\n🧩 기간별 합성 시작 ({COMPOSITE_PERIOD}, {COMPOSITE_METHOD}, 농장 {len(farm_ids)}개)")
+    for farm_id in farm_ids:
+        print(f"  🚜 [{farm_id}]")
+        for index_name in COMPOSITE_INDICES:
+            try:
+                build_composites(farm_id, index_name, COMPOSITE_FOLDER, period=COMPOSITE_PERIOD,
+                                 method=COMPOSITE_METHOD, product_index=product_index,
+                                 output_folder=OUTPUT_FOLDER, chunk_rows=COMPOSITE_CHUNK_ROWS)
+            except Exception as e:
+                print(f"      ❌ {index_name} 합성 실패: {e}")
+
+
+def run_points():
+    """표본 지점 레이어별로 (지점, 날짜, 지수, 값) 시계열을 추출하여 POINTS_OUTPUT_PATH에 저장"""
+    supported_extensions = ('.zip', '.geojson', '.shp')
+    point_files = [f for f in os.listdir(POINTS_FOLDER_PATH) if f.lower().endswith(supported_extensions)]
+    if not point_files:
+        print(f"\n❌ '{POINTS_FOLDER_PATH}' 폴더에 파일이 없습니다.")
+        return
+
+    for file_idx, file_name in enumerate(point_files):
+        print(f"\n📍 [{file_idx + 1}/{len(point_files)}] 표본 지점 처리: {file_name}")
+        try:
+            points = load_points(os.path.join(POINTS_FOLDER_PATH, file_name), id_column=POINT_ID_COLUMN)
+        except Exception as e:
+            print(f"\n   ❌ 처리 중 오류 발생: {e}")
+            continue
+
+        for (farm_id, epsg), group in group_points(points).items():
+            try:
+                rows = sample_points(group, (START_DATE, END_DATE), config, VI_INDICES,
+                                     max_cc_percent=MAX_CC_PERCENT, max_threads=STATS_MAX_THREADS)
+            except Exception as e:
+                print(f"\n   ❌ 처리 중 오류 발생: {farm_id} / EPSG:{epsg} ({e})")
+                continue
+            write_point_rows(rows, POINTS_OUTPUT_PATH)
+            print(f"   ✅ {farm_id} (EPSG:{epsg}): 지점 {len(group)}개, {len(rows)}행")
+
+    print(f"📄 지점 시계열 저장: {POINTS_OUTPUT_PATH}")
+
+
+def run_diagnostics(poi_files):
+    """모든 농장/후보 날짜의 촬영 범위를 동시에 진단하여 COVERAGE_REPORT_PATH에 저장"""
+    farms = []
+    for file_name in poi_files:
+        try:
+            farms.extend(plan_file(os.path.join(AOI_FOLDER_PATH, file_name), prune=False))
+        except Exception as e:
+            print(f"\n   ❌ 처리 중 오류 발생: {file_name} ({e})")
+
+    # dataMask 미리보기는 Sentinel-2 기준이므로 다른 컬렉션 날짜는 진단하지 않음
+    farms = [{**farm, "dates": [d for d in farm['dates']
+                                if d.get('collection', DEFAULT_COLLECTION) == DEFAULT_COLLECTION]}
+             for farm in farms]
+    total_dates = sum(len(farm['dates']) for farm in farms)
+    print(f"\n🕵️ 촬영 범위 진단 (Sentinel-2): 농장 {len(farms)}개, 후보 날짜 {total_dates}건")
+    rows = check_coverage(farms, config, farm_bbox_of, farm_geometry_of,
+                          resolution=COVERAGE_RESOLUTION, max_threads=COVERAGE_MAX_THREADS)
+    write_coverage_report(rows, COVERAGE_REPORT_PATH)
+
+    failed = [row for row in rows if row['coverage'] is None]
+    empty = [row for row in rows if row['coverage'] == 0.0]
+    partial = [row for row in rows if row['coverage'] is not None and 0.0 < row['coverage'] < 1.0]
+    print(f"   ✅ 완전 촬영 {len(rows) - len(empty) - len(partial) - len(failed)}건, "
+          f"⚠️ 일부 촬영 {len(partial)}건, 🚨 데이터 없음 {len(empty)}건, ❓ 진단 실패 {len(failed)}건")
+    for row in partial + empty:
+        print(f"      - {row['farm_id']} / {row['date']}: {row['coverage']:.1%}")
+    for row in failed:
+        reason = "요청 오류" if row['pixel_count'] is None else "필지가 미리보기 픽셀보다 작음"
+        print(f"      - {row['farm_id']} / {row['date']}: 진단 실패 ({reason})")
+    print(f"📄 진단 결과 저장: {COVERAGE_REPORT_PATH}")
+
+
+def run_verify():
+    """출력 폴더 제품 병렬 검사 → 매니페스트 기록 → 손상/누락 제품만 작업 큐에 재등록"""
+    entries = manifest.entries()
+    products = scan_products(OUTPUT_FOLDER)
+    paths = sorted({p['path'] for p in products} | set(entries))
+    print(f"\n🔍 무결성 검사: 제품 {len(paths)}개 (체크섬 비교: {'예' if VERIFY_CHECKSUMS else '아니오'})")
+
+    results = verify_products(paths, entries, checksums=VERIFY_CHECKSUMS, max_workers=VERIFY_WORKERS)
+    manifest.update_checks(results, products)
+    partials = find_partials(OUTPUT_FOLDER, exclude=(COMPOSITE_FOLDER,))
+
+    bad = [r for r in results if r['status'] != OK]
+    print(f"   ✅ 정상 {len(results) - len(bad)}개, 🚨 손상/누락 {len(bad)}개, 🧩 중간 파일 {len(partials)}개")
+    for r in bad:
+        print(f"      - [{r['status']}] {r['path']}" + (f" ({r['error']})" if r['error'] else ""))
+
+    removable = [r['path'] for r in bad if os.path.exists(r['path'])] + partials
+    if VERIFY_REMOVE_BAD and removable:
+        for path in removable:
+            os.remove(path)
+            if product_index is not None: product_index.remove(path)
+        print(f"   🗑️ 손상 제품/중간 파일 {len(removable)}개 삭제")
+
+    items, unmapped = requeue_items(bad, entries)
+    if items:
+        queue = open_work_queue(QUEUE_URL, lease_seconds=QUEUE_LEASE_SECONDS)
+        print(f"   🔁 다시 받을 작업 {queue.requeue(items)}건 재등록: {QUEUE_URL} (RUN_MODE = \"worker\"로 실행)")
+    if unmapped:
+        print(f"   ⚠️ 매니페스트에 작업 정보가 없어 재등록하지 못한 제품 {len(unmapped)}개 (해당 농장을 다시 실행하세요)")
+    print(f"📄 매니페스트 저장: {MANIFEST_PATH}")
+
+
+def main():
+    global zonal_writer, product_index, run_state, manifest, clip_reported
+
+    if not os.path.exists(OUTPUT_FOLDER): os.makedirs(OUTPUT_FOLDER)
+    if not os.path.exists(AOI_FOLDER_PATH): os.makedirs(AOI_FOLDER_PATH)
+
+    # 절감 추정치는 Process API 요청을 계획하는 모드에서만, 실행마다 새로 기록
+    if CLIP_TO_GEOMETRY and CLIP_REPORT_PATH and RUN_MODE in ("local", "pipeline", "publish", "plan"):
+        if os.path.exists(CLIP_REPORT_PATH): os.remove(CLIP_REPORT_PATH)
+        clip_reported = set()
+
+    if RUN_MODE == "points":
+        if not os.path.exists(POINTS_FOLDER_PATH): os.makedirs(POINTS_FOLDER_PATH)
+        run_points()
+        return
+
+    if RUN_MODE == "publish":
+        poi_files = list_poi_files()
+        if not poi_files:
+            print(f"\n❌ '{AOI_FOLDER_PATH}' 폴더에 파일이 없습니다.")
+            exit()
+        run_publish(poi_files, open_work_queue(QUEUE_URL, lease_seconds=QUEUE_LEASE_SECONDS))
+        return
+
+    if ZONAL_STATS:
+        zonal_writer = ZonalStatsWriter(ZONAL_STATS_PATH)
+    if USE_PRODUCT_INDEX:
+        product_index = ProductIndex(PRODUCT_INDEX_PATH)
+    if RECORD_MANIFEST or RUN_MODE == "verify":
+        manifest = ProductManifest(MANIFEST_PATH)
+    status_server = None
+    if TRACK_PROGRESS and RUN_MODE in ("local", "worker", "pipeline", "execute"):
+        run_state = RunState(RUN_STATE_PATH, stale_sec=QUEUE_LEASE_SECONDS)
+        if STATUS_PORT is not None:
+            status_server = StatusServer(run_state, port=STATUS_PORT)
+            print(f"📡 진행 상태: {status_server.url}")
+
+    try:
+        if RUN_MODE == "verify":
+            run_verify()
+            return
+
+        if RUN_MODE == "worker":
+            run_worker(open_work_queue(QUEUE_URL, lease_seconds=QUEUE_LEASE_SECONDS))
+            return
+
+        if RUN_MODE == "execute":
+            run_execute()
+            return
+
+        poi_files = list_poi_files()
+
+        if not poi_files:
+            print(f"\n❌ '{AOI_FOLDER_PATH}' 폴더에 파일이 없습니다.")
+            exit()
+
+        if RUN_MODE == "plan":
+            run_plan(poi_files)
+            return
+
+        if RUN_MODE == "diagnostics":
+            run_diagnostics(poi_files)
+            return
+
+        if RUN_MODE == "statistics":
+            if zonal_writer is None:
+                zonal_writer = ZonalStatsWriter(ZONAL_STATS_PATH)
+            run_statistics(poi_files, zonal_writer)
+            return
+
+        if RUN_MODE == "pipeline":
+            run_pipeline(pipeline_items(poi_files))
+        else:
+            run_local(poi_files)
+        if COMPOSITE_PERIOD:
+            run_composites()
+        print(f"\n🎉 하이브리드 해상도 시계열 데이터 수집이 모두 완료되었습니다!")
+    finally:
+        if zonal_writer is not None:
+            zonal_writer.close()
+            print(f"📊 구역 통계 저장: {ZONAL_STATS_PATH}")
+        if product_index is not None:
+            product_index.close()
+        if manifest is not None:
+            manifest.close()
+        if run_state is not None:
+            print(f"\n📈 진행 상태 요약\n{format_summary(run_state.summary())}")
+            if status_server is not None:
+                status_server.close()
+            run_state.close()
 
-    except Exception as e:
-        print(f"\n   ❌ 처리 중 오류 발생: {e}")
 
-print(f"\n🎉 하이브리드 해상도 시계열 데이터 수집이 모두 완료되었습니다!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
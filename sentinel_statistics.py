@@ -0,0 +1,119 @@
+"""
+Statistical API(SentinelHubStatistical) 기반 서버측 통계 모드
+- 래스터를 받지 않고 농장 폴리곤 안의 지수 통계만 날짜별로 받음
+- 농장당 요청 1건으로 전체 기간(START_DATE~END_DATE)을 처리하고, 여러 농장을 동시에 요청
+"""
+
+import datetime
+
+from sentinelhub import (
+    SentinelHubStatistical,
+    SentinelHubStatisticalDownloadClient,
+    DataCollection,
+    Geometry,
+)
+
+from sentinel_zonal import PERCENTILES
+from sentinel_evalscripts import build_statistics_evalscript
+
+STATS_INDICES = ["NDVI", "NDMI", "GNDVI", "OSAVI", "NDRE", "LCI"]
+EVALSCRIPT_STATS = build_statistics_evalscript(STATS_INDICES)
+
+
+def build_statistics_request(farm_bbox, time_interval, config, geometry=None, resolution=10, max_cc_percent=100.0,
+                             indices=STATS_INDICES):
+    """
+    농장 하나의 전체 기간 일별 통계 요청 생성
+
+    Args:
+        farm_bbox (BBox): 농장 범위 (UTM)
+        time_interval (tuple): (START_DATE, END_DATE)
+        config (SHConfig): Sentinel Hub 설정
+        geometry (shapely.Geometry, optional): AOI 폴리곤 (있으면 폴리곤 내부만 집계)
+        resolution (int): 집계 해상도 (미터)
+        max_cc_percent (float): 장면 구름 비율 상한 (%)
+        indices (list): 집계할 지수 목록 (필요한 밴드만 요청)
+
+    Returns:
+        SentinelHubStatistical: 통계 요청
+    """
+    return SentinelHubStatistical(
+        aggregation=SentinelHubStatistical.aggregation(
+            evalscript=build_statistics_evalscript(indices),
+            time_interval=time_interval,
+            aggregation_interval="P1D",
+            resolution=(resolution, resolution),
+        ),
+        input_data=[
+            SentinelHubStatistical.input_data(
+                DataCollection.SENTINEL2_L2A,
+                maxcc=max_cc_percent / 100.0,
+                mosaicking_order="leastCC",
+            )
+        ],
+        bbox=None if geometry is not None else farm_bbox,
+        geometry=Geometry(geometry, farm_bbox.crs) if geometry is not None else None,
+        calculations={"default": {"statistics": {"default": {"percentiles": {"k": list(PERCENTILES)}}}}},
+        config=config,
+    )
+
+
+def download_statistics(requests, config, max_threads=5):
+    """
+    여러 농장의 통계 요청을 동시에 실행
+
+    Args:
+        requests (list): build_statistics_request 결과 리스트
+        config (SHConfig): Sentinel Hub 설정
+        max_threads (int): 동시 요청 수
+
+    Returns:
+        list: 요청 순서와 같은 순서의 응답(JSON) 리스트 (실패한 요청은 None, 나머지 결과는 유지)
+    """
+    download_requests = [request.download_list[0] for request in requests]
+    client = SentinelHubStatisticalDownloadClient(config=config, raise_download_errors=False)
+    return client.download(download_requests, max_threads=max_threads)
+
+
+def statistics_rows(farm_id, response, indices=STATS_INDICES):
+    """
+    Statistical API 응답을 구역 통계 표(sentinel_zonal.STAT_COLUMNS) 행으로 변환
+
+    Returns:
+        list: {'farm_id', 'date', 'index', 'pixel_count', ...} 딕셔너리 리스트
+    """
+    rows = []
+    for interval in response.get("data", []):
+        if "error" in interval:
+            continue
+
+        date_str = datetime.datetime.fromisoformat(
+            interval["interval"]["from"].replace('Z', '+00:00')
+        ).strftime("%Y-%m-%d")
+
+        for identifier in indices:
+            stats = interval["outputs"][identifier]["bands"]["B0"]["stats"]
+            pixel_count = int(stats["sampleCount"])
+            valid_count = pixel_count - int(stats["noDataCount"])
+            if valid_count == 0:
+                continue
+
+            percentiles = {float(k): v for k, v in stats.get("percentiles", {}).items()}
+            rows.append({
+                "farm_id": farm_id,
+                "date": date_str,
+                "index": identifier,
+                "pixel_count": pixel_count,
+                "valid_count": valid_count,
+                "valid_fraction": valid_count / pixel_count if pixel_count else 0.0,
+                "mean": stats["mean"],
+                "std": stats["stDev"],
+                "min": stats["min"],
+                "p10": percentiles.get(10.0),
+                "p25": percentiles.get(25.0),
+                "median": percentiles.get(50.0),
+                "p75": percentiles.get(75.0),
+                "p90": percentiles.get(90.0),
+                "max": stats["max"],
+            })
+    return rows
@@ -0,0 +1,349 @@
+"""
+GeoTIFF 태그 읽기/추가 유틸리티 (순수 파이썬, classic TIFF 전용)
+- 픽셀 데이터를 다시 인코딩하지 않고 첫 번째 IFD의 태그만 읽거나 추가
+- GDAL 메타데이터(scale/offset/밴드 설명)와 NoData 태그 작성에 사용
+"""
+
+import os
+import zlib
+import struct
+from xml.sax.saxutils import escape
+
+TAG_IMAGE_WIDTH = 256
+TAG_IMAGE_LENGTH = 257
+TAG_BITS_PER_SAMPLE = 258
+TAG_COMPRESSION = 259
+TAG_STRIP_OFFSETS = 273
+TAG_SAMPLES_PER_PIXEL = 277
+TAG_ROWS_PER_STRIP = 278
+TAG_STRIP_BYTE_COUNTS = 279
+TAG_PLANAR_CONFIG = 284
+TAG_PREDICTOR = 317
+TAG_TILE_WIDTH = 322
+TAG_TILE_LENGTH = 323
+TAG_TILE_OFFSETS = 324
+TAG_TILE_BYTE_COUNTS = 325
+TAG_SAMPLE_FORMAT = 339
+TAG_MODEL_PIXEL_SCALE = 33550
+TAG_MODEL_TIEPOINT = 33922
+TAG_MODEL_TRANSFORMATION = 34264
+TAG_GEO_KEY_DIRECTORY = 34735
+TAG_GEO_DOUBLE_PARAMS = 34736
+TAG_GEO_ASCII_PARAMS = 34737
+TAG_GDAL_METADATA = 42112
+TAG_GDAL_NODATA = 42113
+
+TYPE_ASCII = 2
+TYPE_SHORT = 3
+TYPE_LONG = 4
+TYPE_DOUBLE = 12
+
+# 좌표 정보(GeoTIFF) 태그: 원본 파일에서 합성/가공 결과로 그대로 복사
+GEO_TAGS = (TAG_MODEL_PIXEL_SCALE, TAG_MODEL_TIEPOINT, TAG_MODEL_TRANSFORMATION,
+            TAG_GEO_KEY_DIRECTORY, TAG_GEO_DOUBLE_PARAMS, TAG_GEO_ASCII_PARAMS)
+
+# TIFF 자료형 번호 -> (struct 형식, 바이트 수)
+TYPE_FORMATS = {
+    1: ("B", 1), 2: ("s", 1), 3: ("H", 2), 4: ("I", 4), 5: ("II", 8),
+    6: ("b", 1), 7: ("B", 1), 8: ("h", 2), 9: ("i", 4), 10: ("ii", 8),
+    11: ("f", 4), 12: ("d", 8),
+}
+
+
+def _read_header(f):
+    f.seek(0)
+    header = f.read(8)
+    if len(header) < 8 or header[:2] not in (b"II", b"MM"):
+        raise ValueError("TIFF 파일이 아닙니다.")
+
+    byteorder = "<" if header[:2] == b"II" else ">"
+    magic, ifd_offset = struct.unpack(f"{byteorder}HI", header[2:8])
+    if magic == 43:
+        raise ValueError("BigTIFF는 지원하지 않습니다.")
+    if magic != 42:
+        raise ValueError("TIFF 파일이 아닙니다.")
+    return byteorder, ifd_offset
+
+
+def _read_raw_entries(f, byteorder, ifd_offset):
+    f.seek(ifd_offset)
+    (count,) = struct.unpack(f"{byteorder}H", f.read(2))
+    entries = {}
+    for _ in range(count):
+        tag, typ, n, raw = struct.unpack(f"{byteorder}HHI4s", f.read(12))
+        entries[tag] = (typ, n, raw)
+    (next_ifd,) = struct.unpack(f"{byteorder}I", f.read(4))
+    return entries, next_ifd
+
+
+def _decode_value(f, byteorder, typ, n, raw):
+    fmt, size = TYPE_FORMATS.get(typ, ("B", 1))
+    total = size * n
+    if total <= 4:
+        data = raw[:total]
+    else:
+        (offset,) = struct.unpack(f"{byteorder}I", raw)
+        f.seek(offset)
+        data = f.read(total)
+
+    if typ == TYPE_ASCII:
+        return data.rstrip(b"\x00").decode("latin-1")
+    values = struct.unpack(f"{byteorder}{fmt * n}", data)
+    if typ in (5, 10):
+        values = tuple(values[i] / values[i + 1] if values[i + 1] else 0.0 for i in range(0, len(values), 2))
+    return values
+
+
+def _encode_value(byteorder, value, force_long=False):
+    """
+    태그 값을 (자료형, 개수, 바이트)로 변환
+    str -> ASCII, float 포함 -> DOUBLE, 65535 이하 정수 -> SHORT, 그 외 정수 -> LONG
+    """
+    if isinstance(value, str):
+        data = value.encode("latin-1") + b"\x00"
+        return TYPE_ASCII, len(data), data
+
+    values = tuple(value) if isinstance(value, (list, tuple)) else (value,)
+    if any(isinstance(v, float) for v in values):
+        return TYPE_DOUBLE, len(values), struct.pack(f"{byteorder}{'d' * len(values)}", *values)
+    if not force_long and all(0 <= v <= 0xFFFF for v in values):
+        return TYPE_SHORT, len(values), struct.pack(f"{byteorder}{'H' * len(values)}", *values)
+    return TYPE_LONG, len(values), struct.pack(f"{byteorder}{'I' * len(values)}", *values)
+
+
+def _write_ifd(f, byteorder, entries, tags, next_ifd=0, long_tags=()):
+    """
+    파일 끝에 태그 값과 IFD를 쓰고 IFD 위치 반환
+
+    Args:
+        entries (dict): 기존 IFD 항목 {태그: (자료형, 개수, 4바이트 원본)}
+        tags (dict): 추가/교체할 태그 {태그: 값}
+        long_tags (tuple): 값 크기와 관계없이 LONG으로 기록할 태그 (strip 위치 등)
+    """
+    f.seek(0, 2)
+    end = f.tell()
+    if end % 2:
+        f.write(b"\x00")
+        end += 1
+
+    entries = dict(entries)
+    for tag, value in tags.items():
+        typ, n, data = _encode_value(byteorder, value, force_long=tag in long_tags)
+        if len(data) <= 4:
+            raw = data.ljust(4, b"\x00")
+        else:
+            f.write(data)
+            raw = struct.pack(f"{byteorder}I", end)
+            end += len(data)
+            if end % 2:
+                f.write(b"\x00")
+                end += 1
+        entries[tag] = (typ, n, raw)
+
+    ifd_offset = end
+    f.write(struct.pack(f"{byteorder}H", len(entries)))
+    for tag in sorted(entries):
+        typ, n, raw = entries[tag]
+        f.write(struct.pack(f"{byteorder}HHI4s", tag, typ, n, raw))
+    f.write(struct.pack(f"{byteorder}I", next_ifd))
+    return ifd_offset
+
+
+def read_byteorder(path):
+    """TIFF 바이트 순서 ('<' 리틀 엔디언, '>' 빅 엔디언)"""
+    with open(path, "rb") as f:
+        return _read_header(f)[0]
+
+
+def read_tiff_tags(path):
+    """
+    첫 번째 IFD의 모든 태그 읽기
+
+    Args:
+        path (str): TIFF 파일 경로
+
+    Returns:
+        dict: {태그 번호: 값} (ASCII는 str, 나머지는 tuple)
+    """
+    with open(path, "rb") as f:
+        byteorder, ifd_offset = _read_header(f)
+        entries, _ = _read_raw_entries(f, byteorder, ifd_offset)
+        return {tag: _decode_value(f, byteorder, *entry) for tag, entry in entries.items()}
+
+
+def add_tiff_tags(path, tags):
+    """
+    픽셀 데이터는 그대로 두고 첫 번째 IFD에 태그 추가/교체
+
+    새 IFD를 파일 끝에 쓰고 헤더의 IFD 위치만 마지막에 갱신하므로,
+    중간에 종료되어도 기존 IFD를 가리키는 온전한 파일이 남습니다.
+
+    Args:
+        path (str): TIFF 파일 경로
+        tags (dict): {태그 번호: 값} (str이면 ASCII, int 리스트/튜플이면 SHORT)
+    """
+    with open(path, "r+b") as f:
+        byteorder, ifd_offset = _read_header(f)
+        entries, next_ifd = _read_raw_entries(f, byteorder, ifd_offset)
+
+        new_ifd_offset = _write_ifd(f, byteorder, entries, tags, next_ifd)
+        f.flush()
+
+        f.seek(4)
+        f.write(struct.pack(f"{byteorder}I", new_ifd_offset))
+
+
+class TiffStripWriter:
+    """
+    strip TIFF를 위에서부터 행 묶음 단위로 기록 (전체 배열을 메모리에 두지 않음, 기본은 비압축)
+
+    Examples:
+        >>> with TiffStripWriter("out.tif", width, height, "float32", tags=geo_tags) as writer:
+        ...     for chunk in chunks:
+        ...         writer.write_rows(chunk)
+    """
+
+    SAMPLE_FORMATS = {"u": 1, "i": 2, "f": 3}
+
+    def __init__(self, path, width, height, dtype, bands=1, tags=None, compress=False):
+        """
+        초기화
+
+        Args:
+            path (str): 출력 경로
+            width (int): 열 수
+            height (int): 행 수
+            dtype (str or np.dtype): 픽셀 자료형 (예: 'float32', 'int16')
+            bands (int): 밴드 수 (픽셀 단위로 교차 저장)
+            tags (dict, optional): 추가 태그 {태그: 값} (좌표 정보, GDAL 메타데이터 등)
+            compress (bool): True면 strip마다 Deflate 압축 (Sentinel Hub 응답 TIFF와 같은 방식)
+        """
+        import numpy as np
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.bands = bands
+        self.dtype = np.dtype(dtype).newbyteorder("<")
+        self.tags = dict(tags or {})
+        self.compress = compress
+        self.rows_written = 0
+        self.rows_per_strip = None
+        self.last_rows = None
+        self.strip_offsets = []
+        self.strip_byte_counts = []
+        self.tmp_path = f"{path}.{id(self)}.tmp"
+
+        self.f = open(self.tmp_path, "wb")
+        self.f.write(b"II" + struct.pack("<HI", 42, 0))
+
+    def write_rows(self, array):
+        """(rows, width) 또는 (rows, width, bands) 배열을 다음 strip으로 기록 (마지막 strip 외에는 같은 행 수)"""
+        import numpy as np
+
+        array = np.ascontiguousarray(array, dtype=self.dtype)
+        if array.shape[1] != self.width:
+            raise ValueError(f"열 수가 맞지 않습니다: {array.shape[1]} != {self.width}")
+        if self.rows_per_strip is None:
+            self.rows_per_strip = array.shape[0]
+        elif self.last_rows != self.rows_per_strip:
+            # TIFF는 마지막 strip만 짧을 수 있음 (RowsPerStrip은 하나)
+            raise ValueError(f"마지막이 아닌 strip의 행 수가 다릅니다: {self.last_rows} != {self.rows_per_strip}")
+        self.last_rows = array.shape[0]
+        data = array.tobytes()
+        if self.compress:
+            data = zlib.compress(data, 6)
+        self.strip_offsets.append(self.f.tell())
+        self.strip_byte_counts.append(len(data))
+        self.f.write(data)
+        self.rows_written += array.shape[0]
+
+    def close(self):
+        if self.f is None:
+            return
+        if self.rows_written != self.height:
+            self.f.close()
+            self.f = None
+            os.remove(self.tmp_path)
+            raise ValueError(f"기록한 행 수({self.rows_written})가 이미지 높이({self.height})와 다릅니다.")
+
+        rows_per_strip = self.rows_per_strip or max(1, self.height)
+        tags = {
+            TAG_IMAGE_WIDTH: (self.width,),
+            TAG_IMAGE_LENGTH: (self.height,),
+            TAG_BITS_PER_SAMPLE: (self.dtype.itemsize * 8,) * self.bands,
+            TAG_COMPRESSION: (8 if self.compress else 1,),
+            262: (1,),  # PhotometricInterpretation: BlackIsZero
+            TAG_STRIP_OFFSETS: tuple(self.strip_offsets),
+            TAG_SAMPLES_PER_PIXEL: (self.bands,),
+            TAG_ROWS_PER_STRIP: (rows_per_strip,),
+            TAG_STRIP_BYTE_COUNTS: tuple(self.strip_byte_counts),
+            TAG_PLANAR_CONFIG: (1,),
+            TAG_SAMPLE_FORMAT: (self.SAMPLE_FORMATS[self.dtype.kind],) * self.bands,
+        }
+        tags.update(self.tags)
+        ifd_offset = _write_ifd(self.f, "<", {}, tags,
+                                long_tags=(TAG_STRIP_OFFSETS, TAG_STRIP_BYTE_COUNTS))
+        self.f.seek(4)
+        self.f.write(struct.pack("<I", ifd_offset))
+        self.f.close()
+        self.f = None
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self.f is not None:
+            self.f.close()
+            self.f = None
+            os.remove(self.tmp_path)
+            return False
+        self.close()
+        return False
+
+
+def gdal_metadata_xml(items=None, band_items=None):
+    """
+    GDAL_METADATA(42112) 태그용 XML 생성
+
+    Args:
+        items (dict, optional): 데이터셋 수준 메타데이터 {이름: 값}
+        band_items (dict, optional): {밴드 번호(0부터): {role 또는 이름: 값}}
+            role이 'scale', 'offset', 'description'인 항목은 GDAL이 밴드 속성으로 인식
+
+    Returns:
+        str: <GDALMetadata> XML 문자열
+    """
+    lines = ["<GDALMetadata>"]
+    for name, value in (items or {}).items():
+        lines.append(f'  <Item name="{escape(str(name))}">{escape(str(value))}</Item>')
+    for band, band_meta in sorted((band_items or {}).items()):
+        for name, value in band_meta.items():
+            role = f' role="{name}"' if name in ("scale", "offset", "description") else ""
+            item_name = name.upper() if role else name
+            lines.append(f'  <Item name="{escape(item_name)}" sample="{band}"{role}>{escape(str(value))}</Item>')
+    lines.append("</GDALMetadata>")
+    return "\n".join(lines)
+
+
+def parse_gdal_metadata(xml_text):
+    """
+    GDAL_METADATA XML을 딕셔너리로 변환
+
+    Returns:
+        tuple: (데이터셋 메타데이터 dict, {밴드 번호: {role 또는 이름: 값}})
+    """
+    import xml.etree.ElementTree as ET
+
+    items, band_items = {}, {}
+    if not xml_text:
+        return items, band_items
+
+    for item in ET.fromstring(xml_text).iter("Item"):
+        name = item.get("role") or item.get("name")
+        if item.get("sample") is None:
+            items[name] = item.text or ""
+        else:
+            band_items.setdefault(int(item.get("sample")), {})[name] = item.text or ""
+    return items, band_items
@@ -0,0 +1,84 @@
+"""
+농장별 워터마크(마지막으로 처리한 촬영 시각) 저장소
+- 증분 실행 시 워터마크 이후에 촬영된 장면만 카탈로그에서 조회
+- JSON 파일 하나에 {farm_id: ISO 시각} 형태로 저장 (임시 파일 교체 방식으로 원자적 저장)
+"""
+
+import os
+import json
+import datetime
+import threading
+
+
+def parse_datetime(value):
+    """ISO 8601 문자열('Z' 포함)을 timezone이 있는 datetime으로 변환"""
+    dt_obj = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt_obj.tzinfo is None:
+        dt_obj = dt_obj.replace(tzinfo=datetime.timezone.utc)
+    return dt_obj
+
+
+class WatermarkStore:
+    """농장별 마지막 처리 촬영 시각 저장소"""
+
+    def __init__(self, path):
+        """
+        초기화
+
+        Args:
+            path (str): 워터마크 JSON 파일 경로
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.marks = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.marks = json.load(f)
+
+    def get(self, farm_id):
+        """
+        Returns:
+            datetime: 마지막으로 처리한 촬영 시각 (처음 실행하는 농장이면 None)
+        """
+        value = self.marks.get(farm_id)
+        return parse_datetime(value) if value else None
+
+    def update(self, farm_id, acquired):
+        """
+        워터마크를 앞으로만 이동하고 즉시 파일에 저장
+
+        Args:
+            farm_id (str): 농장 ID
+            acquired (str or datetime): 처리를 마친 장면의 촬영 시각
+        """
+        if isinstance(acquired, str):
+            acquired = parse_datetime(acquired)
+
+        with self.lock:
+            current = self.get(farm_id)
+            if current is not None and acquired <= current:
+                return
+            self.marks[farm_id] = acquired.isoformat()
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.marks, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def incremental_interval(since, start_date):
+    """
+    증분 실행의 카탈로그 조회 기간 (워터마크 직후 ~ 현재)
+
+    양 끝을 모두 timezone이 있는 UTC datetime으로 맞춤
+    (한쪽만 naive이면 sentinelhub가 기간을 비교할 때 TypeError)
+
+    Args:
+        since (datetime): 워터마크 (처음 실행하는 농장이면 None → start_date부터)
+        start_date (str): 기본 시작 날짜 'YYYY-MM-DD'
+
+    Returns:
+        tuple: (시작 datetime, 끝 datetime)
+    """
+    start = since + datetime.timedelta(seconds=1) if since else parse_datetime(start_date)
+    return start, datetime.datetime.now(datetime.timezone.utc)
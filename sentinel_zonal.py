@@ -0,0 +1,164 @@
+"""
+농장(AOI) 폴리곤 단위 구역 통계
+- VI 배열이 도착하는 즉시 폴리곤 마스크 안의 평균/중앙값/백분위수/유효 픽셀 수 계산
+- 결과를 CSV 또는 Parquet 표에 누적 (출력 폴더를 다시 읽는 후처리 불필요)
+- Parquet은 실행마다 part 파일을 하나씩 추가하는 폴더(데이터셋)로 저장 (pq.read_table(경로)로 한 번에 읽음)
+"""
+
+import os
+import csv
+import time
+
+import numpy as np
+import shapely
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+PERCENTILES = (10, 25, 50, 75, 90)
+STAT_COLUMNS = [
+    "farm_id", "date", "index", "pixel_count", "valid_count", "valid_fraction",
+    "mean", "std", "min", "p10", "p25", "median", "p75", "p90", "max",
+]
+
+
+def polygon_mask(geometry, bbox, size):
+    """
+    폴리곤 내부에 중심점이 있는 픽셀을 True로 표시한 마스크 생성
+
+    Args:
+        geometry (shapely.Geometry): AOI 폴리곤 (bbox와 같은 좌표계)
+        bbox (list): [min_x, min_y, max_x, max_y]
+        size (tuple): (width, height) 픽셀 수
+
+    Returns:
+        np.ndarray: (height, width) bool 배열 (0행이 북쪽)
+    """
+    min_x, min_y, max_x, max_y = bbox
+    width, height = size
+    xs = min_x + (np.arange(width) + 0.5) * (max_x - min_x) / width
+    ys = max_y - (np.arange(height) + 0.5) * (max_y - min_y) / height
+    grid_x, grid_y = np.meshgrid(xs, ys)
+    return shapely.contains_xy(geometry, grid_x, grid_y)
+
+
+def zonal_statistics(array, mask, nodata=0.0):
+    """
+    마스크 영역의 통계 계산
+
+    Args:
+        array (np.ndarray): 지수 값 배열 (height, width) 또는 (height, width, 1)
+        mask (np.ndarray): polygon_mask 결과
+        nodata (float): 유효하지 않은 값 (EVALSCRIPT_VIS는 dataMask가 0인 곳에 0을 반환)
+            None이면 NaN만 제외 (decode_index로 복원한 INT16 배열)
+
+    Returns:
+        dict: pixel_count, valid_count, valid_fraction, mean, std, min, 백분위수, max
+    """
+    values = np.asarray(array, dtype=np.float32).reshape(mask.shape)[mask]
+    valid_mask = np.isfinite(values)
+    if nodata is not None:
+        valid_mask &= values != nodata
+    valid = values[valid_mask]
+
+    stats = {
+        "pixel_count": int(values.size),
+        "valid_count": int(valid.size),
+        "valid_fraction": float(valid.size / values.size) if values.size else 0.0,
+    }
+    if valid.size == 0:
+        stats.update({name: None for name in ("mean", "std", "min", "p10", "p25", "median", "p75", "p90", "max")})
+        return stats
+
+    p10, p25, median, p75, p90 = np.percentile(valid, PERCENTILES)
+    stats.update({
+        "mean": float(valid.mean()),
+        "std": float(valid.std()),
+        "min": float(valid.min()),
+        "p10": float(p10),
+        "p25": float(p25),
+        "median": float(median),
+        "p75": float(p75),
+        "p90": float(p90),
+        "max": float(valid.max()),
+    })
+    return stats
+
+
+class ZonalStatsWriter:
+    """구역 통계 행을 CSV(이어쓰기) 또는 Parquet 데이터셋(실행별 part 파일 추가)에 누적 기록"""
+
+    def __init__(self, path, flush_rows=500):
+        """
+        초기화
+
+        Args:
+            path (str): 출력 경로 (.csv 파일 또는 .parquet 폴더)
+            flush_rows (int): Parquet 행 그룹 하나에 모을 행 수
+        """
+        self.path = path
+        self.flush_rows = flush_rows
+        self.is_parquet = path.lower().endswith(".parquet")
+        self.rows = []
+        self.parquet_writer = None
+
+        if self.is_parquet and pa is None:
+            raise ImportError("Parquet 출력에는 'pip install pyarrow'가 필요합니다. (.csv 경로를 사용하세요)")
+
+    def add(self, farm_id, date, index, stats):
+        self.rows.append({"farm_id": farm_id, "date": date, "index": index, **stats})
+        if not self.is_parquet or len(self.rows) >= self.flush_rows:
+            self.flush()
+
+    def add_rows(self, rows):
+        """이미 완성된 행들을 추가 (Statistical API 결과 등)"""
+        self.rows.extend(rows)
+        if not self.is_parquet or len(self.rows) >= self.flush_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+
+        if self.is_parquet:
+            table = pa.Table.from_pylist(self.rows, schema=self._parquet_schema())
+            if self.parquet_writer is None:
+                self.parquet_writer = pq.ParquetWriter(self._new_part_path(), table.schema)
+            self.parquet_writer.write_table(table)
+        else:
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=STAT_COLUMNS)
+                if write_header:
+                    writer.writeheader()
+                writer.writerows(self.rows)
+
+        self.rows = []
+
+    def _new_part_path(self):
+        """이번 실행의 part 파일 경로 (이전 실행의 part 파일은 그대로 둠)"""
+        if os.path.isfile(self.path):
+            # 예전 방식의 단일 Parquet 파일은 데이터셋의 첫 part 파일로 옮김
+            legacy_path = self.path + ".legacy"
+            os.replace(self.path, legacy_path)
+            os.makedirs(self.path)
+            os.replace(legacy_path, os.path.join(self.path, "part-00000000T000000-0.parquet"))
+        os.makedirs(self.path, exist_ok=True)
+        return os.path.join(self.path, f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.parquet")
+
+    @staticmethod
+    def _parquet_schema():
+        fields = [("farm_id", pa.string()), ("date", pa.string()), ("index", pa.string()),
+                  ("pixel_count", pa.int64()), ("valid_count", pa.int64())]
+        fields += [(name, pa.float64()) for name in STAT_COLUMNS[5:]]
+        return pa.schema(fields)
+
+    def close(self):
+        self.flush()
+        if self.parquet_writer is not None:
+            self.parquet_writer.close()
+            self.parquet_writer = None
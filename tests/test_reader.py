@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from sentinel_reader import GeoTiffReader
+
+tifffile = pytest.importorskip("tifffile")
+pytest.importorskip("imagecodecs")
+
+
+@pytest.mark.parametrize("tile", [None, (32, 32)])
+@pytest.mark.parametrize("compression", ["zlib", "lzw"])
+def test_multiband_float_predictor_round_trip(tmp_path, tile, compression):
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(50, 70, 6)).astype(np.float32)
+    path = str(tmp_path / "stack.tif")
+    tifffile.imwrite(path, data, photometric="minisblack", planarconfig="contig", predictor=3,
+                     compression=compression, tile=tile, rowsperstrip=16)
+
+    reader = GeoTiffReader(path)
+    assert reader.predictor == 3 and reader.samples == 6
+    for band in range(6):
+        np.testing.assert_array_equal(reader.read(band, decode=False), data[:, :, band])
+    np.testing.assert_array_equal(reader.read(3, window=(10, 20, 15, 30), decode=False), data[10:25, 20:50, 3])
@@ -0,0 +1,21 @@
+import numpy as np
+import pytest
+
+from sentinel_reader import GeoTiffReader
+from sentinel_tiff import TiffStripWriter
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_strip_writer_short_last_strip(tmp_path, compress):
+    data = np.arange(400 * 30 * 2, dtype=np.float32).reshape(400, 30, 2)
+    path = str(tmp_path / "out.tif")
+    with TiffStripWriter(path, 30, 400, "float32", bands=2, compress=compress) as writer:
+        for row in range(0, 400, 256):
+            writer.write_rows(data[row:row + 256])
+
+    reader = GeoTiffReader(path)
+    for band in range(2):
+        np.testing.assert_array_equal(reader.read(band, decode=False), data[:, :, band])
+
+    tifffile = pytest.importorskip("tifffile")
+    np.testing.assert_array_equal(tifffile.imread(path), data)
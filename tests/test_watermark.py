@@ -0,0 +1,31 @@
+import datetime
+
+import pytest
+
+from sentinel_watermark import WatermarkStore, incremental_interval
+
+
+def test_second_pass_interval_with_existing_watermark(tmp_path):
+    path = str(tmp_path / "watermarks.json")
+
+    # 첫 실행: 워터마크 없음 → START_DATE부터
+    first = WatermarkStore(path)
+    start, end = incremental_interval(first.get("farm"), "2026-01-01")
+    assert start == datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    first.update("farm", "2026-01-05T02:03:04Z")
+
+    # 두 번째 실행: 파일에서 워터마크를 다시 읽어 그 직후부터
+    since = WatermarkStore(path).get("farm")
+    start, end = incremental_interval(since, "2026-01-01")
+    assert start.tzinfo is not None and end.tzinfo is not None
+    assert since < start < end
+
+
+def test_interval_is_accepted_by_sentinelhub(tmp_path):
+    time_utils = pytest.importorskip("sentinelhub.time_utils")
+    store = WatermarkStore(str(tmp_path / "watermarks.json"))
+    store.update("farm", "2026-01-05T02:03:04Z")
+
+    for since in (None, store.get("farm")):
+        start, end = time_utils.parse_time_interval(incremental_interval(since, "2026-01-01"))
+        assert start < end